@@ -0,0 +1,280 @@
+# search_benchmark.py
+# -------------------
+# Licensing Information:
+# Please DO NOT DISTRIBUTE OR PUBLISH solutions to this project.
+# You are free to use and extend these projects for EDUCATIONAL PURPOSES ONLY.
+# The Hunt The Wumpus AI project was developed at University of Arizona
+# by Clay Morrison (clayton@sista.arizona.edu), spring 2013.
+# This project extends the python code provided by Peter Norvig as part of
+# the Artificial Intelligence: A Modern Approach (AIMA) book example code;
+# see http://aima.cs.berkeley.edu/code.html
+# In particular, the following files come directly from the AIMA python
+# code: ['agents.py', 'logic.py', 'search.py', 'utils.py']
+# ('logic.py' has been modified by Clay Morrison in locations with the
+# comment 'CTM')
+# The file ['minisat.py'] implements a slim system call wrapper to the minisat
+# (see http://minisat.se) SAT solver, and is directly based on the satispy
+# python project, see https://github.com/netom/satispy .
+
+"""
+Benchmark the search.py algorithms on generated Wumpus planning problems.
+
+PlanRouteProblem and PlanShotProblem instances are generated on synthetic
+square grids (4x4 up to 256x256) with a given obstacle density.  Each
+searcher is run in a forked child process (so a runaway search can be
+stopped with a timeout and its peak memory measured on its own), wrapped
+in search.InstrumentedProblem to count node expansions and goal tests.
+Results are written as JSON and can be compared against a stored baseline.
+
+USAGE:     python benchmarks/search_benchmark.py <options>
+EXAMPLES:  (1) python benchmarks/search_benchmark.py -o search_results.json
+               - run the default grid of sizes/densities/searchers
+           (2) python benchmarks/search_benchmark.py -n 4,8,16 -b search_baseline.json
+               - run small grids and report regressions against a baseline
+"""
+
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import json
+import platform
+import random
+import resource
+import select
+import signal
+import time
+
+import search
+import wumpus_grid_search
+from wumpus_planners import PlanRouteProblem, PlanShotProblem
+
+SEARCHERS = ['astar_search', 'uniform_cost_search', 'breadth_first_search',
+             'recursive_best_first_search', 'iterative_deepening_search']
+
+#-------------------------------------------------------------------------------
+# Problem generation
+#-------------------------------------------------------------------------------
+
+def generate_grid(size, density, seed):
+    """
+    Return (allowed, start, rng): the set of free (x,y) locations of a
+    size x size grid where each cell other than the start (1,1) is an
+    obstacle with probability density.
+    """
+    rng = random.Random(seed)
+    start = (1, 1)
+    allowed = set((x, y)
+                  for x in range(1, size + 1)
+                  for y in range(1, size + 1)
+                  if (x, y) == start or rng.random() >= density)
+    return allowed, start, rng
+
+def reachable_locations(allowed, start):
+    """ Locations reachable from start (any heading), sorted """
+    planner = wumpus_grid_search.GridPlanner(allowed)
+    dist = planner.distances([(start[0], start[1], h) for h in range(4)])
+    return sorted(set(planner.decode(s)[:2]
+                      for s in range(len(dist)) if dist[s] >= 0))
+
+def generate_problems(size, density, seed=0):
+    """
+    Generate one PlanRouteProblem (route to a random reachable location)
+    and one PlanShotProblem (face a random obstacle location) per grid.
+    Returns list of (kind, problem).
+    """
+    allowed, start, rng = generate_grid(size, density, seed)
+    reachable = reachable_locations(allowed, start)
+    initial = (start[0], start[1], 0)
+    problems = []
+    if len(reachable) > 1:
+        goal = rng.choice([loc for loc in reachable if loc != start])
+        problems.append(('route', PlanRouteProblem(initial, [goal], allowed)))
+    blocked = [(x, y) for x in range(1, size + 1) for y in range(1, size + 1)
+               if (x, y) not in allowed]
+    wumpus = rng.choice(blocked) if blocked else (size, size)
+    problems.append(('shot', PlanShotProblem(initial, [wumpus], allowed)))
+    return problems
+
+#-------------------------------------------------------------------------------
+# Running searchers
+#-------------------------------------------------------------------------------
+
+def run_searcher(searcher_name, problem):
+    """ Run one searcher on problem in this process; return result dict """
+    searcher = getattr(search, searcher_name)
+    p = search.InstrumentedProblem(problem)
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start_time = time.time()
+    node = searcher(p)
+    wall_time = time.time() - start_time
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    solved = node is not None and node != 'cutoff'
+    return {'status': 'ok',
+            'expansions': p.succs,
+            'goal_tests': p.goal_tests,
+            'states': p.states,
+            'solution_length': len(node.solution()) if solved else None,
+            'wall_time': wall_time,
+            'peak_memory_kb': max(0, rss_after - rss_before)}
+
+def run_isolated(searcher_name, problem, timeout):
+    """
+    Run run_searcher in a forked child; results come back over a pipe.
+    Returns {'status': 'timeout'} if the child takes longer than timeout
+    seconds, {'status': 'error', ...} if it raised.
+    """
+    rfd, wfd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(rfd)
+        try:
+            result = run_searcher(searcher_name, problem)
+        except BaseException as e:
+            result = {'status': 'error', 'error': '{0}: {1}'.format(e.__class__.__name__, e)}
+        os.write(wfd, json.dumps(result))
+        os.close(wfd)
+        os._exit(0)
+    os.close(wfd)
+    chunks = []
+    deadline = time.time() + timeout
+    while True:
+        remaining = deadline - time.time()
+        ready = select.select([rfd], [], [], max(0, remaining))[0] if remaining > 0 else []
+        if not ready:
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+            os.close(rfd)
+            return {'status': 'timeout', 'wall_time': timeout}
+        chunk = os.read(rfd, 65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    os.close(rfd)
+    os.waitpid(pid, 0)
+    return json.loads(''.join(chunks))
+
+def run_benchmark(sizes, densities, searchers=SEARCHERS, timeout=10.0, seed=0,
+                  verbose=True):
+    """ Run every searcher on every generated problem; return list of records """
+    records = []
+    for size in sizes:
+        for density in densities:
+            for kind, problem in generate_problems(size, density, seed):
+                for searcher_name in searchers:
+                    result = run_isolated(searcher_name, problem, timeout)
+                    result.update({'problem': kind, 'size': size,
+                                   'density': density, 'seed': seed,
+                                   'searcher': searcher_name})
+                    records.append(result)
+                    if verbose:
+                        print format_record(result)
+    return records
+
+def format_record(r):
+    s = '{0:5} {1:>3}x{1:<3} d={2:.2f} {3:28} {4:7}'.format(
+        r['problem'], r['size'], r['density'], r['searcher'], r['status'])
+    if r['status'] == 'ok':
+        s += ' len={0} expanded={1} goal_tests={2} time={3:.4f}s mem={4}KB'.format(
+            r['solution_length'], r['expansions'], r['goal_tests'],
+            r['wall_time'], r['peak_memory_kb'])
+    elif r['status'] == 'error':
+        s += ' ' + r['error']
+    return s
+
+def environment_metadata():
+    return {'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'machine': platform.machine(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S')}
+
+#-------------------------------------------------------------------------------
+# Baseline comparison
+#-------------------------------------------------------------------------------
+
+def record_key(r):
+    return (r['problem'], r['size'], r['density'], r['seed'], r['searcher'])
+
+def compare_to_baseline(records, baseline_records, threshold=0.2):
+    """
+    Compare records against baseline_records, matched on
+    (problem, size, density, seed, searcher).
+    A record regresses if it now fails/times out where the baseline did not,
+    expands more nodes, or its wall time grew by more than threshold (a
+    fraction, e.g. 0.2 = 20%).
+    Returns list of (record, baseline_record, reason) regressions.
+    """
+    baseline = dict((record_key(b), b) for b in baseline_records)
+    regressions = []
+    for r in records:
+        b = baseline.get(record_key(r))
+        if b is None:
+            continue
+        if b['status'] == 'ok' and r['status'] != 'ok':
+            regressions.append((r, b, 'status {0} -> {1}'.format(b['status'], r['status'])))
+        elif b['status'] == 'ok':
+            if r['expansions'] > b['expansions']:
+                regressions.append((r, b, 'expansions {0} -> {1}'.format(b['expansions'],
+                                                                       r['expansions'])))
+            if r['wall_time'] > b['wall_time'] * (1.0 + threshold):
+                regressions.append((r, b, 'wall_time {0:.4f}s -> {1:.4f}s'.format(b['wall_time'],
+                                                                                r['wall_time'])))
+    return regressions
+
+#-------------------------------------------------------------------------------
+# Command-line interface
+#-------------------------------------------------------------------------------
+
+def default(str):
+  return str + ' [Default: %default]'
+
+def readCommand(argv):
+    from optparse import OptionParser
+    parser = OptionParser(__doc__)
+    parser.add_option('-n', '--sizes', dest='sizes', default='4,8,16,32,64,128,256',
+                      help=default("Comma-separated grid sizes"))
+    parser.add_option('-d', '--densities', dest='densities', default='0.0,0.2',
+                      help=default("Comma-separated obstacle densities"))
+    parser.add_option('-s', '--searchers', dest='searchers', default=','.join(SEARCHERS),
+                      help=default("Comma-separated search.py searcher names"))
+    parser.add_option('-t', '--timeout', dest='timeout', default=10.0, type='float',
+                      help=default("Seconds allowed per searcher run"))
+    parser.add_option('--seed', dest='seed', default=0, type='int',
+                      help=default("Seed for problem generation"))
+    parser.add_option('-o', '--output', dest='output', default='search_benchmark.json',
+                      help=default("JSON file results are written to"))
+    parser.add_option('-b', '--baseline', dest='baseline', default=None,
+                      help=default("JSON results file to compare against"))
+    parser.add_option('-r', '--threshold', dest='threshold', default=0.2, type='float',
+                      help=default("Allowed relative wall time increase over the baseline"))
+    options, otherjunk = parser.parse_args(argv)
+    if len(otherjunk) != 0:
+        raise Exception("Command line input not understood: " + str(otherjunk))
+    return options
+
+def main(argv):
+    options = readCommand(argv)
+    records = run_benchmark([int(n) for n in options.sizes.split(',')],
+                            [float(d) for d in options.densities.split(',')],
+                            options.searchers.split(','),
+                            options.timeout, options.seed)
+    f = open(options.output, 'w')
+    json.dump({'metadata': environment_metadata(), 'results': records}, f, indent=1)
+    f.close()
+    print "Wrote {0} results to {1}".format(len(records), options.output)
+    if options.baseline:
+        f = open(options.baseline)
+        baseline = json.load(f)
+        f.close()
+        regressions = compare_to_baseline(records, baseline['results'], options.threshold)
+        for r, b, reason in regressions:
+            print "REGRESSION: {0} {1}x{1} d={2} {3}: {4}".format(
+                r['problem'], r['size'], r['density'], r['searcher'], reason)
+        if regressions:
+            return 1
+        print "No regressions against {0}".format(options.baseline)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,278 @@
+# wumpus_benchmark.py
+# -------------------
+# Licensing Information:
+# Please DO NOT DISTRIBUTE OR PUBLISH solutions to this project.
+# You are free to use and extend these projects for EDUCATIONAL PURPOSES ONLY.
+# The Hunt The Wumpus AI project was developed at University of Arizona
+# by Clay Morrison (clayton@sista.arizona.edu), spring 2013.
+# This project extends the python code provided by Peter Norvig as part of
+# the Artificial Intelligence: A Modern Approach (AIMA) book example code;
+# see http://aima.cs.berkeley.edu/code.html
+# In particular, the following files come directly from the AIMA python
+# code: ['agents.py', 'logic.py', 'search.py', 'utils.py']
+# ('logic.py' has been modified by Clay Morrison in locations with the
+# comment 'CTM')
+# The file ['minisat.py'] implements a slim system call wrapper to the minisat
+# (see http://minisat.se) SAT solver, and is directly based on the satispy
+# python project, see https://github.com/netom/satispy .
+
+"""
+End-to-end throughput benchmarks for the three agent modes.
+
+Fixed-seed workloads:
+    qlearning : Q-learning training steps per second on each layout
+    hybrid    : HybridWumpusAgent seconds per decision versus time step t
+    sat       : PropKB_SAT queries per second (minisat) on the initial KB
+    planner   : plan_route / plan_shot calls per second on each layout
+The hybrid and sat workloads need the minisat executable; they are
+reported as 'skipped' when it is not on the PATH.
+
+Results are written as JSON (with environment metadata) and can be
+compared against a saved baseline; the script exits with status 1 if any
+metric is worse than the baseline by more than the regression threshold.
+
+USAGE:     python benchmarks/wumpus_benchmark.py <options>
+EXAMPLES:  (1) python benchmarks/wumpus_benchmark.py -o wumpus_baseline.json
+               - run all workloads and save the results
+           (2) python benchmarks/wumpus_benchmark.py -w qlearning,planner -b wumpus_baseline.json -r 0.1
+               - run two workloads and flag metrics more than 10% worse
+"""
+
+import os
+import sys
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+PACKAGE_DIR = os.path.join(BENCHMARK_DIR, '..')
+sys.path.insert(0, PACKAGE_DIR)
+
+import glob
+import json
+import random
+import subprocess
+import time
+from distutils.spawn import find_executable
+
+import util
+import wumpus_planners
+from wumpus import WumpusWorldScenario, WumpusWorldQLearningScenario
+from wumpus_agent import HybridWumpusAgent, QLearningWumpusAgent, PropKB_SAT
+from wumpus_environment import Explorer, Wumpus, Pit
+from wumpus_kb import initial_wumpus_axioms, wumpus_str
+from search_benchmark import environment_metadata
+
+WORKLOADS = ['qlearning', 'hybrid', 'sat', 'planner']
+
+def layout_files():
+    return sorted(glob.glob(os.path.join(PACKAGE_DIR, 'layouts', '*.lay')))
+
+def layout_name(layout_file):
+    return os.path.splitext(os.path.basename(layout_file))[0]
+
+def record(workload, layout, metric, value, higher_is_better=True, **extra):
+    r = {'workload': workload, 'layout': layout, 'metric': metric,
+         'value': value, 'higher_is_better': higher_is_better}
+    r.update(extra)
+    return r
+
+#-------------------------------------------------------------------------------
+# Workloads
+#-------------------------------------------------------------------------------
+
+def bench_qlearning(seed, episodes=200, steps=1000):
+    """
+    Q-learning training steps per second on each layout, through the
+    scenario's own training loop (WumpusWorldQLearningScenario.run) with
+    no early stop on convergence, no test runs and no checkpoint
+    """
+    records = []
+    for layout_file in layout_files():
+        agent = QLearningWumpusAgent('north', verbose=False)
+        s = WumpusWorldQLearningScenario(layout_file=layout_file, agent=agent, trace=False,
+                                         numTraining=episodes, minNumTraining=episodes,
+                                         totalActualRuns=0, checkpoint_file=None, seed=seed)
+        counter = {'steps': 0}
+        program = agent.program
+        def counted_program(percept):
+            counter['steps'] += 1
+            return program(percept)
+        agent.program = counted_program
+        start_time = time.time()
+        s.run(steps)   # muted by run_workloads
+        elapsed = time.time() - start_time
+        records.append(record('qlearning', layout_name(layout_file), 'steps_per_second',
+                              counter['steps'] / elapsed, episodes=episodes,
+                              steps=counter['steps']))
+    return records
+
+def bench_hybrid(seed, max_steps=40):
+    """ HybridWumpusAgent seconds per decision versus time step t """
+    records = []
+    for layout_file in layout_files():
+        random.seed(seed)
+        s = WumpusWorldScenario(layout_file=layout_file,
+                                agent=HybridWumpusAgent('north', verbose=False),
+                                trace=False)
+        decision_times = []
+        for t in range(max_steps):
+            if s.env.is_done():
+                break
+            start_time = time.time()
+            s.env.step()
+            decision_times.append(time.time() - start_time)
+        if decision_times:
+            records.append(record('hybrid', layout_name(layout_file), 'seconds_per_decision',
+                                  sum(decision_times) / len(decision_times),
+                                  higher_is_better=False,
+                                  seconds_per_decision_by_t=decision_times))
+    return records
+
+def bench_sat(seed, width=4, height=4, queries=40):
+    """ PropKB_SAT.ask queries per second against the initial wumpus KB """
+    kb = PropKB_SAT()
+    for sentence in initial_wumpus_axioms(1, 1, width, height, 'north'):
+        kb.tell(sentence)
+    rng = random.Random(seed)
+    props = [wumpus_str(rng.randint(1, width), rng.randint(1, height))
+             for i in range(queries)]
+    start_time = time.time()
+    for prop in props:
+        kb.ask(prop)
+    elapsed = time.time() - start_time
+    return [record('sat', '{0}x{1}'.format(width, height), 'queries_per_second',
+                   queries / elapsed, clauses=len(kb.clauses), queries=queries)]
+
+def bench_planner(seed, calls=500):
+    """ plan_route + plan_shot calls per second on each layout (plan cache off) """
+    records = []
+    cache = wumpus_planners.plan_cache
+    wumpus_planners.plan_cache = None
+    try:
+        for layout_file in layout_files():
+            s = WumpusWorldScenario(layout_file=layout_file,
+                                    agent=Explorer(heading='north', verbose=False),
+                                    trace=False)
+            dangers = set(loc for (obj, loc) in s.objects if isinstance(obj, (Wumpus, Pit)))
+            wumpi = [loc for (obj, loc) in s.objects if isinstance(obj, Wumpus)]
+            allowed = [(x, y) for x in range(1, s.width + 1) for y in range(1, s.height + 1)
+                       if (x, y) not in dangers]
+            rng = random.Random(seed)
+            args = [(rng.choice(allowed), rng.randint(0, 3), [rng.choice(allowed)])
+                    for i in range(calls)]
+            start_time = time.time()
+            for current, heading, goals in args:
+                wumpus_planners.plan_route(current, heading, goals, allowed)
+                if wumpi:
+                    wumpus_planners.plan_shot(current, heading, wumpi, allowed)
+            elapsed = time.time() - start_time
+            records.append(record('planner', layout_name(layout_file), 'calls_per_second',
+                                  calls * (2 if wumpi else 1) / elapsed, calls=calls,
+                                  planner_search=wumpus_planners.planner_search))
+    finally:
+        wumpus_planners.plan_cache = cache
+    return records
+
+def run_workloads(workloads, seed):
+    benches = {'qlearning': bench_qlearning, 'hybrid': bench_hybrid,
+               'sat': bench_sat, 'planner': bench_planner}
+    have_minisat = find_executable('minisat') is not None
+    records = []
+    for workload in workloads:
+        if workload in ('hybrid', 'sat') and not have_minisat:
+            records.append(record(workload, None, None, None, status='skipped',
+                                  reason='minisat executable not found'))
+            continue
+        util.mutePrint()
+        try:
+            records.extend(benches[workload](seed))
+        finally:
+            util.unmutePrint()
+    return records
+
+def benchmark_metadata(seed):
+    metadata = environment_metadata()
+    metadata['seed'] = seed
+    metadata['minisat'] = find_executable('minisat')
+    try:
+        metadata['git_revision'] = subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], cwd=PACKAGE_DIR,
+            stderr=open(os.devnull, 'w')).strip()
+    except (OSError, subprocess.CalledProcessError):
+        metadata['git_revision'] = None
+    return metadata
+
+#-------------------------------------------------------------------------------
+# Baseline comparison
+#-------------------------------------------------------------------------------
+
+def compare_to_baseline(records, baseline_records, threshold=0.1):
+    """
+    Return list of (record, baseline_record, relative_change) for metrics
+    worse than the baseline by more than threshold (fraction), matched on
+    (workload, layout, metric).
+    """
+    key = lambda r: (r['workload'], r['layout'], r['metric'])
+    baseline = dict((key(b), b) for b in baseline_records if b.get('value'))
+    regressions = []
+    for r in records:
+        b = baseline.get(key(r))
+        if b is None or r.get('value') is None:
+            continue
+        change = (r['value'] - b['value']) / float(b['value'])
+        if not r['higher_is_better']:
+            change = -change
+        if change < -threshold:
+            regressions.append((r, b, change))
+    return regressions
+
+#-------------------------------------------------------------------------------
+# Command-line interface
+#-------------------------------------------------------------------------------
+
+def default(str):
+  return str + ' [Default: %default]'
+
+def readCommand(argv):
+    from optparse import OptionParser
+    parser = OptionParser(__doc__)
+    parser.add_option('-w', '--workloads', dest='workloads', default=','.join(WORKLOADS),
+                      help=default("Comma-separated workloads to run"))
+    parser.add_option('--seed', dest='seed', default=0, type='int',
+                      help=default("Random seed for all workloads"))
+    parser.add_option('-o', '--output', dest='output', default='wumpus_benchmark.json',
+                      help=default("JSON file results are written to"))
+    parser.add_option('-b', '--baseline', dest='baseline', default=None,
+                      help=default("JSON results file to compare against"))
+    parser.add_option('-r', '--threshold', dest='threshold', default=0.1, type='float',
+                      help=default("Relative slowdown over the baseline counted as a regression"))
+    options, otherjunk = parser.parse_args(argv)
+    if len(otherjunk) != 0:
+        raise Exception("Command line input not understood: " + str(otherjunk))
+    return options
+
+def main(argv):
+    options = readCommand(argv)
+    records = run_workloads(options.workloads.split(','), options.seed)
+    for r in records:
+        if r.get('status') == 'skipped':
+            print "{0:10} skipped ({1})".format(r['workload'], r['reason'])
+        else:
+            print "{0:10} {1:20} {2:22} {3:.4f}".format(r['workload'], r['layout'],
+                                                      r['metric'], r['value'])
+    f = open(options.output, 'w')
+    json.dump({'metadata': benchmark_metadata(options.seed), 'results': records}, f, indent=1)
+    f.close()
+    print "Wrote {0} results to {1}".format(len(records), options.output)
+    if options.baseline:
+        f = open(options.baseline)
+        baseline = json.load(f)
+        f.close()
+        regressions = compare_to_baseline(records, baseline['results'], options.threshold)
+        for r, b, change in regressions:
+            print "REGRESSION: {0} {1} {2}: {3:.4f} -> {4:.4f} ({5:+.1%})".format(
+                r['workload'], r['layout'], r['metric'], b['value'], r['value'], change)
+        if regressions:
+            return 1
+        print "No regressions against {0}".format(options.baseline)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
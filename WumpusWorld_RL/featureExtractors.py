@@ -15,6 +15,7 @@
 "Feature extractors for Pacman game states"
 
 from game import Directions, Actions
+from array import array
 import util
 
 class FeatureExtractor:
@@ -37,10 +38,66 @@ class CoordinateExtractor(FeatureExtractor):
         feats = util.Counter()
         feats[state] = 1.0
         feats['x=%d' % state[0]] = 1.0
-        feats['y=%d' % state[0]] = 1.0
+        feats['y=%d' % state[1]] = 1.0
         feats['action=%s' % action] = 1.0
         return feats
 
+class VectorFeatureExtractor(FeatureExtractor):
+    """
+      Extracts a fixed-length vector of state features shared by all
+      actions.  A linear Q-function over it keeps one weight vector per
+      action, so the Q-values of every action come from one matrix-vector
+      product (see VectorizedApproximateQAgent).
+      featureNames := names of the vector components, in order
+    """
+    featureNames = []
+
+    def getFeatureVector(self, state):
+        """
+          Returns an array('d') of len(self.featureNames) features
+        """
+        util.raiseNotDefined()
+
+    def getFeatures(self, state, action):
+        # dict view, keyed like the rows of the weight matrix
+        feats = util.Counter()
+        for name, value in zip(self.featureNames, self.getFeatureVector(state)):
+            if value:
+                feats[(name, action)] = value
+        return feats
+
+class WumpusStateExtractor(VectorFeatureExtractor):
+    """
+    One-hot encoding of the Q learning wumpus state
+    (x, y, heading, has_gold, wumpus_alive) on a width x height grid,
+    plus a bias feature.
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.featureNames = (['bias']
+                             + ['x=%d' % x for x in range(1, width + 1)]
+                             + ['y=%d' % y for y in range(1, height + 1)]
+                             + ['heading=%d' % h for h in range(4)]
+                             + ['has-gold', 'wumpus-alive'])
+
+    def getFeatureVector(self, state):
+        x, y, heading, has_gold, wumpus_alive = state[:5]
+        width, height = self.width, self.height
+        feats = array('d', [0.0]) * len(self.featureNames)
+        feats[0] = 1.0
+        if 1 <= x <= width:
+            feats[x] = 1.0
+        if 1 <= y <= height:
+            feats[width + y] = 1.0
+        feats[width + height + 1 + heading] = 1.0
+        if has_gold:
+            feats[width + height + 5] = 1.0
+        if wumpus_alive:
+            feats[width + height + 6] = 1.0
+        return feats
+
 def closestFood(pos, food, walls):
     """
     closestFood -- this is similar to the function that we have
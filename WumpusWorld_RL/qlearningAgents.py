@@ -20,7 +20,9 @@ from featureExtractors import *
 # from keras.optimizers import RMSprop
 
 # import numpy as np
+from array import array
 import random, util, math
+import wumpus_rng
 
 
 class QLearningAgent(ReinforcementAgent):
@@ -39,13 +41,16 @@ class QLearningAgent(ReinforcementAgent):
       Functions you should use
         - self.getLegalActions(state)
           which returns legal actions for a state
+      rng := random.Random used for exploration (see wumpus_rng.stream);
+             by default a stream seeded from the global random module
     """
 
-    def __init__(self, **args):
+    def __init__(self, rng=None, **args):
         "You can initialize Q-values here..."
         ReinforcementAgent.__init__(self, **args)
         "*** YOUR CODE HERE ***"
         self.qValues = util.Counter()
+        self.rng = rng if rng is not None else wumpus_rng.stream()
 
     def getQValue(self, state, action):
         """
@@ -108,8 +113,12 @@ class QLearningAgent(ReinforcementAgent):
         action = None
         "*** YOUR CODE HERE ***"
         if possibleActions:
-            if util.flipCoin(self.epsilon) == True:
-                action = random.choice(possibleActions)
+            r = self.rng.random()
+            if r < self.epsilon:
+                # given r < epsilon, r / epsilon is uniform on [0, 1), so the
+                # same draw also picks the random action
+                i = int(r / self.epsilon * len(possibleActions))
+                action = possibleActions[min(i, len(possibleActions) - 1)]
             else:
                 action,_ = self.getPolicy(state)
         return action
@@ -138,6 +147,167 @@ class QLearningAgent(ReinforcementAgent):
         return self.computeValueFromQValues(state)
 
 
+class DynaQAgent(QLearningAgent):
+    """
+      Dyna-Q: Q-learning plus planning with a learned model.
+
+      Every real transition updates Q as in QLearningAgent and is recorded
+      in a model table of outcome counts,
+        self.model[(state, action)] = {(nextState, reward): count, ...}
+      after which self.planningSteps simulated backups are made from the
+      model.  Backups use the expected target over the recorded outcomes,
+      so the stochastic Forward is modelled faithfully.
+
+      With prioritizedSweeping=True the simulated backups are not drawn
+      uniformly: (state, action) pairs are kept in a priority queue by the
+      size of their pending TD error, and after a pair is backed up its
+      predecessors (pairs recorded to lead into its state) are queued if
+      their own error exceeds self.theta.
+    """
+
+    def __init__(self, planningSteps=10, prioritizedSweeping=False, theta=1e-4, **args):
+        QLearningAgent.__init__(self, **args)
+        self.initModel(planningSteps, prioritizedSweeping, theta)
+
+    def initModel(self, planningSteps=10, prioritizedSweeping=False, theta=1e-4):
+        self.planningSteps = planningSteps
+        self.prioritizedSweeping = prioritizedSweeping
+        self.theta = theta
+        self.model = {}
+        self.modelKeys = []         # model keys, for uniform sampling
+        self.predecessors = {}      # state -> set of (state, action) leading to it
+        self.sweepQueue = util.PriorityQueue()
+        self.sweepPriority = {}     # (state, action) -> priority while queued
+
+    def recordTransition(self, state, action, nextState, reward):
+        key = (state, action)
+        outcomes = self.model.get(key)
+        if outcomes is None:
+            outcomes = self.model[key] = {}
+            self.modelKeys.append(key)
+        outcome = (nextState, reward)
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+        self.predecessors.setdefault(nextState, set()).add(key)
+
+    def modelTarget(self, state, action):
+        """ Expected one-step target r + discount * V(s') under the model """
+        outcomes = self.model[(state, action)]
+        total = float(sum(outcomes.values()))
+        target = 0.0
+        for (nextState, reward), n in outcomes.items():
+            target += n * (reward + self.discount * self.computeValueFromQValues(nextState))
+        return target / total
+
+    def modelBackup(self, state, action):
+        key = (state, action)
+        q = self.getQValue(state, action)
+        self.qValues[key] = q + self.alpha * (self.modelTarget(state, action) - q)
+
+    def queueForSweep(self, key, priority):
+        if priority > self.theta and priority > self.sweepPriority.get(key, 0.0):
+            self.sweepPriority[key] = priority
+            self.sweepQueue.push(key, -priority)
+
+    def update(self, state, action, nextState, reward):
+        self.recordTransition(state, action, nextState, reward)
+        QLearningAgent.update(self, state, action, nextState, reward)
+        if self.prioritizedSweeping:
+            # the real update used a single sampled outcome; what is left
+            # against the model's expected target decides the priority
+            error = abs(self.modelTarget(state, action) - self.getQValue(state, action))
+            self.queueForSweep((state, action), error)
+            self.sweep()
+        else:
+            keys = self.modelKeys
+            for r in wumpus_rng.uniform_block(self.rng, self.planningSteps):
+                s, a = keys[int(r * len(keys))]
+                self.modelBackup(s, a)
+
+    def sweep(self):
+        """ Up to self.planningSteps backups in priority order """
+        backups = 0
+        while backups < self.planningSteps and not self.sweepQueue.isEmpty():
+            key = self.sweepQueue.pop()
+            if self.sweepPriority.pop(key, None) is None:
+                continue            # stale duplicate of a pair already backed up
+            state, action = key
+            self.modelBackup(state, action)
+            backups += 1
+            for predecessor in self.predecessors.get(state, ()):
+                error = abs(self.modelTarget(*predecessor) - self.getQValue(*predecessor))
+                self.queueForSweep(predecessor, error)
+
+
+class QLambdaAgent(QLearningAgent):
+    """
+      Q(lambda) / SARSA(lambda): Q-learning with eligibility traces, so one
+      TD error updates every recently visited (state, action) pair instead
+      of only the last one.
+
+      Traces are sparse: self.traces maps only the recently visited pairs
+      to their eligibility (replacing traces: a visit sets it to 1).  Each
+      step every traced pair moves by alpha * delta * eligibility, and the
+      traces decay by discount * lambd; traces below self.traceThreshold
+      are dropped, so the work per step stays bounded.
+
+      sarsa=False is Watkins's Q(lambda): the target uses max_a Q(s',a) and
+      getAction() cuts the traces when it takes a non-greedy (exploratory)
+      action.  sarsa=True is SARSA(lambda): the target uses Q(s',a') of the
+      action actually taken next, so update() must be given nextAction;
+      without it (e.g. the last step of an episode) the max is used.
+
+      In both, the traces are also cut when the update leaves (state,
+      action) below the best Q-value of state: the earlier pairs bootstrap
+      through the max at state, which no longer follows this action.
+      Without this cut the step costs flow back along the whole trace past
+      untried (zero-valued) actions, and the agent soon prefers to Climb
+      out at once over exploring.
+    """
+
+    def __init__(self, lambd=0.5, sarsa=False, traceThreshold=1e-3, **args):
+        QLearningAgent.__init__(self, **args)
+        self.initTraces(lambd, sarsa, traceThreshold)
+
+    def initTraces(self, lambd=0.5, sarsa=False, traceThreshold=1e-3):
+        self.lambd = lambd
+        self.sarsa = sarsa
+        self.traceThreshold = traceThreshold
+        self.traces = {}
+
+    def clearTraces(self):
+        self.traces = {}
+
+    def update(self, state, action, nextState, reward, nextAction=None):
+        best = self.computeValueFromQValues(nextState)
+        if self.sarsa and nextAction is not None:
+            target = reward + self.discount * self.getQValue(nextState, nextAction)
+        else:
+            target = reward + self.discount * best
+        delta = target - self.getQValue(state, action)
+        traces = self.traces
+        traces[(state, action)] = 1.0
+        step = self.alpha * delta
+        decay = self.discount * self.lambd
+        threshold = self.traceThreshold
+        qValues = self.qValues
+        for key, eligibility in traces.items():
+            qValues[key] += step * eligibility
+            eligibility *= decay
+            if eligibility < threshold:
+                del traces[key]
+            else:
+                traces[key] = eligibility
+        if qValues[(state, action)] < self.computeValueFromQValues(state):
+            self.traces = {}
+
+    def getAction(self, state, percept):
+        action = QLearningAgent.getAction(self, state, percept)
+        if not self.sarsa and action is not None \
+           and self.getQValue(state, action) < self.computeValueFromQValues(state):
+            self.traces = {}
+        return action
+
+
 class PacmanQAgent(QLearningAgent):
     "Exactly the same as QLearningAgent, but with different default parameters"
 
@@ -220,6 +390,102 @@ class ApproximateQAgent(PacmanQAgent):
             pass
 
 
+class VectorizedApproximateQAgent(QLearningAgent):
+    """
+       Linear approximate Q-learning over a VectorFeatureExtractor:
+       Q(s,a) = w_a * phi(s), where phi(s) is the extractor's feature
+       vector and w_a row a of the weight matrix self.weights (one flat
+       array, rows in the order of self.actions).  The Q-values of all
+       actions are the single product W phi(s), taken over the nonzero
+       features only.
+
+       phi(s) is cached for the last few states (featureCacheSize), so
+       getAction() and update() within a step extract each state's
+       features once.
+    """
+
+    def __init__(self, extractor=None, actions=None, featureCacheSize=4, **args):
+        QLearningAgent.__init__(self, **args)
+        self.featureCacheSize = featureCacheSize
+        self.featExtractor = None
+        if extractor is not None:
+            self.useExtractor(extractor, actions)
+
+    def useExtractor(self, extractor, actions):
+        """
+          Use extractor (a VectorFeatureExtractor) for Q(s,a), a in actions.
+          The weights are kept if their number still matches (e.g. the same
+          features on a new environment), otherwise reset to zero.
+        """
+        self.featExtractor = extractor
+        self.actions = list(actions)
+        self.actionIndex = dict((a, i) for i, a in enumerate(self.actions))
+        self.numFeatures = len(extractor.featureNames)
+        size = len(self.actions) * self.numFeatures
+        if len(getattr(self, 'weights', ())) != size:
+            self.weights = array('d', [0.0]) * size
+        self.featureCache = {}
+
+    def getWeights(self):
+        return self.weights
+
+    def getFeatureVector(self, state):
+        """
+          (index, value) pairs of the nonzero features of state
+        """
+        feats = self.featureCache.get(state)
+        if feats is None:
+            if len(self.featureCache) >= self.featureCacheSize:
+                self.featureCache.clear()
+            feats = [(i, v) for i, v in enumerate(self.featExtractor.getFeatureVector(state)) if v]
+            self.featureCache[state] = feats
+        return feats
+
+    def getQValues(self, state):
+        """
+          List of Q(state, a) for a in self.actions: W phi(state)
+        """
+        feats = self.getFeatureVector(state)
+        weights = self.weights
+        return [sum([weights[row + i] * v for i, v in feats])
+                for row in range(0, len(weights), self.numFeatures)]
+
+    def getQValue(self, state, action):
+        return self.getQValues(state)[self.actionIndex[action]]
+
+    def computeValueFromQValues(self, state):
+        possibleActions = self.getLegalActions(state)
+        if possibleActions:
+            q = self.getQValues(state)
+            return max([q[self.actionIndex[a]] for a in possibleActions])
+        return 0.0
+
+    def computeActionFromQValues(self, state):
+        possibleActions = self.getLegalActions(state)
+        if possibleActions:
+            q = self.getQValues(state)
+            maxv = float("-inf")
+            bestAction = None
+            for action in possibleActions:
+                if q[self.actionIndex[action]] >= maxv:
+                    maxv = q[self.actionIndex[action]]
+                    bestAction = action
+            return (bestAction, maxv)
+        return None
+
+    def update(self, state, action, nextState, reward):
+        target = reward + self.discount * self.computeValueFromQValues(nextState)
+        feats = self.getFeatureVector(state)
+        # normalized step: alpha is the fraction of the TD error corrected,
+        # however many features are active
+        norm = sum([v * v for i, v in feats]) or 1.0
+        step = self.alpha * (target - self.getQValue(state, action)) / norm
+        row = self.actionIndex[action] * self.numFeatures
+        weights = self.weights
+        for i, v in feats:
+            weights[row + i] += step * v
+
+
 # class NeuralNetQAgent(PacmanQAgent):
 #     def __init__(self, extractor='IdentityExtractor', *args, **kwargs):
 #         self.nnet = None
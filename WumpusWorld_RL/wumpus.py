@@ -18,8 +18,17 @@
 
 from qlearningAgents import *
 from wumpus_agent import *
+from array import array
 from time import clock
+import random
+import util
+import wumpus_actor_learner
 import wumpus_environment
+import wumpus_layouts
+import wumpus_mdp
+import wumpus_planners
+import wumpus_qtable
+import wumpus_rng
 
 
 #-------------------------------------------------------------------------------
@@ -76,7 +85,8 @@ class WumpusWorldScenario(object):
 
     def load_layout(self, layout_file):
         """
-        Load text file specifying Wumpus Environment initial configuration
+        Load a file specifying Wumpus Environment initial configuration,
+        either .lay text or compiled .layb (see wumpus_layouts).
         Text file is N (rows) by M (columns) grid where each cell in a row
         consists of M comma-separated cells specs, where each cell contains
         either:
@@ -86,50 +96,12 @@ class WumpusWorldScenario(object):
            'P' : pit
            'G' : gold
            'A' : wumpus hunter agent (heading specified in agent object)
+        Files are looked up in layouts/ first and parsed once per process
+        (wumpus_layouts.layout_registry).
         """
-        
-        if layout_file.endswith('.lay'):
-            layout = self.tryToLoad('layouts/' + layout_file)
-            if not layout: layout = self.tryToLoad(layout_file)
-        else:
-            layout = self.tryToLoad('layouts/' + layout_file + '.lay')
-            if not layout: layout = self.tryToLoad(layout_file + '.lay')
-
-        if not layout:
-            raise Exception("Could not find layout file: {0}".format(layout_file))
-
+        layout = wumpus_layouts.layout_registry.get(layout_file)
         print "Loaded layout '{0}'".format(layout_file)
-
-        objects = []
-        entrance = (1,1) # default entrance location
-        
-        ri = len(layout)
-        largest_ci = 0
-        for row in layout:
-            ci = 0
-            if row:
-                ri -= 1
-                row = row.split(',')
-                for cell in row:
-                    ci += 1
-                    if ci > largest_ci: largest_ci = ci
-                    for char in cell:
-                        if char == 'W':
-                            objects.append((Wumpus(),(ci,ri)))
-                        elif char == 'P':
-                            objects.append((Pit(),(ci,ri)))
-                        elif char == 'G':
-                            objects.append((Gold(),(ci,ri)))
-                        elif char == 'A':
-                            entrance = (ci,ri)
-
-        return objects, largest_ci, len(layout)-ri, entrance
-
-    def tryToLoad(self, fullname):
-        if (not os.path.exists(fullname)): return None
-        f = open(fullname)
-        try: return [line.strip() for line in f]
-        finally: f.close()
+        return layout.objects(), layout.width, layout.height, layout.entrance
 
     def step(self):
         self.env.step()
@@ -147,6 +119,7 @@ class WumpusWorldScenario(object):
                     slist += ['Final Scores:']
                 for agent in self.env.agents:
                     slist.append(' {0}={1}'.format(agent, agent.performance_measure))
+                    profile = agent.end_episode() if hasattr(agent, 'end_episode') else None
                     if agent.verbose:
                         if hasattr(agent, 'number_of_clauses_over_epochs'):
                             print "number_of_clauses_over_epochs:" \
@@ -154,6 +127,8 @@ class WumpusWorldScenario(object):
                         if hasattr(agent, 'belief_loc_query_times'):
                             print "belief_loc_query_times:" \
                                   +" {0}".format(agent.belief_loc_query_times)
+                        if profile:
+                            print agent.profiler.to_string(profile)
                 print ''.join(slist)
                 return
             self.step()
@@ -171,8 +146,25 @@ class WumpusWorldScenario(object):
 class WumpusWorldQLearningScenario(WumpusWorldScenario):
     def __init__(self, layout_file=None, agent=None, objects=None,
                  width=None, height=None, entrance=None, trace=True, numTraining=100,
-                 maxdelta=0.0001, forwardStochasticOutcome = (0.1,0.8,0.1), totalActualRuns=100, minNumTraining=50):
+                 maxdelta=0.0001, forwardStochasticOutcome = (0.1,0.8,0.1), totalActualRuns=100, minNumTraining=50,
+                 checkpoint_file='policy.qtb', checkpoint_every=0, seed=None):
+        """
+        checkpoint_file := Q-table checkpoint written at the end of training
+                           (see wumpus_qtable); None to disable
+        checkpoint_every := also write it every this many training episodes
+                            (0 = only at the end)
+        seed := master seed of the environment's and the agent's random
+                streams (see wumpus_rng); None to seed them from the global
+                random module
+        """
+        self.seed = seed
+        self.env_rng = wumpus_rng.stream(seed, 'environment')
+        if seed is not None:
+            agent.rng = wumpus_rng.stream(seed, 'agent')
         self.numTraining = numTraining
+        self.checkpoint_file = checkpoint_file
+        self.checkpoint_every = checkpoint_every
+        self.episodes = 0 # training episodes completed
         self.maxdelta = maxdelta
         self.forwardStochasticOutcome = forwardStochasticOutcome
         self.prevPolicy = None
@@ -189,7 +181,8 @@ class WumpusWorldQLearningScenario(WumpusWorldScenario):
         objects := [(<wumpus_environment_object>, <location: (<x>,<y>) >, ...]
         """
         # using stochastic environment
-        env = WumpusQLearningEnvironment(width, height, entrance, forwardStochasticOutcome = self.forwardStochasticOutcome)
+        env = WumpusQLearningEnvironment(width, height, entrance, forwardStochasticOutcome = self.forwardStochasticOutcome,
+                                         rng = self.env_rng)
         if self.trace:
             agent = wumpus_environment.TraceAgent(agent)
         agent.register_environment(env)
@@ -210,11 +203,89 @@ class WumpusWorldQLearningScenario(WumpusWorldScenario):
         # print "Policy is: "
         # print policy
         return policy
+
+    def known_world_mdp(self):
+        """ wumpus_mdp.WumpusMDP of this scenario's world and slip model """
+        locations = lambda cls: [loc for (obj, loc) in self.objects if isinstance(obj, cls)]
+        return wumpus_mdp.WumpusMDP.from_world(self.width, self.height, self.entrance,
+                                               locations(Wumpus), locations(Pit),
+                                               locations(Gold),
+                                               self.agent.getLegalActions(None),
+                                               self.forwardStochasticOutcome)
+
+    def save_checkpoint(self):
+        """
+        Write the agent's Q-table to self.checkpoint_file.  For an
+        ApproximateQWumpusAgent the Q-values of every state are written,
+        and its weights are kept in the metadata.
+        """
+        if self.checkpoint_file:
+            metadata = {}
+            q_values = self.agent.qValues
+            if isinstance(self.agent, ApproximateQWumpusAgent):
+                q_values = self.agent.q_table()
+                metadata['weights'] = list(self.agent.weights)
+            wumpus_qtable.save_checkpoint(self.checkpoint_file, q_values,
+                                          self.width, self.height,
+                                          self.agent.getLegalActions(None),
+                                          episodes=self.episodes,
+                                          layout=self.layout_file,
+                                          rng_state=self.agent.rng.getstate(),
+                                          env_rng_state=self.env_rng.getstate(),
+                                          **metadata)
+
+    def load_checkpoint(self, filename, resume=True):
+        """
+        Load the agent's Q-table from a checkpoint written by save_checkpoint.
+        resume := if True, continue the training run that wrote the checkpoint:
+                  also restore the training episode counter and the state of
+                  the agent's and environment's random streams.  If False,
+                  warm-start: only the Q-values are used, e.g. from a policy
+                  trained on a similar layout (Q-values for locations outside
+                  this layout are kept but never visited).
+        """
+        checkpoint = wumpus_qtable.load_checkpoint(filename)
+        self.agent.qValues = checkpoint
+        weights = checkpoint.metadata.get('weights')
+        if weights and isinstance(self.agent, ApproximateQWumpusAgent):
+            self.agent.weights = array('d', weights)
+        if resume:
+            self.episodes = checkpoint.metadata['episodes']
+            rng_state = checkpoint.metadata.get('rng_state')
+            if rng_state:
+                wumpus_rng.set_state(self.agent.rng, rng_state)
+            env_rng_state = checkpoint.metadata.get('env_rng_state')
+            if env_rng_state:
+                wumpus_rng.set_state(self.env_rng, env_rng_state)
+        print "Loaded Q-table from {0} ({1}x{2} grid, {3} training episodes)" \
+              .format(filename, checkpoint.layout.width, checkpoint.layout.height,
+                      checkpoint.metadata['episodes'])
     
+    def train_actor_learner(self, actors, **args):
+        """
+        Run the remaining training episodes with wumpus_actor_learner:
+        actors processes collect experience, this process learns from it.
+        The learned Q-table replaces the agent's, so run() then goes
+        straight to the test runs.  args are passed to ActorLearner.
+        """
+        learner = wumpus_actor_learner.ActorLearner(
+            wumpus_actor_learner.WorldSpec.from_scenario(self),
+            self.agent.getLegalActions(None), actors=actors,
+            gamma=self.agent.discount, alpha=self.agent.alpha,
+            seed=self.seed if self.seed is not None else self.agent.rng.randint(0, 2 ** 30),
+            **args)
+        learner.load_q_values(self.agent.qValues)
+        learner.run(self.numTraining - self.episodes)
+        self.agent.qValues = util.Counter(learner.q_values())
+        self.episodes = self.numTraining
+        print learner.to_string()
+        return learner.stats
+
     def run(self, steps = 1000):
         initepsilon = self.agent.epsilon
-        # training
-        for nt in range(self.numTraining):
+        # training (resumes from self.episodes when loaded from a checkpoint)
+        nt = self.episodes
+        for nt in range(self.episodes, self.numTraining):
             if self.prevPolicy == None:
                 self.prevPolicy = self.getPolicy()
             else: # trying to converge policy
@@ -251,7 +322,7 @@ class WumpusWorldQLearningScenario(WumpusWorldScenario):
             for step in range(steps):
                 if self.env.is_done():
                     state = (self.agent.location[0], self.agent.location[1], self.agent.heading, self.agent.has_gold, self.agent.wumpus_alive)
-                    self.agent.update(state, self.agent.previous_action)
+                    self.agent.update(state, self.agent.previous_action, done=True)
                     print "DONE."
                     slist = []
                     if len(self.env.agents) > 0:
@@ -274,12 +345,13 @@ class WumpusWorldQLearningScenario(WumpusWorldScenario):
                 if isinstance(obj[0], Wumpus):
                     obj[0].alive = True
             self.env = self.build_world(self.width, self.height, self.entrance, self.agent, self.objects)
+            self.episodes += 1
+            if self.checkpoint_every and self.episodes % self.checkpoint_every == 0:
+                self.save_checkpoint()
 
         print self.env.to_string()
 
-        f = open("policy.txt", "w")
-        f.write(str(self.agent.qValues))
-        f.close()
+        self.save_checkpoint()
 
         # self.agent.doneTraining()
         QLearningWumpusAgent.doneTraining(self.agent)
@@ -327,10 +399,36 @@ class WumpusWorldQLearningScenario(WumpusWorldScenario):
 
 # wumpus world scenario for q learning agent
 def wscenario_4x4_QLearningWumpusAgent(options):
-    agent = QLearningWumpusAgent('north', verbose=True,  epsilon=options.epsilon, gamma=options.gamma, alpha=options.alpha, numTraining=options.numTraining)
+    if options.model_based:
+        agent = ModelBasedWumpusAgent('north', verbose=True, epsilon=options.epsilon,
+                                      gamma=options.gamma, alpha=options.alpha,
+                                      numTraining=options.numTraining)
+    elif options.approximate:
+        agent = ApproximateQWumpusAgent('north', verbose=True, extractor=options.features,
+                                        epsilon=options.epsilon,
+                                        gamma=options.gamma, alpha=options.alpha,
+                                        numTraining=options.numTraining)
+    elif options.lambd:
+        agent = QLambdaWumpusAgent('north', verbose=True, lambd=options.lambd,
+                                   sarsa=options.sarsa, epsilon=options.epsilon,
+                                   gamma=options.gamma, alpha=options.alpha,
+                                   numTraining=options.numTraining)
+    elif options.dyna:
+        agent = DynaQWumpusAgent('north', verbose=True, planning_steps=options.dyna,
+                                 prioritized_sweeping=options.prioritized_sweeping,
+                                 epsilon=options.epsilon, gamma=options.gamma,
+                                 alpha=options.alpha, numTraining=options.numTraining)
+    elif options.replay:
+        agent = ReplayQLearningWumpusAgent('north', verbose=True, replay_capacity=options.replay,
+                                           batch_size=options.replay_batch,
+                                           prioritized=options.prioritized,
+                                           epsilon=options.epsilon, gamma=options.gamma,
+                                           alpha=options.alpha, numTraining=options.numTraining)
+    else:
+        agent = QLearningWumpusAgent('north', verbose=True,  epsilon=options.epsilon, gamma=options.gamma, alpha=options.alpha, numTraining=options.numTraining)
 
     if options.layout:
-        return WumpusWorldQLearningScenario(
+        s = WumpusWorldQLearningScenario(
         layout_file=options.layout,
         agent=agent,
         forwardStochasticOutcome=options.forwardStochasticOutcome,
@@ -338,9 +436,12 @@ def wscenario_4x4_QLearningWumpusAgent(options):
         numTraining=options.numTraining,
         totalActualRuns=options.totalActualRuns,
         minNumTraining=options.minNumTraining,
+        checkpoint_file=options.checkpoint,
+        checkpoint_every=options.checkpoint_every,
+        seed=options.seed,
         trace=False)
     else:
-        return WumpusWorldQLearningScenario(
+        s = WumpusWorldQLearningScenario(
         agent=agent,
         width = 4, height = 4, entrance = (1,1),
         objects = [(Wumpus(),(1,3)),
@@ -352,26 +453,47 @@ def wscenario_4x4_QLearningWumpusAgent(options):
         numTraining=options.numTraining,
         totalActualRuns=options.totalActualRuns,
         minNumTraining=options.minNumTraining,
+        checkpoint_file=options.checkpoint,
+        checkpoint_every=options.checkpoint_every,
+        seed=options.seed,
         trace=False)
+    if options.model_based == 'known':
+        agent.use_model(s.known_world_mdp())
+    return s
 
 #-------------------------------------------------------------------------------
 
-def world_scenario_hybrid_wumpus_agent_from_layout(layout_filename):
+def world_scenario_hybrid_wumpus_agent_from_layout(layout_filename, local_axioms=False,
+                                                   cardinality_encoding=None, clause_axioms=False,
+                                                   simplify_kb=False):
     """
     Create WumpusWorldScenario with an automated agent_program that will
         try to solve the Hunt The Wumpus game on its own.
     layout_filename := name of layout file to load
+    local_axioms := use the agent's frontier-local axioms (for large worlds)
+    cardinality_encoding := encoding of the KB's exactly one constraints
+    clause_axioms := tell the KB clauses from the direct-to-CNF generators
+    simplify_kb := drop duplicate and subsumed clauses as the KB is told them
     """
     return WumpusWorldScenario(layout_file = layout_filename,
-                               agent = HybridWumpusAgent('north', verbose=True),
+                               agent = HybridWumpusAgent('north', verbose=True,
+                                                         local_axioms=local_axioms,
+                                                         cardinality_encoding=cardinality_encoding,
+                                                         clause_axioms=clause_axioms,
+                                                         simplify_kb=simplify_kb),
                                trace=False)
 
 #------------------------------------
 # examples of constructing HybridWumpusAgent scenario
 # specifying objects as list
 
-def wscenario_4x4_HybridWumpusAgent():
-    return WumpusWorldScenario(agent = HybridWumpusAgent('north', verbose=True),
+def wscenario_4x4_HybridWumpusAgent(local_axioms=False, cardinality_encoding=None,
+                                    clause_axioms=False, simplify_kb=False):
+    return WumpusWorldScenario(agent = HybridWumpusAgent('north', verbose=True,
+                                                         local_axioms=local_axioms,
+                                                         cardinality_encoding=cardinality_encoding,
+                                                         clause_axioms=clause_axioms,
+                                                         simplify_kb=simplify_kb),
                                objects = [(Wumpus(),(1,3)),
                                           (Pit(),(3,3)),
                                           (Pit(),(3,1)),
@@ -826,6 +948,37 @@ def readCommand( argv ):
                                    + " (takes precedence over -k and -y option)"))
     parser.add_option('-l', '--layout', dest='layout', default=None,
                       help=default("Load layout file"))
+    parser.add_option('--local-axioms', action='store_true', dest='local_axioms', default=False,
+                      help=default("Hybrid agent asserts axioms and makes queries only for" \
+                                   + " the visited locations and their neighbors" \
+                                   + " (for large worlds)"))
+    parser.add_option('--cardinality-encoding', dest='cardinality_encoding', default=None,
+                      type='choice', choices=CARDINALITY_ENCODINGS,
+                      help=default("Hybrid agent encoding of its exactly one constraints:" \
+                                   + " " + ", ".join(CARDINALITY_ENCODINGS) \
+                                   + " (pairwise, or sequential with --local-axioms)"))
+    parser.add_option('--clause-axioms', action='store_true', dest='clause_axioms', default=False,
+                      help=default("Hybrid agent tells its KB clauses generated directly" \
+                                   + " (wumpus_cnf) rather than axioms converted to CNF"))
+    parser.add_option('--simplify-kb', action='store_true', dest='simplify_kb', default=False,
+                      help=default("Hybrid agent drops duplicate, tautological and subsumed" \
+                                   + " clauses as they are told to its KB"))
+    parser.add_option('--plan-cache', dest='plan_cache', default=None,
+                      help=default("File to load/save the hybrid agent plan cache" \
+                                   + " (reused across runs on the same layouts)"))
+    parser.add_option('--plan-cache-size', dest='plan_cache_size', default=1024,
+                      help=default("Max number of plans kept in the plan cache" \
+                                   + " (0 disables plan caching)"))
+    parser.add_option('--planner-search', dest='planner_search', default='astar',
+                      type='choice', choices=wumpus_planners.PLANNER_SEARCHES,
+                      help=default("Search used by the hybrid agent planners:" \
+                                   + " " + ", ".join(wumpus_planners.PLANNER_SEARCHES) \
+                                   + " (grid is faster, but may pick another plan" \
+                                   + " of the same length)"))
+    parser.add_option('--profile', dest='profile', default=None,
+                      help=default("File the hybrid agent appends its per-episode" \
+                                   + " profile (phase latency histograms, per-step" \
+                                   + " SAT/clause/planner counters) to, as JSON lines"))
     
     # options for reinforcement learning
     # numTraining = 12000
@@ -852,6 +1005,58 @@ def readCommand( argv ):
                       help=default("max difference of q values, under which the policy can converge for reinforcement learning agent"))
     parser.add_option('-r', '--totalActualRuns', dest='totalActualRuns', default=100,
                       help=default("number of tests to run after policy generation for reinforcement learning agent"))
+    parser.add_option('--checkpoint', dest='checkpoint', default='policy.qtb',
+                      help=default("Binary Q-table checkpoint written by the reinforcement learning agent" \
+                                   + " (print with: python wumpus_qtable.py <file>)"))
+    parser.add_option('--checkpoint-every', dest='checkpoint_every', default=0,
+                      help=default("Also write the checkpoint every this many training episodes (0 = only at the end)"))
+    parser.add_option('--resume', dest='resume', default=None,
+                      help=default("Continue training from a checkpoint (Q-table, episode counter and" \
+                                   + " random stream states)"))
+    parser.add_option('--seed', dest='seed', default=None,
+                      help=default("Master seed of the environment's, agent's and actors' random streams" \
+                                   + " for reinforcement learning (None = not reproducible)"))
+    parser.add_option('--warm-start', dest='warm_start', default=None,
+                      help=default("Start training from the Q-table of a checkpoint, e.g. one trained on a" \
+                                   + " similar layout (combine with a lower -m)"))
+    parser.add_option('--replay', dest='replay', default=0,
+                      help=default("Experience replay buffer capacity for reinforcement learning agent" \
+                                   + " (0 = no replay)"))
+    parser.add_option('--replay-batch', dest='replay_batch', default=8,
+                      help=default("Transitions replayed per step when using experience replay"))
+    parser.add_option('--actors', dest='actors', default=0,
+                      help=default("Train with this many actor processes feeding one learner" \
+                                   + " (0 = act and learn in one loop)"))
+    parser.add_option('--actor-epsilon', dest='actor_epsilon', default=0.4,
+                      help=default("Exploration rate of the most exploratory actor; actor i" \
+                                   + " of N uses it to the power 1 + 2i/(N-1)"))
+    parser.add_option('--actor-queue', dest='actor_queue', default=16,
+                      help=default("Max transition chunks queued between actors and learner"))
+    parser.add_option('--actor-chunk', dest='actor_chunk', default=64,
+                      help=default("Transitions an actor sends to the learner at a time"))
+    parser.add_option('--backpressure', dest='backpressure', default='block',
+                      help=default("What actors do when the queue is full: block or drop"))
+    parser.add_option('--approximate', action='store_true', dest='approximate', default=False,
+                      help=default("Learn a linear Q-function over state features instead of a Q-table"))
+    parser.add_option('--features', dest='features', default='distance',
+                      help=default("Features for --approximate: state, percept or distance"))
+    parser.add_option('--lambda', dest='lambd', default=0.0,
+                      help=default("Eligibility trace decay for Q(lambda) learning (0 = one-step Q learning)"))
+    parser.add_option('--sarsa', action='store_true', dest='sarsa', default=False,
+                      help=default("With --lambda, use SARSA(lambda) instead of Watkins's Q(lambda)"))
+    parser.add_option('--dyna', dest='dyna', default=0,
+                      help=default("Dyna-Q planning: simulated backups from the learned model per" \
+                                   + " real step (0 = plain Q learning)"))
+    parser.add_option('--prioritized-sweeping', action='store_true', dest='prioritized_sweeping',
+                      default=False,
+                      help=default("Order Dyna-Q backups by prioritized sweeping instead of uniformly"))
+    parser.add_option('--model-based', dest='model_based', default=None,
+                      type='choice', choices=['known', 'learned'],
+                      help=default("Model-based agent: solve the known world model by value iteration" \
+                                   + " ('known', no training needed) or estimate the model from" \
+                                   + " experience ('learned')"))
+    parser.add_option('--prioritized', action='store_true', dest='prioritized', default=False,
+                      help=default("Use prioritized (by TD error) instead of uniform experience replay"))
     
 
     parser.add_option('-t', '--test', action='store_true', dest='test_minisat',
@@ -870,6 +1075,10 @@ def run_command(options):
     if options.test_minisat:
         run_minisat_test()
         return
+    # before the plan cache, which only loads plans saved under the same search
+    wumpus_planners.planner_search = options.planner_search
+    cache = wumpus_planners.configure_plan_cache(int(options.plan_cache_size),
+                                                 options.plan_cache)
     if options.rl:
         options.gamma = float(options.gamma)
         options.epsilon = float(options.epsilon)
@@ -878,14 +1087,45 @@ def run_command(options):
         options.minNumTraining = int(options.minNumTraining)
         options.numTraining = int(options.numTraining)
         options.totalActualRuns = int(options.totalActualRuns)
+        options.checkpoint_every = int(options.checkpoint_every)
+        options.replay = int(options.replay)
+        options.dyna = int(options.dyna)
+        options.lambd = float(options.lambd)
+        if options.model_based == 'known':
+            options.numTraining = 0
+        options.replay_batch = int(options.replay_batch)
+        options.actors = int(options.actors)
+        options.actor_epsilon = float(options.actor_epsilon)
+        options.actor_queue = int(options.actor_queue)
+        options.actor_chunk = int(options.actor_chunk)
+        if options.seed is not None:
+            options.seed = int(options.seed)
         options.forwardStochasticOutcome = tuple(eval(options.forwardStochasticOutcome))
 
         s = wscenario_4x4_QLearningWumpusAgent(options)
+        if options.resume and options.warm_start:
+            raise Exception("Options --resume and --warm-start cannot be combined")
+        if options.resume:
+            s.load_checkpoint(options.resume, resume=True)
+        elif options.warm_start:
+            s.load_checkpoint(options.warm_start, resume=False)
+        if options.actors:
+            s.train_actor_learner(options.actors, epsilon=options.actor_epsilon,
+                                  queue_size=options.actor_queue,
+                                  chunk_size=options.actor_chunk,
+                                  backpressure=options.backpressure)
     elif options.hybrid:
         if options.layout:
-            s = world_scenario_hybrid_wumpus_agent_from_layout(options.layout)
+            s = world_scenario_hybrid_wumpus_agent_from_layout(options.layout,
+                                                               options.local_axioms,
+                                                               options.cardinality_encoding,
+                                                               options.clause_axioms,
+                                                               options.simplify_kb)
         else:
-            s = wscenario_4x4_HybridWumpusAgent()
+            s = wscenario_4x4_HybridWumpusAgent(options.local_axioms,
+                                                options.cardinality_encoding,
+                                                options.clause_axioms,
+                                                options.simplify_kb)
     elif options.kb:
         if options.layout:
             s = world_scenario_manual_with_kb_from_layout(options.layout)
@@ -896,7 +1136,14 @@ def run_command(options):
             s = world_scenario_manual_from_layout(options.layout)
         else:
             s = wscenario_4x4_manual()
+    if options.profile:
+        for agent in s.env.agents:
+            if hasattr(agent, 'profiler'):
+                agent.profiler.output = options.profile
     s.run()
+    if cache is not None and not options.rl:
+        print cache.to_string()
+        cache.save()
 
 #-------------------------------------------------------------------------------
 
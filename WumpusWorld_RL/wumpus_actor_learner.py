@@ -0,0 +1,298 @@
+# wumpus_actor_learner.py
+# -----------------------
+# Licensing Information:
+# Please DO NOT DISTRIBUTE OR PUBLISH solutions to this project.
+# You are free to use and extend these projects for EDUCATIONAL PURPOSES ONLY.
+# The Hunt The Wumpus AI project was developed at University of Arizona
+# by Clay Morrison (clayton@sista.arizona.edu), spring 2013.
+# This project extends the python code provided by Peter Norvig as part of
+# the Artificial Intelligence: A Modern Approach (AIMA) book example code;
+# see http://aima.cs.berkeley.edu/code.html
+# In particular, the following files come directly from the AIMA python
+# code: ['agents.py', 'logic.py', 'search.py', 'utils.py']
+# ('logic.py' has been modified by Clay Morrison in locations with the
+# comment 'CTM')
+# The file ['minisat.py'] implements a slim system call wrapper to the minisat
+# (see http://minisat.se) SAT solver, and is directly based on the satispy
+# python project, see https://github.com/netom/satispy .
+
+"""
+Asynchronous actor/learner training for the Q learning wumpus agent.
+
+Actor processes each run WumpusQLearningEnvironment episodes with an
+ActorQLearningWumpusAgent, acting on a read-only snapshot of the policy,
+and stream their transitions in chunks through a bounded queue.  A single
+learner (the calling process) applies the chunks to a dense Q-table as
+they arrive and publishes a new snapshot in shared memory every
+publish_every chunks; actors pick it up every refresh_every episodes.
+
+Backpressure: when the learner falls behind and the queue is full, an
+actor either blocks until there is room ('block', no experience is lost)
+or drops the chunk and goes on acting ('drop').  Time spent blocked and
+transitions dropped are reported with the throughput.
+
+States and actions are sent as indices into a wumpus_qtable.QTableLayout,
+so a chunk pickles to a few bytes per transition.
+
+Actors act on a policy that lags the learner's, so within an episode they
+cannot rely on updated Q-values to steer them away from actions just
+tried; exploration comes from epsilon instead.  As in Ape-X (Horgan et
+al., 2018), actors explore at different rates: actor i of N uses
+epsilon ** (1 + 2 i / (N - 1)).  (Ape-X spreads the exponent up to 8;
+with few actors that leaves nearly greedy actors stuck in long loops on
+a stale policy.)
+"""
+
+from array import array
+import multiprocessing
+import Queue
+import time
+
+import util
+from wumpus_agent import ActorQLearningWumpusAgent
+from wumpus_environment import Wumpus
+from wumpus_qtable import QTableLayout
+import wumpus_rng
+
+
+class WorldSpec(object):
+    """
+    Everything an actor process needs to rebuild a scenario's world
+    (see WumpusWorldQLearningScenario.build_world).
+    """
+
+    def __init__(self, width, height, entrance, objects, forwardStochasticOutcome):
+        self.width = width
+        self.height = height
+        self.entrance = entrance
+        self.objects = objects
+        self.forwardStochasticOutcome = forwardStochasticOutcome
+
+    @classmethod
+    def from_scenario(cls, scenario):
+        return cls(scenario.width, scenario.height, scenario.entrance, scenario.objects,
+                   scenario.forwardStochasticOutcome)
+
+
+def run_actor(actor_id, spec, actions, epsilon, seed, shared_q, version, queue, stop,
+              chunk_size, refresh_every, backpressure, steps):
+    """ Actor process: act on policy snapshots and send transition chunks """
+    # imported here: wumpus imports this module
+    from wumpus import WumpusWorldQLearningScenario
+    util.mutePrint()
+    layout = QTableLayout(spec.width, spec.height, actions)
+    agent = ActorQLearningWumpusAgent('north', verbose=False, layout=layout, epsilon=epsilon)
+    s = WumpusWorldQLearningScenario(agent=agent, width=spec.width, height=spec.height,
+                                     entrance=spec.entrance, objects=spec.objects,
+                                     forwardStochasticOutcome=spec.forwardStochasticOutcome,
+                                     checkpoint_file=None, trace=False,
+                                     seed=wumpus_rng.spawn_seed(seed, 'actor', actor_id))
+    seen_version = -1
+    episodes = 0
+    scores = []
+    blocked = 0.0
+    dropped = 0
+    while not stop.is_set():
+        if episodes % refresh_every == 0 and version.value != seen_version:
+            with shared_q.get_lock():
+                seen_version = version.value
+                agent.set_policy(array('d', shared_q.get_obj()))
+        for step in range(steps):
+            if s.env.is_done():
+                state = (agent.location[0], agent.location[1], agent.heading,
+                         agent.has_gold, agent.wumpus_alive)
+                agent.update(state, agent.previous_action, done=True)
+                break
+            s.env.step()
+        episodes += 1
+        scores.append(agent.performance_measure)
+        agent.reset()
+        for obj in s.objects:
+            if isinstance(obj[0], Wumpus):
+                obj[0].alive = True
+        s.env = s.build_world(s.width, s.height, s.entrance, agent, s.objects)
+        if len(agent.transitions) < chunk_size:
+            continue
+        chunk = (actor_id, agent.transitions, scores, blocked, dropped)
+        agent.transitions = []
+        scores = []
+        if backpressure == 'drop':
+            try:
+                queue.put_nowait(chunk)
+            except Queue.Full:
+                dropped += len(chunk[1])
+            continue
+        start = time.time()
+        while not stop.is_set():
+            try:
+                queue.put(chunk, timeout=0.1)
+                break
+            except Queue.Full:
+                pass
+        blocked += time.time() - start
+    queue.cancel_join_thread()
+    # multiprocessing flushes sys.stdout as the process exits
+    util.unmutePrint()
+
+
+def actor_epsilons(actors, epsilon, spread=2.0):
+    """ Exploration rate of each of actors actors: epsilon ** (1 + spread i / (N-1)) """
+    if actors == 1:
+        return [epsilon]
+    return [epsilon ** (1 + spread * i / (actors - 1.0)) for i in range(actors)]
+
+
+class ActorLearner(object):
+    """
+    Q learning with actors decoupled from the learner.
+    spec := WorldSpec of the world to learn
+    actions := list of action names
+    actors := number of actor processes
+    epsilon := exploration rate of the most exploratory actor (see
+               actor_epsilons)
+    queue_size := max number of transition chunks waiting for the learner
+    chunk_size := transitions an actor collects before sending them
+                  (whole episodes, so a chunk can be a little larger)
+    refresh_every := episodes between an actor's checks for a new snapshot
+    publish_every := chunks the learner applies between snapshots
+    backpressure := 'block' or 'drop', what an actor does when the queue
+                    is full
+    steps := max steps per episode
+    seed := master seed; actor i runs the random streams of
+            wumpus_rng.spawn_seed(seed, 'actor', i)
+    """
+
+    def __init__(self, spec, actions, actors=2, epsilon=0.4, gamma=0.8, alpha=0.2,
+                 queue_size=16, chunk_size=64, refresh_every=1, publish_every=1,
+                 backpressure='block', steps=1000, seed=0):
+        if backpressure not in ('block', 'drop'):
+            raise ValueError("Unknown backpressure policy: {0}".format(backpressure))
+        self.spec = spec
+        self.layout = QTableLayout(spec.width, spec.height, actions)
+        self.actors = actors
+        self.epsilon = epsilon
+        self.discount = gamma
+        self.alpha = alpha
+        self.queue_size = queue_size
+        self.chunk_size = chunk_size
+        self.refresh_every = refresh_every
+        self.publish_every = publish_every
+        self.backpressure = backpressure
+        self.steps = steps
+        self.seed = seed
+        self.q = array('d', [0.0]) * self.layout.size
+        self.stats = {}
+
+    def load_q_values(self, q_values):
+        """ Start from q_values, a mapping of (state, action) -> Q-value """
+        for key, value in q_values.items():
+            i = self.layout.index(key)
+            if i >= 0:
+                self.q[i] = value
+
+    def learn_chunk(self, transitions):
+        """ Q-learning updates (always bootstrapped, as in QLearningAgent) """
+        q, alpha, discount = self.q, self.alpha, self.discount
+        num_actions = len(self.layout.actions)
+        for s, a, reward, next_s, done in transitions:
+            target = reward
+            if next_s >= 0:
+                base = next_s * num_actions
+                target += discount * max(q[base:base + num_actions])
+            i = s * num_actions + a
+            q[i] += alpha * (target - q[i])
+
+    def run(self, episodes):
+        """
+        Train until the learner has applied episodes episodes of experience
+        (a few more may be collected).  Returns self.stats.
+        """
+        # actors start from self.q, so a warm start or load_q_values() is the first policy
+        shared_q = multiprocessing.Array('d', self.q)
+        version = multiprocessing.Value('i', 0)
+        queue = multiprocessing.Queue(self.queue_size)
+        stop = multiprocessing.Event()
+        epsilons = actor_epsilons(self.actors, self.epsilon)
+        processes = [multiprocessing.Process(
+                         target=run_actor,
+                         args=(i, self.spec, self.layout.actions, epsilons[i], self.seed,
+                               shared_q, version, queue, stop, self.chunk_size,
+                               self.refresh_every, self.backpressure, self.steps))
+                     for i in range(self.actors)]
+        for p in processes:
+            p.daemon = True
+            p.start()
+        learned = 0
+        chunks = 0
+        scores = []
+        idle = 0.0
+        actor_blocked = {}
+        actor_dropped = {}
+        start_time = time.time()
+        try:
+            while len(scores) < episodes:
+                wait = time.time()
+                try:
+                    chunk = queue.get(timeout=1.0)
+                except Queue.Empty:
+                    idle += time.time() - wait
+                    # actors only exit once stopped, so an exited one failed
+                    failed = [(i, p.exitcode) for i, p in enumerate(processes)
+                              if not p.is_alive()]
+                    if failed:
+                        raise Exception("Actor processes exited (actor, exit code):"
+                                        " {0}".format(failed))
+                    continue
+                idle += time.time() - wait
+                actor_id, transitions, chunk_scores, blocked, dropped = chunk
+                self.learn_chunk(transitions)
+                learned += len(transitions)
+                scores.extend(chunk_scores)
+                actor_blocked[actor_id] = blocked
+                actor_dropped[actor_id] = dropped
+                chunks += 1
+                if chunks % self.publish_every == 0:
+                    with shared_q.get_lock():
+                        shared_q.get_obj()[:] = self.q
+                        version.value += 1
+        finally:
+            stop.set()
+            elapsed = time.time() - start_time
+            # drain the queue so that no actor stays blocked on a full pipe
+            while any(p.is_alive() for p in processes):
+                try:
+                    queue.get(timeout=0.1)
+                except Queue.Empty:
+                    pass
+            for p in processes:
+                p.join()
+        dropped = sum(actor_dropped.values())
+        self.stats = {'actors': self.actors,
+                      'episodes': len(scores),
+                      'transitions': learned,
+                      'dropped_transitions': dropped,
+                      'seconds': elapsed,
+                      'transitions_per_second': learned / elapsed,
+                      'collected_per_second': (learned + dropped) / elapsed,
+                      'episodes_per_second': len(scores) / elapsed,
+                      'learner_idle_fraction': idle / elapsed,
+                      'actor_blocked_seconds': sum(actor_blocked.values()),
+                      'snapshots': version.value,
+                      'mean_score': sum(scores) / float(len(scores)) if scores else 0.0}
+        return self.stats
+
+    def q_values(self):
+        """ Dict of (state, action) -> Q-value of the nonzero learned entries """
+        key = self.layout.key
+        return dict((key(i), v) for i, v in enumerate(self.q) if v != 0.0)
+
+    def to_string(self):
+        st = self.stats
+        return ("Actor/learner: {actors} actors, {episodes} episodes, {transitions} transitions"
+                " in {seconds:.2f}s\n"
+                "  learned {transitions_per_second:.0f} transitions/s"
+                " (collected {collected_per_second:.0f}/s, {dropped_transitions} dropped),"
+                " {episodes_per_second:.1f} episodes/s\n"
+                "  learner idle {learner_idle_fraction:.0%}, actors blocked"
+                " {actor_blocked_seconds:.2f}s, {snapshots} policy snapshots,"
+                " mean training score {mean_score:.1f}").format(**st)
@@ -20,9 +20,14 @@ from qlearningAgents import *
 from logic import *
 from wumpus_environment import *
 from wumpus_kb import *
+from wumpus_cnf import *
 from wumpus_planners import *
 import minisat as msat
-from time import clock
+from wumpus_profiler import Profiler
+from array import array
+import wumpus_features
+import wumpus_mdp
+import wumpus_replay
 import sys
 
 
@@ -53,9 +58,185 @@ def minisat(clauses, query = None, variable = None, value = True, verbose = Fals
 #-------------------------------------------------------------------------------
 
 class PropKB_SAT(PropKB):
+    """
+    PropKB asking minisat. With simplify=True every told clause goes through
+    a clause index (clauses as sorted literals over self.index, hashed, and
+    the clauses each literal occurs in), which
+        - drops duplicate and tautological clauses,
+        - drops a clause subsumed by a clause already known (forward), and
+          removes the known clauses a new one subsumes (backward),
+        - strengthens clauses by self-subsuming resolution: (l | A) and
+          (~l | B) with A a subset of B make ~l redundant in the second.
+    Each is an equivalence, so ask() answers are unchanged. simplify() runs
+    the same pass once over the clauses told so far; removed counts what
+    was removed (see simplification_report()).
+    """
+
+    def __init__(self, sentence=None, simplify=False):
+        self.queries = 0    # ask() calls
+        self.sat_calls = 0  # minisat invocations (two per ask())
+        self.index = PropositionIndex() # variables of tell_clauses() clauses
+        self.simplify_on_tell = simplify
+        self.removed = dict((kind, 0) for kind in ['duplicate', 'tautology', 'subsumed',
+                                                   'backward_subsumed', 'strengthened'])
+        self.clause_table = None
+        if simplify:
+            self.reset_clause_index()
+        super(PropKB_SAT, self).__init__(sentence)
 
     def tell(self, sentence):
-        if sentence: super(PropKB_SAT,self).tell(sentence)
+        if not sentence: return
+        if self.simplify_on_tell:
+            clauses = conjuncts(to_cnf(sentence))
+            self.add_clauses([self.clause_literals(clause) for clause in clauses], clauses)
+        else:
+            super(PropKB_SAT,self).tell(sentence)
+
+    def tell_clauses(self, clauses):
+        """ Add clauses over self.index, as from the wumpus_cnf generators """
+        if self.simplify_on_tell:
+            self.add_clauses(clauses)
+            return
+        clause_expr = self.index.clause_expr
+        self.clauses.extend([clause_expr(clause) for clause in clauses])
+
+    def clause_literals(self, clause):
+        """ Literals over self.index of an AIMA clause; None if not a clause of propositions """
+        literals = []
+        for literal in disjuncts(clause):
+            sign = 1
+            if literal.op == '~':
+                sign, literal = -1, literal.args[0]
+            if literal.args or not is_prop_symbol(literal.op):
+                return None
+            literals.append(sign * self.index.var(literal.op))
+        return literals
+
+    def reset_clause_index(self):
+        self.clause_table = []  # clause id -> (frozenset of literals, expression), None if removed
+        self.clause_ids = {}    # sorted literals -> clause id
+        self.occurrences = {}   # literal -> set of ids of the clauses it occurs in
+        self.table_removals = 0
+
+    def add_clauses(self, clauses, exprs=None):
+        """
+        Add clauses (lists of literals; None for one that is kept unindexed,
+        as is) through the clause index. exprs := their AIMA expressions,
+        else they are built from self.index when the clause is kept
+        """
+        pending = list(reversed(zip(clauses, exprs or [None] * len(clauses))))
+        table = self.clause_table
+        occurrences = self.occurrences
+        table_removals = self.table_removals
+        while pending:
+            literals, clause_expr = pending.pop()
+            if literals is None:
+                table.append((None, clause_expr))
+                self.clauses.append(clause_expr)
+                continue
+            clause = frozenset(literals)
+            if any(-literal in clause for literal in clause):
+                self.removed['tautology'] += 1
+                continue
+            if len(clause) < len(literals):
+                clause_expr = None
+            # self-subsuming resolution: (~l | A) with A a subset of clause - l
+            literal = self.strengthening_literal(clause)
+            while literal is not None:
+                clause = clause - frozenset([literal])
+                clause_expr = None
+                self.removed['strengthened'] += 1
+                literal = self.strengthening_literal(clause)
+            key = tuple(sorted(clause))
+            if key in self.clause_ids:
+                self.removed['duplicate'] += 1
+                continue
+            if self.subsumes_any(clause):
+                self.removed['subsumed'] += 1
+                continue
+            cid = len(table)
+            if clause_expr is None:
+                clause_expr = self.index.clause_expr(key)
+            table.append((clause, clause_expr))
+            self.clauses.append(clause_expr)
+            self.clause_ids[key] = cid
+            for literal in clause:
+                occurrences.setdefault(literal, set()).add(cid)
+            # backward subsumption, by the literal of clause in the fewest clauses
+            rarest = min(clause, key=lambda literal: len(occurrences[literal]))
+            for i in list(occurrences[rarest]):
+                if i != cid and clause <= table[i][0]:
+                    self.remove_clause(i)
+                    self.removed['backward_subsumed'] += 1
+            # backward self-subsuming resolution: (~l | B) with clause - l a subset of B
+            for literal in clause:
+                rest = clause - frozenset([literal])
+                for i in list(occurrences.get(-literal, ())):
+                    other = table[i][0]
+                    if len(other) > 1 and len(other) >= len(clause) and rest <= other:
+                        self.remove_clause(i)
+                        self.removed['strengthened'] += 1
+                        pending.append((other - frozenset([-literal]), None))
+        if self.table_removals != table_removals:
+            self.clauses = [entry[1] for entry in table if entry is not None]
+
+    def strengthening_literal(self, clause):
+        """ A literal l of clause (not a unit) such that a clause (~l | A) in
+        the index has A a subset of clause - l, or None """
+        if len(clause) < 2:
+            return None
+        table = self.clause_table
+        for literal in clause:
+            for i in self.occurrences.get(-literal, ()):
+                other = table[i][0]
+                if len(other) <= len(clause) and \
+                   all(l == -literal or l in clause for l in other):
+                    return literal
+        return None
+
+    def subsumes_any(self, clause):
+        """ Is a clause in the index a subset of clause? """
+        table = self.clause_table
+        checked = set()
+        for literal in clause:
+            for i in self.occurrences.get(literal, ()):
+                if i not in checked:
+                    checked.add(i)
+                    other = table[i][0]
+                    if len(other) <= len(clause) and other <= clause:
+                        return True
+        return False
+
+    def remove_clause(self, i):
+        clause = self.clause_table[i][0]
+        self.clause_table[i] = None
+        del self.clause_ids[tuple(sorted(clause))]
+        for literal in clause:
+            self.occurrences[literal].discard(i)
+        self.table_removals += 1
+
+    def simplify(self):
+        """ Run the simplification pass over the clauses told so far;
+        return the number of clauses it removed """
+        before = self.clauses_removed()
+        clauses = self.clauses
+        self.reset_clause_index()
+        self.clauses = []
+        self.add_clauses([self.clause_literals(clause) for clause in clauses], clauses)
+        if not self.simplify_on_tell:
+            self.clause_table = self.clause_ids = self.occurrences = None
+        return self.clauses_removed() - before
+
+    def clauses_removed(self):
+        """ Clauses removed by the simplification (not counting strengthened ones) """
+        return sum(n for kind, n in self.removed.items() if kind != 'strengthened')
+
+    def simplification_report(self):
+        return 'removed {0} clauses ({1} duplicate, {2} tautologies, {3} subsumed,' \
+               ' {4} backward subsumed), strengthened {5}'.format(
+                   self.clauses_removed(), self.removed['duplicate'], self.removed['tautology'],
+                   self.removed['subsumed'], self.removed['backward_subsumed'],
+                   self.removed['strengthened'])
 
     def load_sentences(self, sentences):
         for sentence in sentences: self.tell(sentence)
@@ -64,6 +245,8 @@ class PropKB_SAT(PropKB):
         """ Assumes query is a single positive proposition """
         if isinstance(query,str):
             query = expr(query)
+        self.queries += 1
+        self.sat_calls += 2
         sT = minisat(self.clauses, None, variable=query, value=True, verbose=False)
         sF = minisat(self.clauses, None, variable=query, value=False, verbose=False)
         if sT.success == sF.success:
@@ -89,8 +272,30 @@ class Proposition(agents.Thing):
 
 class HybridWumpusAgent(Explorer):
     "An agent for the wumpus world that does logical inference. [Fig. 7.19]"""
-    def __init__(self, heading='east', environment=None, verbose=True, keep_axioms=True):
+    def __init__(self, heading='east', environment=None, verbose=True, keep_axioms=True,
+                 profile=True, profile_output=None, local_axioms=False,
+                 cardinality_encoding=None, clause_axioms=False, simplify_kb=False):
         self.keep_axioms = keep_axioms # for debugging: if True, keep easier-to-read PL form
+        # frontier-local mode for large worlds: axioms and queries only for
+        # the visited locations and their neighbors (see wumpus_kb)
+        self.local_axioms = local_axioms
+        # encoding of the KB's exactly one Wumpus / heading / action constraints,
+        # one of wumpus_kb.CARDINALITY_ENCODINGS; by default 'pairwise', or
+        # the linear-size 'sequential' in the frontier-local mode
+        if cardinality_encoding is None:
+            cardinality_encoding = 'sequential' if local_axioms else 'pairwise'
+        if cardinality_encoding not in CARDINALITY_ENCODINGS:
+            raise ValueError("Unknown cardinality encoding: {0}".format(cardinality_encoding))
+        self.cardinality_encoding = cardinality_encoding
+        # tell the KB the clauses of the wumpus_cnf generators rather than
+        # the formula strings of wumpus_kb (same consequences, no to_cnf)
+        self.clause_axioms = clause_axioms
+        # drop duplicate, tautological and subsumed clauses as they are told
+        # (see PropKB_SAT)
+        self.simplify_kb = simplify_kb
+        # per time step phase timings and SAT / clause / planner counters;
+        # verbose output reports span timings, so it always profiles
+        self.profiler = Profiler(profile or verbose, profile_output)
         super(HybridWumpusAgent, self).__init__(self.agent_program, heading, environment, verbose)
 
     def reset(self):
@@ -99,32 +304,75 @@ class HybridWumpusAgent(Explorer):
         self.unvisited = [(x,y)
                           for x in range(1,self.width+1)
                           for y in range(1,self.height+1)]
+        self.visited = set([self.initial_location])
+        self.frontier = frontier_locations(self.visited, 1, self.width, 1, self.height)
+        self.profiler.start_episode()
+        self.number_of_clauses_over_epochs = []
+        # current location is queried at each epoch, so collecting
+        # the times allows us to see how querying gets more expensive
+        # as the KB grows.
+        self.belief_loc_query_times = []
         self.kb = self.create_wumpus_KB()
-        if self.verbose:
-            self.number_of_clauses_over_epochs = []
-            # current location is queried at each epoch, so collecting
-            # the times allows us to see how querying gets more expensive
-            # as the KB grows.
-            self.belief_loc_query_times = []
+
+    def end_episode(self):
+        """ Summarize (and export) the profile of the episode just finished """
+        return self.profiler.end_episode()
 
     def create_wumpus_KB(self):
+        if self.clause_axioms:
+            return self.create_wumpus_clause_KB()
         if self.verbose:
             print "HWA.create_wumpus_KB(): adding initial wumpus axioms"
-        axioms = initial_wumpus_axioms(self.belief_location[0],self.belief_location[1],
-                                       self.width,self.height,
-                                       self.heading_str(self.belief_heading))
+        if self.local_axioms:
+            axioms = initial_local_wumpus_axioms(self.belief_location[0],self.belief_location[1],
+                                                 self.width,self.height,
+                                                 self.heading_str(self.belief_heading),
+                                                 self.cardinality_encoding)
+            axioms += generate_local_atemporal_axioms(self.frontier,1,self.width,1,self.height)
+        else:
+            axioms = initial_wumpus_axioms(self.belief_location[0],self.belief_location[1],
+                                           self.width,self.height,
+                                           self.heading_str(self.belief_heading),
+                                           self.cardinality_encoding)
         if self.verbose:
-            start_time = clock()
             print "    total number of axioms={0}".format(len(axioms))
-        kb = PropKB_SAT()
-        for sentence in axioms:
-            kb.tell(sentence)
+        with self.profiler.span('create_wumpus_KB') as span:
+            kb = PropKB_SAT(simplify=self.simplify_kb)
+            for sentence in axioms:
+                kb.tell(sentence)
         if self.keep_axioms:
             kb.axioms = axioms
         if self.verbose:
-            end_time = clock()
             print "    total number of clauses={0}".format(len(kb.clauses))
-            print "          >>> time elapsed: {0}".format(end_time-start_time)
+            print "          >>> time elapsed: {0}".format(span.elapsed)
+        return kb
+
+    def create_wumpus_clause_KB(self):
+        """ create_wumpus_KB with the wumpus_cnf clause generators """
+        if self.verbose:
+            print "HWA.create_wumpus_clause_KB(): adding initial wumpus clauses"
+        kb = PropKB_SAT(simplify=self.simplify_kb)
+        with self.profiler.span('create_wumpus_KB') as span:
+            if self.local_axioms:
+                clauses = initial_local_wumpus_clauses(kb.index,
+                                                       self.belief_location[0],self.belief_location[1],
+                                                       self.width,self.height,
+                                                       self.heading_str(self.belief_heading),
+                                                       self.cardinality_encoding)
+                clauses += generate_local_atemporal_clauses(kb.index,self.frontier,
+                                                            1,self.width,1,self.height)
+            else:
+                clauses = initial_wumpus_clauses(kb.index,
+                                                 self.belief_location[0],self.belief_location[1],
+                                                 self.width,self.height,
+                                                 self.heading_str(self.belief_heading),
+                                                 self.cardinality_encoding)
+            kb.tell_clauses(clauses)
+        if self.keep_axioms:
+            kb.axioms = [' | '.join(map(kb.index.name, clause)) for clause in clauses]
+        if self.verbose:
+            print "    total number of clauses={0}".format(len(kb.clauses))
+            print "          >>> time elapsed: {0}".format(span.elapsed)
         return kb
 
     def make_percept_sentence(self, raw_percepts):
@@ -132,46 +380,106 @@ class HybridWumpusAgent(Explorer):
         if self.verbose: print "   HWA.make_percept_sentence(): {0}".format(sentence)
         return sentence
 
+    def query_locations(self):
+        """ Locations whose propositions are queried: all of them, or in the
+        frontier-local mode the frontier (the others are unknown anyway) """
+        if self.local_axioms:
+            return self.frontier
+        return [(x,y) for x in range(1,self.width+1) for y in range(1,self.height+1)]
+
+    def expand_frontier(self):
+        """ Add the believed location to the visited locations; return the
+        locations this adds to the frontier """
+        self.visited.add(self.belief_location)
+        frontier = frontier_locations(self.visited, 1, self.width, 1, self.height)
+        new_locations = sorted(set(frontier) - set(self.frontier))
+        self.frontier = frontier
+        return new_locations
+
     def add_temporal_axioms(self):
+        if self.clause_axioms:
+            return self.add_temporal_clauses()
         if self.verbose: print "       HWA.add_temporal_axioms()"
-        axioms = generate_square_OK_axioms(self.time,1,self.width,1,self.height)
-        if self.verbose:
-            ax_so_far = len(axioms)
-            print "           number of location_OK axioms:         {0}".format(ax_so_far)
-        axioms += generate_breeze_percept_and_location_axioms(self.time,1,self.width,1,self.height)
-        axioms += generate_stench_percept_and_location_axioms(self.time,1,self.width,1,self.height)
-        if self.verbose:
-            new_ax_so_far = len(axioms)
-            perc_to_loc = new_ax_so_far - ax_so_far
-            print "           number of percept_to_loc axioms:      {0}".format(perc_to_loc)
-            ax_so_far = new_ax_so_far
-        axioms += generate_at_location_ssa(self.time,self.belief_location[0],self.belief_location[1],
-                                           1,self.width,1,self.height,
-                                           self.heading_str(self.belief_heading))
-        if self.verbose:
-            new_ax_so_far = len(axioms)
-            local_loc_at = new_ax_so_far - ax_so_far
-            print "           number of at_location ssa axioms:     {0}".format(local_loc_at)
-            ax_so_far = new_ax_so_far
-        axioms += generate_non_location_ssa(self.time)
-        if self.verbose:
-            new_ax_so_far = len(axioms)
-            remaining_ssa_at_time = new_ax_so_far - ax_so_far
-            print "           number of non-location ssa axioms:    {0}".format(remaining_ssa_at_time)
-            ax_so_far = new_ax_so_far
-        axioms += generate_mutually_exclusive_axioms(self.time)
-        if self.verbose:
-            new_ax_so_far = len(axioms)
-            mutually_exclusive = new_ax_so_far - ax_so_far
-            print "           number of mutually_exclusive axioms:  {0}".format(mutually_exclusive)
+        with self.profiler.span('generate_temporal_axioms'):
+            if self.local_axioms:
+                axioms = generate_local_atemporal_axioms(self.expand_frontier(),
+                                                         1,self.width,1,self.height)
+                if self.verbose:
+                    ax_so_far = len(axioms)
+                    print "           number of new frontier axioms:        {0}".format(ax_so_far)
+                axioms += generate_local_temporal_axioms(self.time, self.frontier)
+                if self.verbose:
+                    new_ax_so_far = len(axioms)
+                    print "           number of OK and percept_to_loc axioms:" \
+                          + " {0}".format(new_ax_so_far - ax_so_far)
+                    ax_so_far = new_ax_so_far
+            else:
+                axioms = generate_square_OK_axioms(self.time,1,self.width,1,self.height)
+                if self.verbose:
+                    ax_so_far = len(axioms)
+                    print "           number of location_OK axioms:         {0}".format(ax_so_far)
+                axioms += generate_breeze_percept_and_location_axioms(self.time,1,self.width,1,self.height)
+                axioms += generate_stench_percept_and_location_axioms(self.time,1,self.width,1,self.height)
+                if self.verbose:
+                    new_ax_so_far = len(axioms)
+                    perc_to_loc = new_ax_so_far - ax_so_far
+                    print "           number of percept_to_loc axioms:      {0}".format(perc_to_loc)
+                    ax_so_far = new_ax_so_far
+            axioms += generate_at_location_ssa(self.time,self.belief_location[0],self.belief_location[1],
+                                               1,self.width,1,self.height,
+                                               self.heading_str(self.belief_heading))
+            if self.verbose:
+                new_ax_so_far = len(axioms)
+                local_loc_at = new_ax_so_far - ax_so_far
+                print "           number of at_location ssa axioms:     {0}".format(local_loc_at)
+                ax_so_far = new_ax_so_far
+            axioms += generate_non_location_ssa(self.time)
+            if self.verbose:
+                new_ax_so_far = len(axioms)
+                remaining_ssa_at_time = new_ax_so_far - ax_so_far
+                print "           number of non-location ssa axioms:    {0}".format(remaining_ssa_at_time)
+                ax_so_far = new_ax_so_far
+            axioms += generate_mutually_exclusive_axioms(self.time, self.cardinality_encoding)
+            if self.verbose:
+                new_ax_so_far = len(axioms)
+                mutually_exclusive = new_ax_so_far - ax_so_far
+                print "           number of mutually_exclusive axioms:  {0}".format(mutually_exclusive)
         
         if self.verbose: print "       Total number of axioms being added:  {0}".format(len(axioms))
         
-        for sentence in axioms:
-            self.kb.tell(sentence)
+        with self.profiler.span('tell_temporal_axioms'):
+            for sentence in axioms:
+                self.kb.tell(sentence)
         if self.keep_axioms:
             self.kb.axioms += axioms
 
+    def add_temporal_clauses(self):
+        """ add_temporal_axioms with the wumpus_cnf clause generators """
+        if self.verbose: print "       HWA.add_temporal_clauses()"
+        index = self.kb.index
+        with self.profiler.span('generate_temporal_axioms'):
+            if self.local_axioms:
+                clauses = generate_local_atemporal_clauses(index,self.expand_frontier(),
+                                                           1,self.width,1,self.height)
+                clauses += generate_local_temporal_clauses(index,self.time,self.frontier)
+            else:
+                clauses = generate_square_OK_clauses(index,self.time,1,self.width,1,self.height)
+                clauses += generate_breeze_percept_and_location_clauses(index,self.time,
+                                                                        1,self.width,1,self.height)
+                clauses += generate_stench_percept_and_location_clauses(index,self.time,
+                                                                        1,self.width,1,self.height)
+            clauses += generate_at_location_ssa_clauses(index,self.time,
+                                                        self.belief_location[0],self.belief_location[1],
+                                                        1,self.width,1,self.height,
+                                                        self.heading_str(self.belief_heading))
+            clauses += generate_non_location_ssa_clauses(index,self.time)
+            clauses += generate_mutually_exclusive_clauses(index,self.time,self.cardinality_encoding)
+        if self.verbose: print "       Total number of clauses being added:  {0}".format(len(clauses))
+        with self.profiler.span('tell_temporal_axioms'):
+            self.kb.tell_clauses(clauses)
+        if self.keep_axioms:
+            self.kb.axioms += [' | '.join(map(index.name, clause)) for clause in clauses]
+
     def wumpus_alive_query(self):
         if self.verbose:
             print "       Ask if Wumpus is Alive:"
@@ -190,10 +498,9 @@ class HybridWumpusAgent(Explorer):
             self.wumpus_alive_query()
             
             display_env = WumpusEnvironment(self.width, self.height)
-            start_time = clock()
         safe_loc = []
-        for x in range(1,self.width+1):
-            for y in range(1,self.height+1):
+        with self.profiler.span('find_OK_locations') as span:
+            for (x,y) in self.query_locations():
                 query = expr(state_OK_str(x,y,self.time))
                 result = self.kb.ask(query)
                 if result:
@@ -204,9 +511,8 @@ class HybridWumpusAgent(Explorer):
                     else:
                         display_env.add_thing(Proposition(query,result),(x,y))
         if self.verbose:
-            end_time = clock()
             print "          >>> time elapsed while making OK location queries:" \
-                  + " {0}".format(end_time-start_time)
+                  + " {0}".format(span.elapsed)
             print display_env.to_string(self.time, title="Find OK locations queries")
         return safe_loc
 
@@ -228,16 +534,18 @@ class HybridWumpusAgent(Explorer):
                                if (x,y) not in self.unvisited]
             for vis_loc in already_visited:
                 display_env.add_thing(Proposition(expr('~Vis'),'T'),(x,y))
-            start_time = clock()
-        for (x,y) in self.unvisited:
-            query = expr(state_loc_str(x,y,self.time))
-            vis_query_result = self.kb.ask(query)
-            if vis_query_result:
-                self.unvisited.remove((x,y))
+        with self.profiler.span('update_unvisited_locations') as span:
+            query_locations = set(self.query_locations())
+            for (x,y) in self.unvisited:
+                if (x,y) not in query_locations:
+                    continue
+                query = expr(state_loc_str(x,y,self.time))
+                vis_query_result = self.kb.ask(query)
+                if vis_query_result:
+                    self.unvisited.remove((x,y))
         if self.verbose:
-            end_time = clock()
             print "          >>> time elapsed while making unvisited locations" \
-                  + " queries: {0}".format(end_time-start_time)
+                  + " queries: {0}".format(span.elapsed)
             for vis_loc in self.unvisited:
                 display_env.add_thing(Proposition(expr('~Vis'),'F'),(x,y))
         return self.unvisited
@@ -257,23 +565,37 @@ class HybridWumpusAgent(Explorer):
         if self.verbose:
             print "     HWA.find_possible_wumpus_locations()"
             display_env = WumpusEnvironment(self.width, self.height)
-            start_time = clock()
         possible_wumpus_loc = []
-        for x in range(1,self.width+1):
-            for y in range(1,self.height+1):
+        with self.profiler.span('find_possible_wumpus_locations') as span:
+            wumpus_found = False
+            for (x,y) in self.query_locations():
                 query = expr(wumpus_str(x,y))
                 result = self.kb.ask(query)
                 if result != False:
                     possible_wumpus_loc.append((x,y))
+                if result:
+                    wumpus_found = True
                 if self.verbose:
                     if result == None:
                         display_env.add_thing(Proposition(query,'?'),(x,y))
                     else:
                         display_env.add_thing(Proposition(query,result),(x,y))
+            if self.local_axioms and not wumpus_found:
+                # outside the frontier the Wumpus propositions are only
+                # constrained by the exactly one Wumpus axioms (the stench of
+                # the unvisited frontier locations next to them is unknown),
+                # so they are interchangeable and one query answers for all:
+                # False e.g. once a stench confines the Wumpus to the frontier
+                frontier = set(self.frontier)
+                outside = [(x,y)
+                           for x in range(1,self.width+1)
+                           for y in range(1,self.height+1)
+                           if (x,y) not in frontier]
+                if outside and self.kb.ask(expr(wumpus_str(*outside[0]))) != False:
+                    possible_wumpus_loc += outside
         if self.verbose:
-            end_time = clock()
             print "          >>> time elapsed while making possible wumpus location queries:" \
-                  + " {0}".format(end_time-start_time)
+                  + " {0}".format(span.elapsed)
             print display_env.to_string(self.time, title="Possible Wumpus Location queries")
             print "Possible locations: {0}".format(possible_wumpus_loc)
         return possible_wumpus_loc
@@ -282,10 +604,9 @@ class HybridWumpusAgent(Explorer):
         if self.verbose:
             print "   HWA.find_not_unsafe_locations()"
             display_env = WumpusEnvironment(self.width, self.height)
-            start_time = clock()
         not_unsafe = []
-        for x in range(1,self.width+1):
-            for y in range(1,self.height+1):
+        with self.profiler.span('find_not_unsafe_locations') as span:
+            for (x,y) in self.query_locations():
                 query = expr(state_OK_str(x,y,self.time))
                 result = self.kb.ask(query)
                 if result != False:
@@ -296,19 +617,24 @@ class HybridWumpusAgent(Explorer):
                             display_env.add_thing(Proposition(query,'?'),(x,y))
                         else:
                             display_env.add_thing(Proposition(query,'T'),(x,y))
+            if self.local_axioms:
+                # nothing is known outside the frontier
+                frontier = set(self.frontier)
+                not_unsafe += [(x,y)
+                               for x in range(1,self.width+1)
+                               for y in range(1,self.height+1)
+                               if (x,y) not in frontier]
         if self.verbose:
-            end_time = clock()
             print "          >>> time elapsed while making not unsafe location queries:" \
-                  + " {0}".format(end_time-start_time)
+                  + " {0}".format(span.elapsed)
             print display_env.to_string(self.time, title="Not Unsafe Location queries")
             # print "Not Unsafe locations: {0}".format(not_unsafe)
         return not_unsafe
 
     def infer_and_set_belief_location(self):
-        if self.verbose: start_time = clock()
         self.belief_location = None
-        for x in range(1,self.width+1):
-            for y in range(1,self.height+1):
+        with self.profiler.span('infer_and_set_belief_location') as span:
+            for (x,y) in self.query_locations():
                 query = expr(state_loc_str(x,y,self.time))
                 result = self.kb.ask(query)
                 if result:
@@ -317,39 +643,49 @@ class HybridWumpusAgent(Explorer):
             if self.verbose:
                 print "        --> FAILED TO INFER belief location, assuming at initial location (entrance)."
             self.belief_location = self.initial_location
+        self.belief_loc_query_times.append(span.elapsed)
         if self.verbose:
-            end_time = clock()
             print "        Current believed location (inferred): {0}".format(self.belief_location)
             print "          >>> time elapsed while making current location queries:" \
-                  + " {0}".format(end_time-start_time)
-            self.belief_loc_query_times.append(end_time-start_time)
+                  + " {0}".format(span.elapsed)
 
     def infer_and_set_belief_heading(self):
         self.belief_heading = None
-        if self.verbose: start_time = clock()
-        if self.kb.ask(expr(state_heading_north_str(self.time))):
-            self.belief_heading = Explorer.heading_str_to_num['north']
-        elif self.kb.ask(expr(state_heading_west_str(self.time))):
-            self.belief_heading = Explorer.heading_str_to_num['west']
-        elif self.kb.ask(expr(state_heading_south_str(self.time))):
-            self.belief_heading = Explorer.heading_str_to_num['south']
-        elif self.kb.ask(expr(state_heading_east_str(self.time))):
-            self.belief_heading = Explorer.heading_str_to_num['east']
+        with self.profiler.span('infer_and_set_belief_heading') as span:
+            if self.kb.ask(expr(state_heading_north_str(self.time))):
+                self.belief_heading = Explorer.heading_str_to_num['north']
+            elif self.kb.ask(expr(state_heading_west_str(self.time))):
+                self.belief_heading = Explorer.heading_str_to_num['west']
+            elif self.kb.ask(expr(state_heading_south_str(self.time))):
+                self.belief_heading = Explorer.heading_str_to_num['south']
+            elif self.kb.ask(expr(state_heading_east_str(self.time))):
+                self.belief_heading = Explorer.heading_str_to_num['east']
 
-        else:
+        if self.belief_heading is None:
             print "        --> FAILED TO INFER belief heading, assuming initial heading."
             self.belief_heading = self.initial_heading
             
         if self.verbose:
-            end_time = clock()
             print "        Current inferred heading: {0}".format(self.heading_str(self.belief_heading))
             print "          >>> time elapsed while making belief heading queries:" \
-                  + "{0}".format(end_time-start_time)
-            
+                  + "{0}".format(span.elapsed)
+
+    def timed_plan(self, planner, goals, allowed):
+        """ Call planner (plan_route or plan_shot) from the believed state under a profiler span """
+        with self.profiler.span(planner.__name__) as span:
+            plan = planner(self.belief_location, self.belief_heading, goals, allowed)
+        if self.verbose:
+            print "          >>> time elapsed while executing {0}():".format(planner.__name__) \
+                  + " {0}".format(span.elapsed)
+        return plan
 
     def agent_program(self, percept):
         " Implementation of Hybrid-Wumpus-Agent of [Fig. 7.20], p.270 "
         if self.verbose: print "HWA.agent_program(): at time {0}".format(self.time)
+        self.profiler.start_step(self.time)
+        sat_calls = self.kb.sat_calls
+        clauses_removed = self.kb.clauses_removed()
+        planner_expansions = planner_stats['expansions']
         
         percept_sentence = self.make_percept_sentence(percept)
         if self.verbose:
@@ -365,16 +701,21 @@ class HybridWumpusAgent(Explorer):
         if self.verbose: print "     HWA.infer_and_set_belief_heading()"
         self.infer_and_set_belief_heading()
 
+        clauses_before = len(self.kb.clauses)
         if self.verbose:
-            clauses_before = len(self.kb.clauses)
             print "     HWA.agent_program(): Prepare to add temporal axioms"
             print "         Number of clauses in KB before: {0}".format(clauses_before)
         self.add_temporal_axioms()
+        clauses_after = len(self.kb.clauses)
         if self.verbose:
-            clauses_after = len(self.kb.clauses)
             print "         Number of clauses in KB after: {0}".format(clauses_after)
             print "         Total clauses added to KB: {0}".format(clauses_after - clauses_before)
-            self.number_of_clauses_over_epochs.append(len(self.kb.clauses))
+        self.number_of_clauses_over_epochs.append(clauses_after)
+        self.profiler.count('clauses_added', clauses_after - clauses_before)
+        if self.simplify_kb:
+            self.profiler.count('clauses_removed', self.kb.clauses_removed() - clauses_removed)
+            if self.verbose:
+                print "         {0}".format(self.kb.simplification_report())
 
         safe = None
 
@@ -382,15 +723,9 @@ class HybridWumpusAgent(Explorer):
         if self.kb.ask(percept_glitter_str(self.time)):
             if self.verbose: print "   HWA.agent_program(): Grab gold and leave!"
             safe = self.find_OK_locations()
-            if self.verbose: start_time = clock()
             self.plan = [action_grab_str(None)] \
-                        + plan_route(self.belief_location, self.belief_heading,
-                                     [self.initial_location], safe) \
+                        + self.timed_plan(plan_route, [self.initial_location], safe) \
                         + [action_climb_str(None)]
-            if self.verbose:
-                end_time = clock()
-                print "          >>> time elapsed while executing plan_route():" \
-                      + " {0}".format(end_time-start_time)
 
         # Update safe locations only if we don't have a plan
         if self.plan:
@@ -410,22 +745,12 @@ class HybridWumpusAgent(Explorer):
             if self.verbose:
                 self.display_locations_utility(safe_unvisited, prop=state_loc_str,
                                                title="Safe univisited locations:")
-                start_time = clock()
-            self.plan = plan_route(self.belief_location, self.belief_heading, safe_unvisited, safe)
-            if self.verbose:
-                end_time = clock()
-                print "          >>> time elapsed while executing plan_route():" \
-                      + " {0}".format(end_time-start_time)
+            self.plan = self.timed_plan(plan_route, safe_unvisited, safe)
         # Shoot wumpus to try to clear path
         if not self.plan and self.kb.ask(expr(state_have_arrow_str(self.time))):
             if self.verbose: print "   HWA.agent_program(): Plan to shoot wumpus..."
             possible_wumpus = self.find_possible_wumpus_locations()
-            if self.verbose: start_time = clock()
-            self.plan = plan_shot(self.belief_location, self.belief_heading, possible_wumpus, safe)
-            if self.verbose:
-                end_time = clock()
-                print "          >>> time elapsed while executing plan_shot():" \
-                      + " {0}".format(end_time-start_time)
+            self.plan = self.timed_plan(plan_shot, possible_wumpus, safe)
         # No safe choice, take risk with an unknown square
         if not self.plan:
             if self.verbose: print "   HWA.agent_program(): No safe choice, take risk..."
@@ -442,25 +767,14 @@ class HybridWumpusAgent(Explorer):
 
             # print "safe_and_not_unsafe_unvisited", safe_and_not_unsafe_unvisited
             
-            if self.verbose: start_time = clock()
-            self.plan = plan_route(self.belief_location, self.belief_heading, not_unsafe_unvisited,
-                                   safe_and_not_unsafe_unvisited)
-            if self.verbose:
-                end_time = clock()
-                print "          >>> time elapsed while executing plan_route():" \
-                      + " {0}".format(end_time-start_time)
+            self.plan = self.timed_plan(plan_route, not_unsafe_unvisited,
+                                        safe_and_not_unsafe_unvisited)
         # No choices left, leave!
         if not self.plan:
             if self.verbose:
                 print "   HWA.agent_program(): No choices left, leave!..."
-                start_time = clock()
-            self.plan = plan_route(self.belief_location, self.belief_heading,
-                                   self.initial_location, safe) \
+            self.plan = self.timed_plan(plan_route, self.initial_location, safe) \
                         + [action_climb_str(None)]
-            if self.verbose:
-                end_time = clock()
-                print "          >>> time elapsed while executing plan_route():" \
-                      + " {0}".format(end_time-start_time)
 
         if self.verbose: print "   HWA.agent_program(): Plan:\n    {0}".format(self.plan)
 
@@ -472,6 +786,11 @@ class HybridWumpusAgent(Explorer):
         self.kb.tell(add_time_stamp(action, self.time))
         if self.keep_axioms:
             self.kb.axioms.append(add_time_stamp(action, self.time))
+
+        self.profiler.count('clauses', len(self.kb.clauses))
+        self.profiler.count('sat_calls', self.kb.sat_calls - sat_calls)
+        self.profiler.count('planner_expansions', planner_stats['expansions'] - planner_expansions)
+        self.profiler.end_step()
         
         self.time += 1 # advance the agent's time
         return action
@@ -522,17 +841,281 @@ class QLearningWumpusAgent(QLearningAgent, Explorer):
         if percept[4]:
             self.wumpus_alive = False
         state = (self.location[0], self.location[1], self.heading, self.has_gold, self.wumpus_alive)
-        if self.previous_state != None and self.isTrainingDone == False:
-            self.update(state, self.previous_action)
-        self.previous_action = QLearningAgent.getAction(self, state, percept)
+        self.previous_action = self.learn_and_choose_action(state, percept)
         self.previous_state = state
         print self.previous_action
         # val = raw_input('Debug :')
         return self.previous_action
+
+    # learns from the transition into state (while training), then chooses
+    # the action to take in state
+    def learn_and_choose_action(self, state, percept):
+        if self.previous_state != None and self.isTrainingDone == False:
+            self.update(state, self.previous_action)
+        return QLearningAgent.getAction(self, state, percept)
     
     # updating q-values
-    def update(self, state, previous_action):
+    # done := True for the final transition of an episode (used by agents
+    #         that store transitions, e.g. ReplayQLearningWumpusAgent)
+    def update(self, state, previous_action, done=False):
         reward = self.performance_measure - self.previous_score
         self.previous_score = self.performance_measure
         # print 'update ' + str(self.previous_state) + ' ' + str(previous_action) + ' ' + str(state) + ' ' + str(reward)
         QLearningAgent.update(self, self.previous_state, previous_action, state, reward)
+
+#-------------------------------------------------------------------------------
+
+class ReplayQLearningWumpusAgent(QLearningWumpusAgent):
+    """
+    QLearningWumpusAgent that also learns from replayed experience: every
+    transition is stored in a replay buffer (see wumpus_replay) and each
+    step a minibatch of stored transitions is replayed through the Q update.
+    replay_capacity := number of transitions kept
+    batch_size := transitions replayed per step
+    prioritized := if True, replay transitions in proportion to their last
+                   TD error (PrioritizedReplayBuffer) instead of uniformly
+    """
+    def __init__(self, heading='east', environment=None, verbose=True, replay_capacity=10000,
+                 batch_size=8, prioritized=False, **args):
+        QLearningWumpusAgent.__init__(self, heading, environment, verbose, **args)
+        actions = self.getLegalActions(None)
+        if prioritized:
+            self.replay = wumpus_replay.PrioritizedReplayBuffer(replay_capacity, actions)
+        else:
+            self.replay = wumpus_replay.ReplayBuffer(replay_capacity, actions)
+        self.batch_size = batch_size
+
+    def update(self, state, previous_action, done=False):
+        reward = self.performance_measure - self.previous_score
+        self.previous_score = self.performance_measure
+        i = self.replay.add(self.previous_state, previous_action, reward, state, done)
+        self.replay.update_priorities([i], [self.td_update(i, 1.0)])
+        self.replay_batch()
+
+    def td_update(self, i, weight):
+        """
+        Q-learning update from the transition in replay slot i, scaled by
+        the importance-sampling weight; returns the TD error.
+        NOTE: like QLearningAgent.update, final transitions are bootstrapped
+              too (the done flag is stored but not used here): cutting them
+              off makes an early Climb look better than exploring, and the
+              agent then never finds the gold.
+        """
+        replay = self.replay
+        state = replay.states[i]
+        action = replay.actions[replay.action_ids[i]]
+        target = replay.rewards[i] \
+                 + self.discount * self.computeValueFromQValues(replay.next_states[i])
+        key = (state, action)
+        q = self.qValues[key]
+        td_error = target - q
+        self.qValues[key] = q + self.alpha * weight * td_error
+        return td_error
+
+    def replay_batch(self):
+        """ Replay a minibatch of stored transitions """
+        if len(self.replay) < self.batch_size:
+            return
+        indices, weights = self.replay.sample(self.batch_size, self.rng)
+        td_errors = [self.td_update(i, w) for i, w in zip(indices, weights)]
+        self.replay.update_priorities(indices, td_errors)
+
+#-------------------------------------------------------------------------------
+
+class ActorQLearningWumpusAgent(QLearningWumpusAgent):
+    """
+    Acting half of an actor/learner split (see wumpus_actor_learner): acts
+    epsilon-greedily on a read-only policy snapshot and records its
+    transitions instead of learning from them.
+    layout := wumpus_qtable.QTableLayout the snapshot is indexed by
+    Transitions are kept in self.transitions as
+    (state index, action index, reward, next state index, done).
+    """
+    def __init__(self, heading='east', environment=None, verbose=True, layout=None, **args):
+        QLearningWumpusAgent.__init__(self, heading, environment, verbose, **args)
+        self.layout = layout
+        self.policy = array('d', [0.0]) * layout.size
+        self.transitions = []
+
+    def set_policy(self, values):
+        """ Act on a new snapshot: flat Q-values indexed like self.layout """
+        self.policy = values
+
+    def getQValue(self, state, action):
+        i = self.layout.index((state, action))
+        if i < 0:
+            return 0.0
+        return self.policy[i]
+
+    def update(self, state, previous_action, done=False):
+        reward = self.performance_measure - self.previous_score
+        self.previous_score = self.performance_measure
+        layout = self.layout
+        self.transitions.append((layout.state_index(self.previous_state),
+                                 layout.action_index[previous_action], reward,
+                                 layout.state_index(state), done))
+
+#-------------------------------------------------------------------------------
+
+class DynaQWumpusAgent(QLearningWumpusAgent, DynaQAgent):
+    """
+    QLearningWumpusAgent with Dyna-Q planning (see qlearningAgents.DynaQAgent):
+    planning_steps simulated backups from the learned model per real step,
+    drawn uniformly or, with prioritized_sweeping, by pending TD error.
+    """
+    def __init__(self, heading='east', environment=None, verbose=True, planning_steps=10,
+                 prioritized_sweeping=False, **args):
+        QLearningWumpusAgent.__init__(self, heading, environment, verbose, **args)
+        self.initModel(planning_steps, prioritized_sweeping)
+
+    def update(self, state, previous_action, done=False):
+        reward = self.performance_measure - self.previous_score
+        self.previous_score = self.performance_measure
+        DynaQAgent.update(self, self.previous_state, previous_action, state, reward)
+
+#-------------------------------------------------------------------------------
+
+class QLambdaWumpusAgent(QLearningWumpusAgent, QLambdaAgent):
+    """
+    QLearningWumpusAgent with eligibility traces (see
+    qlearningAgents.QLambdaAgent): Watkins's Q(lambda), or SARSA(lambda)
+    with sarsa=True, in which case the next action is chosen before the
+    update.  Traces are cleared at the end of every episode.
+    """
+    def __init__(self, heading='east', environment=None, verbose=True, lambd=0.5,
+                 sarsa=False, **args):
+        QLearningWumpusAgent.__init__(self, heading, environment, verbose, **args)
+        self.initTraces(lambd, sarsa)
+
+    def reset(self):
+        QLearningWumpusAgent.reset(self)
+        self.clearTraces()
+
+    def learn_and_choose_action(self, state, percept):
+        learning = self.previous_state != None and self.isTrainingDone == False
+        if not self.sarsa:
+            if learning:
+                self.update(state, self.previous_action)
+            return QLambdaAgent.getAction(self, state, percept)
+        action = QLambdaAgent.getAction(self, state, percept)
+        if learning:
+            self.update(state, self.previous_action, next_action=action)
+        return action
+
+    def update(self, state, previous_action, done=False, next_action=None):
+        reward = self.performance_measure - self.previous_score
+        self.previous_score = self.performance_measure
+        QLambdaAgent.update(self, self.previous_state, previous_action, state, reward, next_action)
+        if done:
+            self.clearTraces()
+
+#-------------------------------------------------------------------------------
+
+class ApproximateQWumpusAgent(QLearningWumpusAgent, VectorizedApproximateQAgent):
+    """
+    QLearningWumpusAgent with a linear Q-function over state features (see
+    qlearningAgents.VectorizedApproximateQAgent) instead of a Q-table, for
+    grids too large to learn one.
+    extractor := name of a wumpus_features extractor ('state', 'percept' or
+                 'distance'); it is built on first use in each new
+                 environment, once the environment's objects are in place
+    """
+    def __init__(self, heading='east', environment=None, verbose=True,
+                 extractor='distance', **args):
+        self.extractor = extractor
+        self.featExtractor = None
+        self.featureCacheSize = 4
+        self.weights = array('d')
+        self.extractor_env = None
+        QLearningWumpusAgent.__init__(self, heading, environment, verbose, **args)
+
+    def getFeatureVector(self, state):
+        if self.extractor_env is not self.env:
+            self.useExtractor(wumpus_features.make_extractor(self.extractor, self.env),
+                              self.getLegalActions(None))
+            self.extractor_env = self.env
+        return VectorizedApproximateQAgent.getFeatureVector(self, state)
+
+    def update(self, state, previous_action, done=False):
+        reward = self.performance_measure - self.previous_score
+        self.previous_score = self.performance_measure
+        VectorizedApproximateQAgent.update(self, self.previous_state, previous_action, state, reward)
+
+    def q_table(self):
+        """ Dict of (state, action) -> Q-value over every state of the grid """
+        q_values = {}
+        actions = self.getLegalActions(None)
+        for x in range(1, self.width + 1):
+            for y in range(1, self.height + 1):
+                for heading in range(4):
+                    for has_gold in (True, False):
+                        for wumpus_alive in (True, False):
+                            state = (x, y, heading, has_gold, wumpus_alive)
+                            for action, q in zip(actions, self.getQValues(state)):
+                                q_values[(state, action)] = q
+        return q_values
+
+#-------------------------------------------------------------------------------
+
+class ModelBasedWumpusAgent(QLearningWumpusAgent):
+    """
+    QLearningWumpusAgent whose Q-values come from solving a tabular model
+    (see wumpus_mdp) by value iteration instead of from TD updates.
+    mdp := known WumpusMDP (e.g. WumpusMDP.from_world); solved once.
+           If None, the model is estimated from the agent's own transitions
+           and re-solved every solve_every episodes.
+    While training on an estimated model, (state, action) pairs tried fewer
+    than known_threshold times have the optimistic Q-value optimism, so the
+    greedy policy seeks them out (R-max style exploration).
+    """
+    def __init__(self, heading='east', environment=None, verbose=True, mdp=None,
+                 solve_every=10, known_threshold=1, optimism=1000.0, **args):
+        QLearningWumpusAgent.__init__(self, heading, environment, verbose, **args)
+        self.mdp = mdp
+        self.solve_every = solve_every
+        self.optimism = optimism
+        self.model = wumpus_mdp.TransitionCounts(known_threshold)
+        self.values = None
+        self.episodes = 0
+        if mdp is not None:
+            self.use_model(mdp)
+
+    def use_model(self, mdp):
+        """ Act on the known model mdp (and stop estimating one) """
+        self.mdp = mdp
+        self.solve(mdp)
+
+    def solve(self, mdp):
+        """ Value iteration on mdp; sets the agent's Q-values """
+        # warm-start from the previous solution while the model keeps its layout
+        values = self.values if self.values is not None and \
+                 len(self.values) == mdp.layout.num_states else None
+        self.values, q = mdp.value_iteration(self.discount, values=values,
+                                             unknown_value=self.optimism)
+        self.qValues = util.Counter(mdp.q_values(q))
+
+    def getQValue(self, state, action):
+        if self.mdp is None and not self.isTrainingDone \
+           and not self.model.known(state, action):
+            return self.optimism
+        return self.qValues[(state, action)]
+
+    def update(self, state, previous_action, done=False):
+        reward = self.performance_measure - self.previous_score
+        self.previous_score = self.performance_measure
+        if self.mdp is not None:
+            return
+        self.model.observe(self.previous_state, previous_action, reward, state, done)
+        # back up the pair just tried right away, so the greedy policy moves
+        # on to other untried actions before the next full solve
+        outcomes = self.model.outcomes(self.previous_state, previous_action)
+        if outcomes:
+            q = 0.0
+            for p, next_state, r, d in outcomes:
+                q += p * (r if d else r + self.discount * self.computeValueFromQValues(next_state))
+            self.qValues[(self.previous_state, previous_action)] = q
+        if done:
+            self.episodes += 1
+            if self.episodes % self.solve_every == 0:
+                self.solve(self.model.to_mdp(self.width, self.height,
+                                             self.getLegalActions(None)))
@@ -0,0 +1,433 @@
+# wumpus_cnf.py
+# -------------
+# Licensing Information:
+# Please DO NOT DISTRIBUTE OR PUBLISH solutions to this project.
+# You are free to use and extend these projects for EDUCATIONAL PURPOSES ONLY.
+# The Hunt The Wumpus AI project was developed at University of Arizona
+# by Clay Morrison (clayton@sista.arizona.edu), spring 2013.
+# This project extends the python code provided by Peter Norvig as part of
+# the Artificial Intelligence: A Modern Approach (AIMA) book example code;
+# see http://aima.cs.berkeley.edu/code.html
+# In particular, the following files come directly from the AIMA python
+# code: ['agents.py', 'logic.py', 'search.py', 'utils.py']
+# ('logic.py' has been modified by Clay Morrison in locations with the
+# comment 'CTM')
+# The file ['minisat.py'] implements a slim system call wrapper to the minisat
+# (see http://minisat.se) SAT solver, and is directly based on the satispy
+# python project, see https://github.com/netom/satispy .
+
+"""
+Direct-to-CNF axiom generators.
+
+The axiom generators of wumpus_kb return formula strings, which PropKB.tell
+parses and converts with to_cnf; distributing the at-location SSA's
+disjunction of conjunctions alone yields ~170 clauses. The generators here
+emit the same axioms already in CNF: lists of clauses, each a tuple of
+DIMACS-style literals (v for a proposition, -v for its negation) over the
+variables of a PropositionIndex.
+
+Where distributing would blow up, a disjunct of a definition gets an
+auxiliary Def<name>_<k> implying it (the one-sided, Plaisted-Greenbaum
+form of the Tseitin encoding). Cardinality constraints use the auxiliaries
+of wumpus_kb.generate_at_most_one_axioms. As every auxiliary belongs to a
+single axiom, the clauses have exactly the consequences of the wumpus_kb
+axioms over the original propositions (wumpus_cnf_test.py checks this).
+
+The generators mirror wumpus_kb: clause_generator_<x> for
+axiom_generator_<x>, and generate_<x>_clauses for generate_<x>_axioms.
+Each takes the PropositionIndex as its first argument.
+"""
+
+import itertools
+
+from logic import Expr
+from wumpus_kb import *
+
+
+class PropositionIndex(object):
+    """
+    Numbers propositions (by name, e.g. 'L1_1_0') as variables 1, 2, ...
+    in the order they are first seen, and converts clauses back to AIMA
+    expressions for PropKB.
+    """
+
+    def __init__(self):
+        self.numbers = {}
+        self.names = [None]
+        self.exprs = [None]
+        self.negated_exprs = [None]
+
+    def __len__(self):
+        return len(self.names) - 1
+
+    def var(self, name):
+        """ Variable of proposition name, numbering it if new """
+        v = self.numbers.get(name)
+        if v is None:
+            v = len(self.names)
+            self.numbers[name] = v
+            self.names.append(name)
+            symbol = Expr(name)
+            self.exprs.append(symbol)
+            self.negated_exprs.append(Expr('~', symbol))
+        return v
+
+    def name(self, literal):
+        """ Readable name of literal, e.g. '~P1_2' """
+        return self.names[literal] if literal > 0 else '~' + self.names[-literal]
+
+    def literal_expr(self, literal):
+        return self.exprs[literal] if literal > 0 else self.negated_exprs[-literal]
+
+    def clause_expr(self, clause):
+        """ AIMA expression of clause, in the form to_cnf produces """
+        if len(clause) == 1:
+            return self.literal_expr(clause[0])
+        return Expr('|', *[self.literal_expr(literal) for literal in clause])
+
+def normalize_clause(literals):
+    """ literals as a clause tuple without repeated literals, or None if a tautology """
+    seen = set()
+    clause = []
+    for literal in literals:
+        if -literal in seen:
+            return None
+        if literal not in seen:
+            seen.add(literal)
+            clause.append(literal)
+    return tuple(clause)
+
+def definition_clauses(index, head, terms, max_distributed=16):
+    """
+    Clauses of head <=> (term_1 | term_2 | ...), where each term is a list of
+    components conjoined, and each component a tuple of literals disjoined.
+    The direction term_k >> head distributes into short clauses. The direction
+    head >> (term_1 | ...) is distributed while that gives at most
+    max_distributed clauses; beyond that each term of several components gets
+    an auxiliary Def<head>_<k> that implies it.
+    head := variable of the defined proposition
+    """
+    clauses = []
+    for term in terms:
+        for choice in itertools.product(*term):
+            clauses.append((head,) + tuple(-literal for literal in choice))
+    distributed = 1
+    for term in terms:
+        distributed *= len(term)
+    if distributed <= max_distributed:
+        for choice in itertools.product(*terms):
+            clause = [-head]
+            for component in choice:
+                clause.extend(component)
+            clauses.append(clause)
+    else:
+        clause = [-head]
+        for k, term in enumerate(terms):
+            if len(term) == 1:
+                clause.extend(term[0])
+            else:
+                aux = index.var(definition_str(index.names[head], k + 1))
+                clause.append(aux)
+                for component in term:
+                    clauses.append((-aux,) + component)
+        clauses.append(clause)
+    return filter(None, map(normalize_clause, clauses))
+
+# -------------------------------------------------------------------------------
+# Clause Generator: Current Percept Sentence
+# -------------------------------------------------------------------------------
+
+def clause_generator_percept_sentence(index, t, tvec):
+    """
+    Unit clauses of the percepts at time t (see axiom_generator_percept_sentence)
+    tvec := (<stench>,<breeze>,<glitter>,<bump>,<scream>) booleans
+    """
+    percepts = [percept_stench_str(t), percept_breeze_str(t), percept_glitter_str(t),
+                percept_bump_str(t), percept_scream_str(t)]
+    return [(index.var(percept) if value else -index.var(percept),)
+            for percept, value in zip(percepts, tvec)]
+
+# -------------------------------------------------------------------------------
+# Clause Generators: Cardinality Encodings
+# -------------------------------------------------------------------------------
+
+def generate_at_most_one_clauses(index, props, name, encoding='pairwise', t=None):
+    """ generate_at_most_one_axioms as clauses; props := list of proposition names """
+    n = len(props)
+    v = [index.var(prop) for prop in props]
+    clauses = []
+    if encoding == 'pairwise':
+        for i in range(n):
+            for j in range(i + 1, n):
+                clauses.append((-v[i], -v[j]))
+    elif encoding == 'sequential':
+        if n < 2:
+            return []
+        cnt = [None] + [index.var(counter_str(name, i, t)) for i in range(1, n)]
+        clauses.append((-v[0], cnt[1]))
+        for i in range(1, n - 1):
+            clauses.append((-v[i], cnt[i + 1]))
+            clauses.append((-cnt[i], cnt[i + 1]))
+            clauses.append((-v[i], -cnt[i]))
+        clauses.append((-v[n - 1], -cnt[n - 1]))
+    elif encoding == 'bimander':
+        groups = (n + 1) // 2
+        bits = (groups - 1).bit_length() if groups > 1 else 0
+        bit = [index.var(bimander_str(name, j + 1, t)) for j in range(bits)]
+        for g in range(groups):
+            group = v[2 * g:2 * g + 2]
+            if len(group) == 2:
+                clauses.append((-group[0], -group[1]))
+            for literal in group:
+                for j in range(bits):
+                    clauses.append((-literal, bit[j] if g >> j & 1 else -bit[j]))
+    else:
+        raise ValueError("Unknown cardinality encoding: {0}".format(encoding))
+    return clauses
+
+def generate_exactly_one_clauses(index, props, name, encoding='pairwise', t=None):
+    """ generate_exactly_one_axioms as clauses """
+    n = len(props)
+    v = [index.var(prop) for prop in props]
+    if encoding == 'sequential' and n > 1:
+        cnt = [None] + [index.var(counter_str(name, i, t)) for i in range(1, n)]
+        clauses = [(-cnt[1], v[0])]
+        for i in range(1, n - 1):
+            clauses.append((-cnt[i + 1], cnt[i], v[i]))
+        clauses.append((cnt[n - 1], v[n - 1]))
+    else:
+        clauses = [tuple(v)]
+    return clauses + generate_at_most_one_clauses(index, props, name, encoding, t)
+
+# -------------------------------------------------------------------------------
+# Clause Generators: Initial Axioms
+# -------------------------------------------------------------------------------
+
+def clause_generator_initial_location_assertions(index, x, y):
+    return [(-index.var(pit_str(x, y)),), (-index.var(wumpus_str(x, y)),)]
+
+def neighborhood(x, y, xmin, xmax, ymin, ymax):
+    """ (x,y) and its neighbors inside the bounds, in the order of the wumpus_kb axioms """
+    locations = [(xvalue, yvalue)
+                 for (xvalue, yvalue) in [(x - 1, y), (x, y - 1), (x + 1, y), (x, y + 1)]
+                 if xmin <= xvalue <= xmax and ymin <= yvalue <= ymax]
+    return locations + [(x, y)]
+
+def clause_generator_pits_and_breezes(index, x, y, xmin, xmax, ymin, ymax):
+    breeze = index.var(breeze_str(x, y))
+    pits = tuple(index.var(pit_str(xvalue, yvalue))
+                 for (xvalue, yvalue) in neighborhood(x, y, xmin, xmax, ymin, ymax))
+    return [(-breeze,) + pits] + [(-pit, breeze) for pit in pits]
+
+def generate_pit_and_breeze_clauses(index, xmin, xmax, ymin, ymax):
+    clauses = []
+    for x in range(xmin, xmax + 1):
+        for y in range(ymin, ymax + 1):
+            clauses.extend(clause_generator_pits_and_breezes(index, x, y, xmin, xmax, ymin, ymax))
+    return clauses
+
+def clause_generator_wumpus_and_stench(index, x, y, xmin, xmax, ymin, ymax):
+    stench = index.var(stench_str(x, y))
+    wumpi = tuple(index.var(wumpus_str(xvalue, yvalue))
+                  for (xvalue, yvalue) in neighborhood(x, y, xmin, xmax, ymin, ymax))
+    return [(-stench,) + wumpi] + [(-wumpus, stench) for wumpus in wumpi]
+
+def generate_wumpus_and_stench_clauses(index, xmin, xmax, ymin, ymax):
+    clauses = []
+    for x in range(xmin, xmax + 1):
+        for y in range(ymin, ymax + 1):
+            clauses.extend(clause_generator_wumpus_and_stench(index, x, y, xmin, xmax, ymin, ymax))
+    return clauses
+
+def generate_exactly_one_wumpus_clauses(index, xmin, xmax, ymin, ymax, encoding='pairwise'):
+    wumpi = [wumpus_str(x, y) for x in range(xmin, xmax + 1) for y in range(ymin, ymax + 1)]
+    return generate_exactly_one_clauses(index, wumpi, 'W', encoding)
+
+def clause_generator_only_in_one_location(index, xi, yi, xmin, xmax, ymin, ymax, t=0):
+    return [(index.var(state_loc_str(x, y, t)) if (x, y) == (xi, yi)
+             else -index.var(state_loc_str(x, y, t)),)
+            for x in range(xmin, xmax + 1) for y in range(ymin, ymax + 1)]
+
+def clause_generator_only_one_heading(index, heading='north', t=0):
+    headings = [('north', state_heading_north_str(t)), ('south', state_heading_south_str(t)),
+                ('east', state_heading_east_str(t)), ('west', state_heading_west_str(t))]
+    return [(index.var(prop) if value == heading else -index.var(prop),)
+            for value, prop in headings]
+
+def clause_generator_have_arrow_and_wumpus_alive(index, t=0):
+    return [(index.var(state_have_arrow_str(t)),), (index.var(state_wumpus_alive_str(t)),)]
+
+def initial_wumpus_clauses(index, xi, yi, width, height, heading='east', encoding='pairwise'):
+    """ initial_wumpus_axioms as clauses """
+    clauses = clause_generator_initial_location_assertions(index, xi, yi)
+    clauses.extend(generate_pit_and_breeze_clauses(index, 1, width, 1, height))
+    clauses.extend(generate_wumpus_and_stench_clauses(index, 1, width, 1, height))
+    clauses.extend(generate_exactly_one_wumpus_clauses(index, 1, width, 1, height, encoding))
+    clauses.extend(clause_generator_only_in_one_location(index, xi, yi, 1, width, 1, height))
+    clauses.extend(clause_generator_only_one_heading(index, heading))
+    clauses.extend(clause_generator_have_arrow_and_wumpus_alive(index))
+    return clauses
+
+# -------------------------------------------------------------------------------
+# Frontier-local clauses (see wumpus_kb)
+# -------------------------------------------------------------------------------
+
+def initial_local_wumpus_clauses(index, xi, yi, width, height, heading='east', encoding='sequential'):
+    """ initial_local_wumpus_axioms as clauses """
+    clauses = clause_generator_initial_location_assertions(index, xi, yi)
+    clauses.extend(generate_exactly_one_wumpus_clauses(index, 1, width, 1, height, encoding))
+    clauses.extend(clause_generator_only_in_one_location(index, xi, yi, 1, width, 1, height))
+    clauses.extend(clause_generator_only_one_heading(index, heading))
+    clauses.extend(clause_generator_have_arrow_and_wumpus_alive(index))
+    return clauses
+
+def generate_local_atemporal_clauses(index, locations, xmin, xmax, ymin, ymax):
+    clauses = []
+    for (x, y) in locations:
+        clauses.extend(clause_generator_pits_and_breezes(index, x, y, xmin, xmax, ymin, ymax))
+        clauses.extend(clause_generator_wumpus_and_stench(index, x, y, xmin, xmax, ymin, ymax))
+    return clauses
+
+def generate_local_temporal_clauses(index, t, locations):
+    clauses = []
+    for (x, y) in locations:
+        clauses.extend(clause_generator_location_OK(index, x, y, t))
+    for (x, y) in locations:
+        clauses.extend(clause_generator_breeze_percept_and_location_property(index, x, y, t))
+        clauses.extend(clause_generator_stench_percept_and_location_property(index, x, y, t))
+    return clauses
+
+# -------------------------------------------------------------------------------
+# Clause Generators: Temporal Axioms (added at each time step)
+# -------------------------------------------------------------------------------
+
+def clause_generator_location_OK(index, x, y, t):
+    """ OKx_y_t <=> (~Px_y & (Wx_y >> ~WumpusAlive_t)) """
+    ok = index.var(state_OK_str(x, y, t))
+    pit = index.var(pit_str(x, y))
+    wumpus = index.var(wumpus_str(x, y))
+    alive = index.var(state_wumpus_alive_str(t))
+    return [(-ok, -pit), (-ok, -wumpus, -alive), (ok, pit, wumpus), (ok, pit, alive)]
+
+def generate_square_OK_clauses(index, t, xmin, xmax, ymin, ymax):
+    clauses = []
+    for x in range(xmin, xmax + 1):
+        for y in range(ymin, ymax + 1):
+            clauses.extend(clause_generator_location_OK(index, x, y, t))
+    return clauses
+
+def clause_generator_breeze_percept_and_location_property(index, x, y, t):
+    """ Lx_y_t >> (Breeze_t <=> Bx_y) """
+    location = index.var(state_loc_str(x, y, t))
+    percept = index.var(percept_breeze_str(t))
+    breeze = index.var(breeze_str(x, y))
+    return [(-location, -percept, breeze), (-location, percept, -breeze)]
+
+def generate_breeze_percept_and_location_clauses(index, t, xmin, xmax, ymin, ymax):
+    clauses = []
+    for x in range(xmin, xmax + 1):
+        for y in range(ymin, ymax + 1):
+            clauses.extend(clause_generator_breeze_percept_and_location_property(index, x, y, t))
+    return clauses
+
+def clause_generator_stench_percept_and_location_property(index, x, y, t):
+    """ Lx_y_t >> (Stench_t <=> Sx_y) """
+    location = index.var(state_loc_str(x, y, t))
+    percept = index.var(percept_stench_str(t))
+    stench = index.var(stench_str(x, y))
+    return [(-location, -percept, stench), (-location, percept, -stench)]
+
+def generate_stench_percept_and_location_clauses(index, t, xmin, xmax, ymin, ymax):
+    clauses = []
+    for x in range(xmin, xmax + 1):
+        for y in range(ymin, ymax + 1):
+            clauses.extend(clause_generator_stench_percept_and_location_property(index, x, y, t))
+    return clauses
+
+# ----------------------------------
+# Successor-State Axioms
+
+def clause_generator_at_location_ssa(index, t, x, y, xmin, xmax, ymin, ymax):
+    """
+    axiom_generator_at_location_ssa as clauses: its disjuncts (stay in x,y;
+    move forward into it from each neighbor) each get a definition auxiliary,
+    so ~25 clauses rather than ~170.
+    """
+    forward = index.var(action_forward_str(t))
+    stay = [(index.var(state_loc_str(x, y, t)),),
+            (-forward, index.var(action_shoot_str(t)), index.var(action_grab_str(t)),
+             index.var(action_turn_left_str(t)), index.var(action_turn_right_str(t)),
+             index.var(percept_bump_str(t + 1)))]
+    terms = [stay]
+    heading_strings = [state_heading_east_str(t), state_heading_north_str(t),
+                       state_heading_west_str(t), state_heading_south_str(t)]
+    for i, (xvalue, yvalue) in enumerate([(x - 1, y), (x, y - 1), (x + 1, y), (x, y + 1)]):
+        if xmin <= xvalue <= xmax and ymin <= yvalue <= ymax:
+            terms.append([(index.var(state_loc_str(xvalue, yvalue, t)),),
+                          (index.var(heading_strings[i]),), (forward,)])
+    return definition_clauses(index, index.var(state_loc_str(x, y, t + 1)), terms)
+
+def generate_at_location_ssa_clauses(index, t, x, y, xmin, xmax, ymin, ymax, heading):
+    """ generate_at_location_ssa as clauses: current and facing location only """
+    clauses = clause_generator_at_location_ssa(index, t, x, y, xmin, xmax, ymin, ymax)
+    dx, dy = {'west': (-1, 0), 'east': (1, 0), 'south': (0, -1), 'north': (0, 1)}[heading]
+    if xmin <= x + dx <= xmax and ymin <= y + dy <= ymax:
+        clauses.extend(clause_generator_at_location_ssa(index, t, x + dx, y + dy,
+                                                        xmin, xmax, ymin, ymax))
+    return clauses
+
+def clause_generator_have_arrow_ssa(index, t):
+    """ HaveArrow_t+1 <=> (HaveArrow_t & ~Shoot_t) """
+    return definition_clauses(index, index.var(state_have_arrow_str(t + 1)),
+                              [[(index.var(state_have_arrow_str(t)),),
+                                (-index.var(action_shoot_str(t)),)]])
+
+def clause_generator_wumpus_alive_ssa(index, t):
+    """ WumpusAlive_t+1 <=> (WumpusAlive_t & ~Scream_t+1) """
+    return definition_clauses(index, index.var(state_wumpus_alive_str(t + 1)),
+                              [[(index.var(state_wumpus_alive_str(t)),),
+                                (-index.var(percept_scream_str(t + 1)),)]])
+
+def clause_generator_heading_ssa(index, t, heading, left_of, right_of):
+    """
+    Heading_t+1 <=> (Heading_t & (Forward_t | Grab_t | Wait_t | Shoot_t | Bump_t+1))
+                     | (right_of_t & TurnLeft_t) | (left_of_t & TurnRight_t)
+    heading, left_of, right_of := state_heading_<x>_str functions
+    """
+    keep = (index.var(action_forward_str(t)), index.var(action_grab_str(t)),
+            index.var(action_wait_str(t)), index.var(action_shoot_str(t)),
+            index.var(percept_bump_str(t + 1)))
+    return definition_clauses(index, index.var(heading(t + 1)),
+                              [[(index.var(heading(t)),), keep],
+                               [(index.var(right_of(t)),), (index.var(action_turn_left_str(t)),)],
+                               [(index.var(left_of(t)),), (index.var(action_turn_right_str(t)),)]])
+
+def generate_heading_ssa_clauses(index, t):
+    return (clause_generator_heading_ssa(index, t, state_heading_north_str,
+                                         state_heading_west_str, state_heading_east_str)
+            + clause_generator_heading_ssa(index, t, state_heading_east_str,
+                                           state_heading_north_str, state_heading_south_str)
+            + clause_generator_heading_ssa(index, t, state_heading_south_str,
+                                           state_heading_east_str, state_heading_west_str)
+            + clause_generator_heading_ssa(index, t, state_heading_west_str,
+                                           state_heading_south_str, state_heading_north_str))
+
+def generate_non_location_ssa_clauses(index, t):
+    return (clause_generator_have_arrow_ssa(index, t)
+            + clause_generator_wumpus_alive_ssa(index, t)
+            + generate_heading_ssa_clauses(index, t))
+
+# ----------------------------------
+
+def generate_mutually_exclusive_clauses(index, t, encoding='pairwise'):
+    """
+    generate_mutually_exclusive_axioms as clauses: exactly one heading at t+1
+    and exactly one action at t ('pairwise' is the CNF of the heading_only and
+    only_one_action biconditionals)
+    """
+    headings = [state_heading_north_str(t + 1), state_heading_east_str(t + 1),
+                state_heading_south_str(t + 1), state_heading_west_str(t + 1)]
+    actions = [action_forward_str(t), action_grab_str(t), action_shoot_str(t), action_climb_str(t),
+               action_turn_left_str(t), action_turn_right_str(t), action_wait_str(t)]
+    return (generate_exactly_one_clauses(index, headings, 'Heading', encoding, t + 1)
+            + generate_exactly_one_clauses(index, actions, 'Action', encoding, t))
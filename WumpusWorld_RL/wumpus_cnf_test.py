@@ -0,0 +1,241 @@
+from wumpus_cnf import *
+from wumpus_agent import PropKB_SAT
+from logic import expr, to_cnf, conjuncts, disjuncts, prop_symbols_from_clause_list
+from distutils.spawn import find_executable
+import random
+
+AUXILIARY_PREFIXES = ('Def', 'Cnt', 'Bit')
+
+
+def expr_clauses(index, sentences):
+    """ to_cnf of wumpus_kb axiom strings, as clauses over index """
+    clauses = []
+    for sentence in sentences:
+        for clause in conjuncts(to_cnf(expr(sentence))):
+            clauses.append(tuple(-index.var(literal.args[0].op) if literal.op == '~'
+                                 else index.var(literal.op)
+                                 for literal in disjuncts(clause)))
+    return clauses
+
+def satisfiable(clauses, assignment):
+    """ Small DPLL: can assignment (dict var -> bool) be extended to satisfy clauses? """
+    assignment = dict(assignment)
+    while True:
+        unit = None
+        open_clauses = []
+        for clause in clauses:
+            undecided = []
+            for literal in clause:
+                value = assignment.get(abs(literal))
+                if value is None:
+                    undecided.append(literal)
+                elif value == (literal > 0):
+                    break
+            else:
+                if not undecided:
+                    return False
+                if len(undecided) == 1:
+                    unit = undecided[0]
+                open_clauses.append(undecided)
+        if not open_clauses:
+            return True
+        if unit is None:
+            break
+        assignment[abs(unit)] = unit > 0
+    v = abs(open_clauses[0][0])
+    for value in (True, False):
+        extended = dict(assignment)
+        extended[v] = value
+        if satisfiable(open_clauses, extended):
+            return True
+    return False
+
+def count_mismatches(index, reference, clauses, samples=2000, rng=None):
+    """
+    Number of assignments to the propositions of the reference clauses on
+    which they disagree with 'the auxiliaries can be set to satisfy clauses':
+    all 2**n assignments for n <= 14 propositions, else samples random ones
+    (each with its own density of True values).
+    Returns (mismatches, assignments checked, auxiliaries).
+    """
+    variables = sorted(set(abs(literal) for clause in reference for literal in clause))
+    auxiliaries = set(abs(literal) for clause in clauses for literal in clause) - set(variables)
+    for v in auxiliaries:
+        assert index.names[v].startswith(AUXILIARY_PREFIXES), index.names[v]
+    n = len(variables)
+    if n <= 14:
+        assignments = [[bool(i >> k & 1) for k in range(n)] for i in range(2 ** n)]
+    else:
+        rng = rng or random.Random(0)
+        assignments = []
+        for i in range(samples):
+            p = rng.random()
+            assignments.append([rng.random() < p for k in range(n)])
+    mismatches = 0
+    for values in assignments:
+        assignment = dict(zip(variables, values))
+        expected = all(any(assignment[abs(literal)] == (literal > 0) for literal in clause)
+                       for clause in reference)
+        if satisfiable(clauses, assignment) != expected:
+            mismatches += 1
+    return mismatches, len(assignments), len(auxiliaries)
+
+def check(name, sentences, generate):
+    """ Compare the wumpus_kb axioms with the clauses of the same axioms """
+    index = PropositionIndex()
+    reference = expr_clauses(index, sentences)
+    clauses = generate(index)
+    mismatches, checked, auxiliaries = count_mismatches(index, reference, clauses)
+    print '    {0:52} to_cnf clauses {1:4}  clauses {2:3}  auxiliaries {3:2}  ' \
+          'checked {4:5}  mismatches {5}'.format(name, len(reference), len(clauses),
+                                                 auxiliaries, checked, mismatches)
+    return mismatches
+
+def test_clause_generators(sizes=((2, 1), (2, 2), (3, 2), (3, 3), (4, 4)), t=3):
+    mismatches = 0
+    for (width, height) in sizes:
+        print '\n{0}x{1} world, t={2}:'.format(width, height, t)
+        cells = [(x, y) for x in range(1, width + 1) for y in range(1, height + 1)]
+        for (x, y) in cells:
+            mismatches += check('pits_and_breezes({0}, {1})'.format(x, y),
+                                [axiom_generator_pits_and_breezes(x, y, 1, width, 1, height)],
+                                lambda index: clause_generator_pits_and_breezes(
+                                    index, x, y, 1, width, 1, height))
+            mismatches += check('wumpus_and_stench({0}, {1})'.format(x, y),
+                                [axiom_generator_wumpus_and_stench(x, y, 1, width, 1, height)],
+                                lambda index: clause_generator_wumpus_and_stench(
+                                    index, x, y, 1, width, 1, height))
+            mismatches += check('location_OK({0}, {1})'.format(x, y),
+                                [axiom_generator_location_OK(x, y, t)],
+                                lambda index: clause_generator_location_OK(index, x, y, t))
+            mismatches += check('breeze/stench_percept_and_location({0}, {1})'.format(x, y),
+                                [axiom_generator_breeze_percept_and_location_property(x, y, t),
+                                 axiom_generator_stench_percept_and_location_property(x, y, t)],
+                                lambda index: clause_generator_breeze_percept_and_location_property(
+                                    index, x, y, t)
+                                + clause_generator_stench_percept_and_location_property(
+                                    index, x, y, t))
+            mismatches += check('at_location_ssa({0}, {1})'.format(x, y),
+                                [axiom_generator_at_location_ssa(t, x, y, 1, width, 1, height)],
+                                lambda index: clause_generator_at_location_ssa(
+                                    index, t, x, y, 1, width, 1, height))
+        for (x, y) in cells[:2]:
+            mismatches += check('only_in_one_location({0}, {1})'.format(x, y),
+                                [axiom_generator_only_in_one_location(x, y, 1, width, 1, height, t)],
+                                lambda index: clause_generator_only_in_one_location(
+                                    index, x, y, 1, width, 1, height, t))
+        for encoding in CARDINALITY_ENCODINGS:
+            mismatches += check('exactly_one_wumpus({0})'.format(encoding),
+                                [axiom_generator_at_least_one_wumpus(1, width, 1, height),
+                                 axiom_generator_at_most_one_wumpus(1, width, 1, height)],
+                                lambda index: generate_exactly_one_wumpus_clauses(
+                                    index, 1, width, 1, height, encoding))
+
+    print '\natemporal and time {0} axioms:'.format(t)
+    for tvec in [(True, False, True, False, False), (False, True, False, True, True)]:
+        mismatches += check('percept_sentence{0}'.format(tvec),
+                            [axiom_generator_percept_sentence(t, tvec)],
+                            lambda index: clause_generator_percept_sentence(index, t, tvec))
+    mismatches += check('initial_location_assertions(2, 3)',
+                        [axiom_generator_initial_location_assertions(2, 3)],
+                        lambda index: clause_generator_initial_location_assertions(index, 2, 3))
+    for heading in ['north', 'east', 'south', 'west']:
+        mismatches += check('only_one_heading({0})'.format(heading),
+                            [axiom_generator_only_one_heading(heading, t)],
+                            lambda index: clause_generator_only_one_heading(index, heading, t))
+    mismatches += check('have_arrow_and_wumpus_alive',
+                        [axiom_generator_have_arrow_and_wumpus_alive(t)],
+                        lambda index: clause_generator_have_arrow_and_wumpus_alive(index, t))
+    mismatches += check('have_arrow_ssa', [axiom_generator_have_arrow_ssa(t)],
+                        lambda index: clause_generator_have_arrow_ssa(index, t))
+    mismatches += check('wumpus_alive_ssa', [axiom_generator_wumpus_alive_ssa(t)],
+                        lambda index: clause_generator_wumpus_alive_ssa(index, t))
+    mismatches += check('heading_ssa', generate_heading_ssa(t),
+                        lambda index: generate_heading_ssa_clauses(index, t))
+    for encoding in CARDINALITY_ENCODINGS:
+        mismatches += check('mutually_exclusive({0})'.format(encoding),
+                            generate_mutually_exclusive_axioms(t),
+                            lambda index: generate_mutually_exclusive_clauses(index, t, encoding))
+    print '\ntotal mismatches:', mismatches
+    return mismatches
+
+def test_kb_consequences(width=3, height=3, steps=2):
+    """
+    Tell a PropKB_SAT the wumpus_kb axioms and another the clauses of the
+    same axioms, for a few time steps; both must answer every query alike.
+    """
+    if find_executable('minisat') is None:
+        print '\nKB consequences: skipped (minisat executable not found)'
+        return 0
+    axioms = initial_wumpus_axioms(1, 1, width, height, 'north')
+    clause_kb = PropKB_SAT()
+    clause_kb.tell_clauses(initial_wumpus_clauses(clause_kb.index, 1, 1, width, height, 'north'))
+    percepts = [(False, True, False, False, False), (True, False, False, False, False)]
+    actions = ['Forward', 'TurnLeft']
+    for t in range(steps):
+        axioms += [axiom_generator_percept_sentence(t, percepts[t % 2])]
+        axioms += generate_square_OK_axioms(t, 1, width, 1, height)
+        axioms += generate_breeze_percept_and_location_axioms(t, 1, width, 1, height)
+        axioms += generate_stench_percept_and_location_axioms(t, 1, width, 1, height)
+        axioms += generate_at_location_ssa(t, 1, 1 + t, 1, width, 1, height, 'north')
+        axioms += generate_non_location_ssa(t)
+        axioms += generate_mutually_exclusive_axioms(t)
+        axioms += [add_time_stamp(actions[t % 2], t)]
+        index = clause_kb.index
+        clause_kb.tell_clauses(clause_generator_percept_sentence(index, t, percepts[t % 2])
+                               + generate_square_OK_clauses(index, t, 1, width, 1, height)
+                               + generate_breeze_percept_and_location_clauses(index, t, 1, width, 1, height)
+                               + generate_stench_percept_and_location_clauses(index, t, 1, width, 1, height)
+                               + generate_at_location_ssa_clauses(index, t, 1, 1 + t, 1, width, 1, height,
+                                                                  'north')
+                               + generate_non_location_ssa_clauses(index, t)
+                               + generate_mutually_exclusive_clauses(index, t))
+        clause_kb.tell(add_time_stamp(actions[t % 2], t))
+    kb = PropKB_SAT()
+    for sentence in axioms:
+        kb.tell(sentence)
+    queries = sorted(set(str(symbol) for symbol in prop_symbols_from_clause_list(kb.clauses)))
+    differences = [query for query in queries if kb.ask(query) != clause_kb.ask(query)]
+    print '\nKB consequences ({0}x{1}, {2} steps): to_cnf clauses {3}, clauses {4},' \
+          ' queries {5}, differences {6}'.format(width, height, steps, len(kb.clauses),
+                                                 len(clause_kb.clauses), len(queries),
+                                                 len(differences))
+    for query in differences:
+        print '    {0}: {1} != {2}'.format(query, kb.ask(query), clause_kb.ask(query))
+    return len(differences)
+
+def implies(clauses, clause):
+    """ Do clauses entail clause? (the assignment falsifying it cannot be extended) """
+    return not satisfiable(clauses, dict((abs(literal), literal < 0) for literal in clause))
+
+def test_kb_simplification(width=2, height=2, t=1):
+    """
+    Tell a PropKB_SAT(simplify=True) the clauses of a few time steps, the
+    percepts included; what is left must entail each clause told, and
+    each clause left must be entailed by them
+    """
+    index = PropositionIndex()
+    clauses = initial_wumpus_clauses(index, 1, 1, width, height, 'north')
+    clauses += clause_generator_percept_sentence(index, 0, (False, True, False, False, False))
+    clauses += [(index.var(add_time_stamp('Forward', 0)),)]
+    for step in range(t):
+        clauses += generate_square_OK_clauses(index, step, 1, width, 1, height)
+        clauses += generate_breeze_percept_and_location_clauses(index, step, 1, width, 1, height)
+        clauses += generate_stench_percept_and_location_clauses(index, step, 1, width, 1, height)
+        clauses += generate_at_location_ssa_clauses(index, step, 1, 1, 1, width, 1, height, 'north')
+        clauses += generate_non_location_ssa_clauses(index, step)
+        clauses += generate_mutually_exclusive_clauses(index, step)
+    kb = PropKB_SAT(simplify=True)
+    kb.index = index
+    kb.tell_clauses(clauses)
+    simplified = [tuple(entry[0]) for entry in kb.clause_table if entry is not None]
+    mismatches = len([clause for clause in clauses if not implies(simplified, clause)]) \
+                 + len([clause for clause in simplified if not implies(clauses, clause)])
+    print '\nKB simplification ({0}x{1}, {2} steps): clauses {3}, simplified {4},' \
+          ' mismatches {5}'.format(width, height, t, len(clauses), len(simplified), mismatches)
+    print '    {0}'.format(kb.simplification_report())
+    return mismatches
+
+test_clause_generators()
+test_kb_consequences()
+test_kb_simplification()
@@ -20,6 +20,13 @@ from utils import *
 import agents
 import sys
 import random
+import wumpus_rng
+
+# percept bits, packed as stench | breeze | glitter | bump | scream
+PERCEPT_STENCH, PERCEPT_BREEZE, PERCEPT_GLITTER, PERCEPT_BUMP, PERCEPT_SCREAM = 1, 2, 4, 8, 16
+
+# percept vector of each packed percept: percepts are shared, not rebuilt
+PERCEPT_VECTORS = [ tuple(bool(bits & (1 << i)) for i in range(5)) for bits in range(32) ]
 
 class Wumpus(agents.Thing):
 
@@ -109,6 +116,11 @@ class Explorer(agents.Agent):
         # self.belief_heading is the heading the agent believes it has
         self.belief_heading = self.initial_heading
         self.time = 0
+        # done: climbed out, stopped, or killed; the agent no longer acts
+        self.done = False
+        # PERCEPT_* bits of events heard by every agent (e.g., a scream),
+        # until the next percept
+        self.percept_events = 0
 
     def heading_str(self, heading):
         """Overkill!  But once I got started, I couldn't stop making it safe...
@@ -236,10 +248,20 @@ class WumpusEnvironment(agents.XYEnvironment):
         anything outside, 0 and {width+1 or height+1} becomes a wall """
         super(WumpusEnvironment, self).__init__(width + 1, height + 1)
         self.entrance = entrance
+        # Percept grid over locations (0..width+1, 0..height+1), location
+        # (x,y) at x*grid_stride + y: the stench, breeze and glitter
+        # PERCEPT_* bits, kept up to date as wumpi, pits and gold are added,
+        # moved and deleted, from counts of the things causing each percept.
+        self.grid_stride = height + 2
+        grid_size = (width + 2) * self.grid_stride
+        self.percept_grid = bytearray(grid_size)
+        self.stench_count = bytearray(grid_size)
+        self.breeze_count = bytearray(grid_size)
+        self.gold_count = bytearray(grid_size)
         self.add_walls()
         self.time_step = 0
         self.done = False
-        self.global_percept_events = []
+        self.verbose = True
 
     def thing_classes(self):
         return [agents.Wall,
@@ -252,26 +274,89 @@ class WumpusEnvironment(agents.XYEnvironment):
     def exogenous_change(self):
         """ Handle special outcomes """
         for agent in self.agents:
+            if agent.done:
+                continue
             colocated_wumpi = [ wumpus.is_alive()
                                 for wumpus in self.list_things_at(agent.location,
                                                                   tclass=Wumpus) ]
             colocated_pit = self.list_things_at(agent.location, tclass=Pit)
             if any(colocated_wumpi):
-                print 'A Wumpus ate {0}!'.format(agent)
+                if self.verbose:
+                    print 'A Wumpus ate {0}!'.format(agent)
                 agent.performance_measure -= 1000
-                self.done = True
+                self.agent_done(agent)
             elif colocated_pit:
-                print '{0} fell into a bottomless pit!'.format(agent)
+                if self.verbose:
+                    print '{0} fell into a bottomless pit!'.format(agent)
                 agent.performance_measure -= 1000
-                self.done = True
+                self.agent_done(agent)
+
+    def agent_done(self, agent):
+        """ Take agent out of play; the world is done once all agents are """
+        agent.done = True
+        if all(a.done for a in self.agents):
+            self.done = True
 
     def is_done(self):
         return self.done or not any((agent.is_alive() for agent in self.agents))
 
     def step(self):
-        super(WumpusEnvironment, self).step()
+        """ Like Environment.step, but only agents still in play act """
+        if not self.is_done():
+            active = [ agent for agent in self.agents if not agent.done ]
+            actions = [ agent.program(self.percept(agent)) for agent in active ]
+            for agent, action in zip(active, actions):
+                self.execute_action(agent, action)
+
+            self.exogenous_change()
         self.time_step += 1
 
+    def broadcast(self, event):
+        """ Add event (PERCEPT_* bit) to the next percept of every agent """
+        for agent in self.agents:
+            agent.percept_events |= event
+
+    def add_thing(self, thing, location = (1, 1)):
+        super(WumpusEnvironment, self).add_thing(thing, location)
+        if isinstance(thing, agents.Thing):
+            self.update_percept_grid(thing, thing.location, 1)
+
+    def delete_thing(self, thing):
+        present = thing in self.things
+        super(WumpusEnvironment, self).delete_thing(thing)
+        if present:
+            self.update_percept_grid(thing, thing.location, -1)
+
+    def move_to(self, thing, destination):
+        location = thing.location
+        super(WumpusEnvironment, self).move_to(thing, destination)
+        if thing.location != location:
+            self.update_percept_grid(thing, location, -1)
+            self.update_percept_grid(thing, thing.location, 1)
+
+    def update_percept_grid(self, thing, location, delta):
+        """ Count thing at location in (delta=1) or out of (delta=-1) the percept grid.
+        A wumpus, dead or alive, smells in its own and the adjacent locations;
+        a pit causes a breeze in the same locations; gold glitters in its own. """
+        if isinstance(thing, Wumpus):
+            counts, near = self.stench_count, True
+        elif isinstance(thing, Pit):
+            counts, near = self.breeze_count, True
+        elif isinstance(thing, Gold):
+            counts, near = self.gold_count, False
+        else:
+            return
+        x, y = location
+        stride = self.grid_stride
+        locations = [(x, y), (x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)] if near else [(x, y)]
+        for (x, y) in locations:
+            if 0 <= x <= self.width and 0 <= y <= self.height:
+                c = x * stride + y
+                counts[c] += delta
+                self.percept_grid[c] = ((PERCEPT_STENCH if self.stench_count[c] else 0)
+                                        | (PERCEPT_BREEZE if self.breeze_count[c] else 0)
+                                        | (PERCEPT_GLITTER if self.gold_count[c] else 0))
+
     def turn_heading(self, heading, inc):
         """ Return the heading to the left (inc=+1) or right (inc=-1) of heading.
         Only 4 directions, so mod(heading+inc,4) """
@@ -290,22 +375,21 @@ class WumpusEnvironment(agents.XYEnvironment):
             v = (1, 0)
         return v
 
-    def percept(self, agent):
-        """ Each percept is a list beginning with the time_step (integer) """
-        percepts = [self.time_step]
-        for thing in self.things_near(agent.location):
-            if isinstance(thing, Gold):
-                if agent.location == thing.location:
-                    percepts.append('Gold')
-            else:
-                percepts.append(self.thing_percept(thing, agent))
-
+    def percept_bits(self, agent):
+        """ The agent's percept packed into PERCEPT_* bits: a lookup in the
+        percept grid plus the agent's pending bump and events """
+        x, y = agent.location
+        bits = self.percept_grid[x * self.grid_stride + y] | agent.percept_events
         if agent.bump:
-            percepts.append('Bump')
-        percepts += self.global_percept_events
+            bits |= PERCEPT_BUMP
         agent.bump = False
-        self.global_percept_events = []
-        return agent.raw_percepts_to_percept_vector(percepts)
+        agent.percept_events = 0
+        return bits
+
+    def percept(self, agent):
+        """ Percept vector (<Stench?>, <Breeze?>, <Glitter?>, <Bump?>, <Scream?>),
+        a tuple shared by all percepts with the same bits (see PERCEPT_VECTORS) """
+        return PERCEPT_VECTORS[self.percept_bits(agent)]
 
     def execute_action(self, agent, action):
         """ Execute action taken by agent """
@@ -334,14 +418,14 @@ class WumpusEnvironment(agents.XYEnvironment):
             if agent.location == self.entrance:
                 if agent.has_gold:
                     agent.performance_measure += 1000
-                self.done = True
+                self.agent_done(agent)
         elif action == 'Shoot':
             if agent.has_arrow:
                 agent.has_arrow = False
                 agent.performance_measure -= 10
                 self.shoot_arrow(agent)
         elif action == 'Stop':
-            self.done = True
+            self.agent_done(agent)
 
     def shoot_arrow(self, agent):
         dvec = self.heading_to_vector(agent.heading)
@@ -352,7 +436,7 @@ class WumpusEnvironment(agents.XYEnvironment):
                 try:
                     poor_wumpus = self.list_things_at(aloc, tclass=Wumpus)[0]
                     poor_wumpus.alive = False
-                    self.global_percept_events.append('Scream')
+                    self.broadcast(PERCEPT_SCREAM)
                 except:
                     print "Error: Wumpus should be here, but couldn't find it!"
                     print 'All things:', aloc, self.list_things_at(aloc)
@@ -448,8 +532,14 @@ class WumpusEnvironment(agents.XYEnvironment):
 
 # stochastic environment
 class WumpusQLearningEnvironment(WumpusEnvironment):
-    def __init__(self, width = 4, height = 4, entrance = (1, 1), forwardStochasticOutcome = (0.1,0.8,0.1)):
+    """
+    rng := random.Random drawing the Forward outcomes (see wumpus_rng.stream);
+           by default a stream seeded from the global random module
+    """
+    def __init__(self, width = 4, height = 4, entrance = (1, 1), forwardStochasticOutcome = (0.1,0.8,0.1),
+                 rng = None):
         self.forwardStochasticOutcome = forwardStochasticOutcome
+        self.rng = rng if rng is not None else wumpus_rng.stream()
         super(WumpusQLearningEnvironment, self).__init__(width, height, entrance)
 
     def execute_action(self, agent, action):
@@ -461,7 +551,7 @@ class WumpusQLearningEnvironment(WumpusEnvironment):
         elif action == 'TurnLeft':
             agent.heading = self.turn_heading(agent.heading, +1)
         elif action == 'Forward': # stochasticity
-            r = random.random()
+            r = self.rng.random()
             if r <= self.forwardStochasticOutcome[0]: # left
                 self.move_to(agent, vector_add(self.heading_to_vector((agent.heading + 1)%4),
                                            agent.location))
@@ -488,11 +578,11 @@ class WumpusQLearningEnvironment(WumpusEnvironment):
             if agent.location == self.entrance:
                 if agent.has_gold:
                     agent.performance_measure += 1000
-                self.done = True
+                self.agent_done(agent)
         elif action == 'Shoot':
             if agent.has_arrow:
                 agent.has_arrow = False
                 agent.performance_measure -= 10
                 self.shoot_arrow(agent)
         elif action == 'Stop':
-            self.done = True
\ No newline at end of file
+            self.agent_done(agent)
\ No newline at end of file
@@ -0,0 +1,261 @@
+# wumpus_features.py
+# ------------------
+# Licensing Information:
+# Please DO NOT DISTRIBUTE OR PUBLISH solutions to this project.
+# You are free to use and extend these projects for EDUCATIONAL PURPOSES ONLY.
+# The Hunt The Wumpus AI project was developed at University of Arizona
+# by Clay Morrison (clayton@sista.arizona.edu), spring 2013.
+# This project extends the python code provided by Peter Norvig as part of
+# the Artificial Intelligence: A Modern Approach (AIMA) book example code;
+# see http://aima.cs.berkeley.edu/code.html
+# In particular, the following files come directly from the AIMA python
+# code: ['agents.py', 'logic.py', 'search.py', 'utils.py']
+# ('logic.py' has been modified by Clay Morrison in locations with the
+# comment 'CTM')
+# The file ['minisat.py'] implements a slim system call wrapper to the minisat
+# (see http://minisat.se) SAT solver, and is directly based on the satispy
+# python project, see https://github.com/netom/satispy .
+
+"""
+Feature extractors for approximate Q learning in the wumpus world (see
+ApproximateQWumpusAgent), over the state (x, y, heading, has_gold,
+wumpus_alive).
+
+Features come from per-layout maps (WumpusMaps), computed once per layout
+by breadth-first search over the grid with headings (wumpus_grid_search)
+and cached, so extracting the features of a state is a handful of O(1)
+array lookups whatever the size of the grid:
+    - action distance (Forward and turns) from every (x, y, heading) to
+      the gold and to the entrance, avoiding pits (and the wumpus while it
+      is alive)
+    - breeze and stench cells, and the cells that kill the agent
+
+The extractors, by name (see make_extractor):
+    state    : one-hot x, y, heading, has_gold, wumpus_alive
+               (featureExtractors.WumpusStateExtractor)
+    percept  : what the agent senses here and one cell ahead
+    distance : percept features plus distance and direction to the
+               current target (the gold, then the entrance), danger ahead
+               or in the directions Forward can slip to, and a live wumpus
+               in the line of fire
+"""
+
+from array import array
+
+from featureExtractors import VectorFeatureExtractor, WumpusStateExtractor
+from wumpus_environment import Gold, Pit, Wumpus
+from wumpus_grid_search import GridPlanner, heading_dx, heading_dy
+
+
+class WumpusMaps(object):
+    """
+    Precomputed maps of one layout.
+    entrance := (x,y); gold, pits, wumpi := lists of (x,y) locations
+    Distance arrays are indexed by GridPlanner state over the whole grid,
+    ((y-1)*width + (x-1))*4 + heading, and hold -1 where the target cannot
+    be reached; dicts of them are keyed by wumpus_alive.
+    """
+
+    def __init__(self, width, height, entrance, gold, pits, wumpi):
+        self.width = width
+        self.height = height
+        self.entrance = entrance
+        cells = [(x, y) for x in range(1, width + 1) for y in range(1, height + 1)]
+        pits, wumpi = set(pits), set(wumpi)
+        ncells = width * height
+        self.breeze = bytearray(ncells)
+        self.stench = bytearray(ncells)
+        self.gold = bytearray(ncells)
+        for (x, y) in cells:
+            c = self.cell(x, y)
+            for hd in range(4):
+                loc = (x + heading_dx[hd], y + heading_dy[hd])
+                if loc in pits:
+                    self.breeze[c] = 1
+                if loc in wumpi:
+                    self.stench[c] = 1
+            if (x, y) in wumpi:
+                self.stench[c] = 1
+            if (x, y) in gold:
+                self.gold[c] = 1
+        self.danger = {}
+        self.gold_distance = {}
+        self.entrance_distance = {}
+        self.finish_distance = {}
+        for wumpus_alive in (True, False):
+            blocked = pits.union(wumpi) if wumpus_alive else pits
+            danger = self.danger[wumpus_alive] = bytearray(ncells)
+            for (x, y) in blocked:
+                if 1 <= x <= width and 1 <= y <= height:
+                    danger[self.cell(x, y)] = 1
+            planner = GridPlanner([c for c in cells if c not in blocked], cells)
+            to_gold = self.gold_distance[wumpus_alive] = self.distances_to(planner, gold)
+            to_entrance = self.entrance_distance[wumpus_alive] = \
+                self.distances_to(planner, [entrance])
+            # actions left to Climb out with the gold: back to the entrance
+            # and Climb, or (taking the best heading at the gold) to the
+            # gold, Grab, back and Climb
+            with_gold = array('i', [-1]) * len(to_entrance)
+            for s in range(len(to_entrance)):
+                if to_entrance[s] >= 0:
+                    with_gold[s] = to_entrance[s] + 1
+            back = [min([d for d in with_gold[c * 4:c * 4 + 4] if d >= 0] or [-1])
+                    for c in range(ncells)]
+            back = min([back[self.cell(x, y)] for (x, y) in gold if back[self.cell(x, y)] >= 0]
+                       or [-1])
+            without_gold = array('i', [-1]) * len(to_gold)
+            if back >= 0:
+                for s in range(len(to_gold)):
+                    if to_gold[s] >= 0:
+                        without_gold[s] = to_gold[s] + 1 + back
+            self.finish_distance[(True, wumpus_alive)] = with_gold
+            self.finish_distance[(False, wumpus_alive)] = without_gold
+        self.wumpi = wumpi
+
+    def cell(self, x, y):
+        return (y - 1) * self.width + (x - 1)
+
+    def inside(self, x, y):
+        return 1 <= x <= self.width and 1 <= y <= self.height
+
+    @staticmethod
+    def distances_to(planner, targets):
+        """
+        Number of actions from each (x, y, heading) to the nearest target.
+        Searches backwards from the targets: reversing a path turns every
+        heading around, so the distance from (x, y, h) to a target is the
+        distance from the target to (x, y, h+2).
+        """
+        dist = planner.distances([(x, y, hd) for (x, y) in targets for hd in range(4)
+                                  if planner.in_grid(x, y)])
+        to = array('i', [-1]) * len(dist)
+        for s in range(len(dist)):
+            to[s] = dist[(s & ~3) | ((s + 2) & 3)]
+        return to
+
+    def wumpus_ahead(self, x, y, heading):
+        """ True if an arrow shot from (x,y) along heading hits a wumpus """
+        dx, dy = heading_dx[heading], heading_dy[heading]
+        x, y = x + dx, y + dy
+        while self.inside(x, y):
+            if (x, y) in self.wumpi:
+                return True
+            x, y = x + dx, y + dy
+        return False
+
+
+_maps_cache = {}
+
+def layout_maps(width, height, entrance, gold, pits, wumpi):
+    """ WumpusMaps of a layout, computed on first use """
+    key = (width, height, entrance, frozenset(gold), frozenset(pits), frozenset(wumpi))
+    maps = _maps_cache.get(key)
+    if maps is None:
+        maps = _maps_cache[key] = WumpusMaps(width, height, entrance, gold, pits, wumpi)
+    return maps
+
+def environment_maps(environment):
+    """ WumpusMaps of the layout of a WumpusEnvironment (with its gold in place) """
+    locations = lambda cls: [thing.location for thing in environment.things
+                             if isinstance(thing, cls)]
+    return layout_maps(environment.width - 1, environment.height - 1, environment.entrance,
+                       locations(Gold), locations(Pit), locations(Wumpus))
+
+
+class WumpusPerceptExtractor(VectorFeatureExtractor):
+    """ What the agent senses at its location and one cell ahead """
+
+    def __init__(self, maps):
+        self.maps = maps
+        self.width = maps.width
+        self.height = maps.height
+        self.featureNames = ['bias', 'has-gold', 'wumpus-alive', 'at-entrance',
+                             'glitter', 'wall-ahead', 'breeze', 'stench',
+                             'breeze-ahead', 'stench-ahead']
+
+    def getFeatureVector(self, state):
+        feats = array('d', [0.0]) * len(self.featureNames)
+        self.setPerceptFeatures(feats, state)
+        return feats
+
+    def setPerceptFeatures(self, feats, state):
+        x, y, heading, has_gold, wumpus_alive = state[:5]
+        maps = self.maps
+        c = maps.cell(x, y)
+        feats[0] = 1.0
+        feats[1] = 1.0 if has_gold else 0.0
+        feats[2] = 1.0 if wumpus_alive else 0.0
+        feats[3] = 1.0 if (x, y) == maps.entrance else 0.0
+        feats[4] = 1.0 if maps.gold[c] and not has_gold else 0.0
+        ax, ay = x + heading_dx[heading], y + heading_dy[heading]
+        if maps.inside(ax, ay):
+            a = maps.cell(ax, ay)
+            feats[8] = maps.breeze[a]
+            feats[9] = maps.stench[a]
+        else:
+            feats[5] = 1.0
+        feats[6] = maps.breeze[c]
+        feats[7] = maps.stench[c]
+
+
+class WumpusDistanceExtractor(WumpusPerceptExtractor):
+    """
+    Percept features plus progress towards Climbing out with the gold,
+    decay ** (number of actions left), in the current state and after
+    each action: Forward (ignoring slips), TurnLeft, TurnRight and, on the
+    gold, Grab; Climb with the gold; danger in the cell ahead and in the
+    cells Forward can slip into; a live wumpus in the line of fire.
+    Progress is 0 where the gold or the way out cannot be reached.
+    decay := should match the agent's discount, so that progress scales
+             like the value of the state
+    """
+
+    def __init__(self, maps, decay=0.8):
+        WumpusPerceptExtractor.__init__(self, maps)
+        self.numPerceptFeatures = len(self.featureNames)
+        self.featureNames = self.featureNames + \
+            ['progress', 'forward-progress', 'left-progress', 'right-progress',
+             'grab-progress', 'climb-with-gold', 'danger-ahead', 'danger-left',
+             'danger-right', 'wumpus-in-line']
+        longest = max([max(d) for d in maps.finish_distance.values()] + [0])
+        self.decay_powers = [decay ** d for d in range(longest + 1)] + [0.0]  # [-1] -> 0.0
+
+    def getFeatureVector(self, state):
+        x, y, heading, has_gold, wumpus_alive = state[:5]
+        maps = self.maps
+        power = self.decay_powers
+        feats = array('d', [0.0]) * len(self.featureNames)
+        self.setPerceptFeatures(feats, state)
+        k = self.numPerceptFeatures
+        finish = maps.finish_distance[(has_gold, wumpus_alive)]
+        c4 = maps.cell(x, y) * 4
+        feats[k] = power[finish[c4 + heading]]
+        danger = maps.danger[wumpus_alive]
+        ax, ay = x + heading_dx[heading], y + heading_dy[heading]
+        if maps.inside(ax, ay) and not danger[maps.cell(ax, ay)]:
+            feats[k + 1] = power[finish[maps.cell(ax, ay) * 4 + heading]]
+        feats[k + 2] = power[finish[c4 + ((heading + 1) & 3)]]
+        feats[k + 3] = power[finish[c4 + ((heading - 1) & 3)]]
+        if maps.gold[c4 // 4] and not has_gold:
+            feats[k + 4] = power[maps.finish_distance[(True, wumpus_alive)][c4 + heading]]
+        if has_gold and (x, y) == maps.entrance:
+            feats[k + 5] = 1.0
+        # Forward moves ahead, or slips to the left or right of heading
+        for i, hd in ((6, heading), (7, (heading + 1) & 3), (8, (heading - 1) & 3)):
+            nx, ny = x + heading_dx[hd], y + heading_dy[hd]
+            if maps.inside(nx, ny) and danger[maps.cell(nx, ny)]:
+                feats[k + i] = 1.0
+        if wumpus_alive and maps.wumpus_ahead(x, y, heading):
+            feats[k + 9] = 1.0
+        return feats
+
+
+def make_extractor(name, environment):
+    """ Feature extractor name ('state', 'percept' or 'distance') for environment """
+    if name == 'state':
+        return WumpusStateExtractor(environment.width - 1, environment.height - 1)
+    if name == 'percept':
+        return WumpusPerceptExtractor(environment_maps(environment))
+    if name == 'distance':
+        return WumpusDistanceExtractor(environment_maps(environment))
+    raise ValueError("Unknown feature extractor: {0}".format(name))
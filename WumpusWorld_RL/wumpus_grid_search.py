@@ -0,0 +1,233 @@
+# wumpus_grid_search.py
+# ---------------------
+# Licensing Information:
+# Please DO NOT DISTRIBUTE OR PUBLISH solutions to this project.
+# You are free to use and extend these projects for EDUCATIONAL PURPOSES ONLY.
+# The Hunt The Wumpus AI project was developed at University of Arizona
+# by Clay Morrison (clayton@sista.arizona.edu), spring 2013.
+# This project extends the python code provided by Peter Norvig as part of
+# the Artificial Intelligence: A Modern Approach (AIMA) book example code;
+# see http://aima.cs.berkeley.edu/code.html
+# In particular, the following files come directly from the AIMA python
+# code: ['agents.py', 'logic.py', 'search.py', 'utils.py']
+# ('logic.py' has been modified by Clay Morrison in locations with the
+# comment 'CTM')
+# The file ['minisat.py'] implements a slim system call wrapper to the minisat
+# (see http://minisat.se) SAT solver, and is directly based on the satispy
+# python project, see https://github.com/netom/satispy .
+
+"""
+Grid-native planner for the 4-connected grid-with-heading problems solved by
+wumpus_planners (PlanRouteProblem and PlanShotProblem).
+
+Instead of building a search.Node per child, states (x, y, heading) are
+encoded as integers over the bounding box of the allowed locations,
+    state = ((y - ymin) * w + (x - xmin)) * 4 + heading
+and the search keeps flat arrays of distance, parent state and action code.
+Every action costs 1, so breadth-first search is Dijkstra's algorithm here
+and returns plans of the same (optimal) length as search.astar_search,
+though not always the same plan: ties between equally short plans are
+broken by successor order here and by the A* priority queue there.
+Searches may start from several source states and stop at the first state
+in a goal mask, so multi-source / multi-goal queries cost a single sweep.
+"""
+
+from array import array
+
+# Action codes, in the same order PlanRouteProblem.actions() lists them
+FORWARD, TURN_RIGHT, TURN_LEFT = 0, 1, 2
+action_code_to_str = ['Forward', 'TurnRight', 'TurnLeft']
+
+# heading: 0:^:north 1:<:west 2:v:south 3:>:east
+heading_dx = (0, -1, 0, 1)
+heading_dy = (1, 0, -1, 0)
+
+
+class GridPlanner(object):
+    """
+    Integer-encoded search space over a set of allowed (x,y) locations.
+    allowed := iterable of (x,y) locations the agent can move into
+    extra := additional (x,y) locations that can be occupied (e.g., the
+             current location when it is not itself allowed) but are not
+             Forward targets
+    """
+
+    def __init__(self, allowed, extra=()):
+        self.allowed = set(allowed)
+        cells = self.allowed.union(extra)
+        if cells:
+            self.xmin = min(c[0] for c in cells)
+            self.ymin = min(c[1] for c in cells)
+            self.w = max(c[0] for c in cells) - self.xmin + 1
+            self.h = max(c[1] for c in cells) - self.ymin + 1
+        else:
+            self.xmin = self.ymin = 0
+            self.w = self.h = 0
+        ncells = self.w * self.h
+        # cell -> 1 if Forward may move into it
+        self.open = bytearray(ncells)
+        for (x, y) in self.allowed:
+            self.open[self.cell(x, y)] = 1
+        # precomputed Forward successor cell for each (cell, heading); -1 if blocked
+        self.forward = array('i', [-1]) * (ncells * 4)
+        w, h, xmin, ymin = self.w, self.h, self.xmin, self.ymin
+        for (x, y) in cells:
+            c = self.cell(x, y)
+            for hd in range(4):
+                nx, ny = x + heading_dx[hd] - xmin, y + heading_dy[hd] - ymin
+                if 0 <= nx < w and 0 <= ny < h and self.open[ny * w + nx]:
+                    self.forward[c * 4 + hd] = ny * w + nx
+        self.expansions = 0
+
+    def cell(self, x, y):
+        return (y - self.ymin) * self.w + (x - self.xmin)
+
+    def encode(self, state):
+        """ (x, y, heading) -> integer state """
+        return self.cell(state[0], state[1]) * 4 + state[2]
+
+    def decode(self, s):
+        """ integer state -> (x, y, heading) """
+        c, hd = divmod(s, 4)
+        y, x = divmod(c, self.w)
+        return (x + self.xmin, y + self.ymin, hd)
+
+    def in_grid(self, x, y):
+        return 0 <= x - self.xmin < self.w and 0 <= y - self.ymin < self.h
+
+    # ---------------------------------------------------------------------
+    # goal masks
+
+    def route_goal_mask(self, goals):
+        """ Mask of states whose location is one of goals (any heading) """
+        mask = bytearray(self.w * self.h * 4)
+        for g in goals:
+            if self.in_grid(g[0], g[1]):
+                c = self.cell(g[0], g[1]) * 4
+                mask[c:c + 4] = b'\x01\x01\x01\x01'
+        return mask
+
+    def shot_goal_mask(self, goals):
+        """
+        Mask of states facing one of goals along a row or column,
+        i.e. the goal states of PlanShotProblem.goal_test()
+        """
+        mask = bytearray(self.w * self.h * 4)
+        w, xmin, ymin = self.w, self.xmin, self.ymin
+        for (gx, gy) in goals:
+            if 0 <= gx - xmin < w:
+                for yi in range(self.h):
+                    y = yi + ymin
+                    if y < gy:
+                        mask[(yi * w + gx - xmin) * 4 + 0] = 1   # north
+                    elif y > gy:
+                        mask[(yi * w + gx - xmin) * 4 + 2] = 1   # south
+            if 0 <= gy - ymin < self.h:
+                for xi in range(w):
+                    x = xi + xmin
+                    if x > gx:
+                        mask[((gy - ymin) * w + xi) * 4 + 1] = 1  # west
+                    elif x < gx:
+                        mask[((gy - ymin) * w + xi) * 4 + 3] = 1  # east
+        return mask
+
+    # ---------------------------------------------------------------------
+    # search
+
+    def search(self, sources, goal_mask=None):
+        """
+        Breadth-first search from the source states.
+        sources := list of (x, y, heading) start states (all at distance 0)
+        goal_mask := bytearray over integer states; the search stops at the
+                     first goal state reached.  If None, the whole reachable
+                     space is swept (see distances()).
+        Returns the integer goal state reached, or -1.
+        Leaves self.dist, self.parent and self.action filled in.
+        """
+        nstates = self.w * self.h * 4
+        dist = self.dist = array('i', [-1]) * nstates
+        parent = self.parent = array('i', [-1]) * nstates
+        action = self.action = array('b', [-1]) * nstates
+        forward = self.forward
+        queue = array('i')
+        for src in sources:
+            s = self.encode(src)
+            if dist[s] < 0:
+                dist[s] = 0
+                queue.append(s)
+                if goal_mask is not None and goal_mask[s]:
+                    return s
+        head = 0
+        while head < len(queue):
+            s = queue[head]
+            head += 1
+            self.expansions += 1
+            d = dist[s] + 1
+            c4 = s & ~3
+            hd = s & 3
+            nc = forward[s]
+            # same child order as PlanRouteProblem.actions()
+            for child, code in ((nc * 4 + hd if nc >= 0 else -1, FORWARD),
+                                (c4 | ((hd - 1) & 3), TURN_RIGHT),
+                                (c4 | ((hd + 1) & 3), TURN_LEFT)):
+                if child >= 0 and dist[child] < 0:
+                    dist[child] = d
+                    parent[child] = s
+                    action[child] = code
+                    if goal_mask is not None and goal_mask[child]:
+                        return child
+                    queue.append(child)
+        return -1
+
+    def solution(self, s):
+        """ List of action strings leading from a source state to state s """
+        codes = []
+        parent, action = self.parent, self.action
+        while parent[s] >= 0:
+            codes.append(action_code_to_str[action[s]])
+            s = parent[s]
+        codes.reverse()
+        return codes
+
+    def distances(self, sources):
+        """
+        Sweep the whole reachable space from sources and return the flat
+        distance array (indexed by integer state; -1 for unreachable states).
+        """
+        self.search(sources, None)
+        return self.dist
+
+
+#-------------------------------------------------------------------------------
+
+def grid_plan_route(current, heading, goals, allowed, stats=None):
+    """
+    Same contract as wumpus_planners.plan_route (heading as an integer):
+    list of actions taking the agent from current to the closest goal,
+    or [] if no goal can be reached.
+    stats := optional dict; its 'expansions' entry is incremented by the
+             number of states expanded
+    """
+    planner = GridPlanner(allowed, [(current[0], current[1])])
+    s = planner.search([(current[0], current[1], heading)],
+                       planner.route_goal_mask(goals))
+    if stats is not None:
+        stats['expansions'] += planner.expansions
+    if s < 0:
+        return []
+    return planner.solution(s)
+
+def grid_plan_shot(current, heading, goals, allowed, stats=None):
+    """
+    Route part of wumpus_planners.plan_shot: list of actions taking the agent
+    to the closest state facing one of goals, or None if there is none.
+    stats := as for grid_plan_route
+    """
+    planner = GridPlanner(allowed, [(current[0], current[1])])
+    s = planner.search([(current[0], current[1], heading)],
+                       planner.shot_goal_mask(goals))
+    if stats is not None:
+        stats['expansions'] += planner.expansions
+    if s < 0:
+        return None
+    return planner.solution(s)
@@ -0,0 +1,642 @@
+# wumpus_gym.py
+# -------------
+# Licensing Information:
+# Please DO NOT DISTRIBUTE OR PUBLISH solutions to this project.
+# You are free to use and extend these projects for EDUCATIONAL PURPOSES ONLY.
+# The Hunt The Wumpus AI project was developed at University of Arizona
+# by Clay Morrison (clayton@sista.arizona.edu), spring 2013.
+# This project extends the python code provided by Peter Norvig as part of
+# the Artificial Intelligence: A Modern Approach (AIMA) book example code;
+# see http://aima.cs.berkeley.edu/code.html
+# In particular, the following files come directly from the AIMA python
+# code: ['agents.py', 'logic.py', 'search.py', 'utils.py']
+# ('logic.py' has been modified by Clay Morrison in locations with the
+# comment 'CTM')
+# The file ['minisat.py'] implements a slim system call wrapper to the minisat
+# (see http://minisat.se) SAT solver, and is directly based on the satispy
+# python project, see https://github.com/netom/satispy .
+
+"""
+Gym-style interface to WumpusQLearningEnvironment, for training loops
+that drive the world themselves instead of supplying an agent program:
+
+    env = WumpusGymEnv.from_layout('wumpus_4x4_1', seed=0)
+    obs = env.reset()
+    while True:
+        obs, reward, done, info = env.step(ACTION_IDS['Forward'])
+        if done:
+            break
+
+Actions are integer ids, indices into ACTIONS (the order of the Q learning
+agents' getLegalActions).  The observation is an array('i') of OBS_SIZE
+entries,
+    x, y, heading, has_gold, wumpus_alive, stench, breeze, glitter, bump, scream
+that is, the QLearningWumpusAgent state (obs[:5], see state()) followed
+by the percept vector.  wumpus_alive is what the agent knows: it turns 0
+once a scream has been perceived.
+
+To keep the per-step cost down, reset() and step() overwrite and return
+the same observation array (copy it to keep it) and the same info dict,
+and reset() restores the world in place (gold back, wumpi alive, explorer
+at the entrance) instead of building a new environment.
+
+CompiledWumpusGymEnv is the same interface over a CompiledWorld: the
+outcome of every (state, action, slip outcome) of the world, precomputed
+into integer arrays, so that a step is a table lookup (plus a random draw
+for Forward).  Given the same seed and actions it produces exactly the
+observations, rewards and done flags of WumpusGymEnv.  The tables have
+width * height * 16 * 2^wumpi * 18 entries, so compiling suits small and
+medium worlds; compiled worlds are cached per world.
+
+MultiAgentWumpusGymEnv puts num_agents explorers in one world.  Agent
+state is kept in struct-of-arrays form -- one array per field, indexed by
+agent -- and step(actions) advances every agent in a single call:
+
+    env = MultiAgentWumpusGymEnv.from_layout('wumpus_4x4_1', num_agents=100, seed=0)
+    obs = env.reset()
+    obs, rewards, dones, info = env.step(actions)   # actions[i]: agent i's action id
+    obs[X][i], obs[STENCH][i], ...                  # agent i's observation
+
+Agents act in index order, then the wumpi and pits claim their victims, as
+in WumpusEnvironment.step with several explorers; a scream is heard by
+every agent.  Each agent has its own done flag and score; once done, its
+actions are ignored and its reward is 0.  Explorers compete for the gold
+(shared_gold=True: the first to grab it takes it out of the world) or each
+find their own copy of it (shared_gold=False), and with team_reward=True
+every agent still in play is rewarded with the whole team's reward.
+"""
+
+from array import array
+
+from wumpus_environment import Explorer, Gold, Pit, Wumpus, WumpusQLearningEnvironment, \
+    PERCEPT_STENCH, PERCEPT_BREEZE, PERCEPT_GLITTER, PERCEPT_BUMP, PERCEPT_SCREAM
+import wumpus_layouts
+from wumpus_mdp import heading_vector
+import wumpus_rng
+
+ACTIONS = ['TurnRight', 'TurnLeft', 'Forward', 'Grab', 'Shoot', 'Climb']
+ACTION_IDS = dict((a, i) for i, a in enumerate(ACTIONS))
+OBS_SIZE = 10
+X, Y, HEADING, HAS_GOLD, WUMPUS_ALIVE, STENCH, BREEZE, GLITTER, BUMP, SCREAM = range(OBS_SIZE)
+
+
+def state(obs):
+    """ QLearningWumpusAgent state (x, y, heading, has_gold, wumpus_alive) of obs """
+    return (obs[X], obs[Y], obs[HEADING], obs[HAS_GOLD] == 1, obs[WUMPUS_ALIVE] == 1)
+
+
+class WumpusGymEnv(object):
+    """
+    reset() -> obs;  step(action_id) -> (obs, reward, done, info)
+    width, height, entrance, objects := the world, as for
+                                        WumpusWorldScenario.build_world
+    heading := initial heading of the explorer
+    max_steps := steps after which an episode is cut off (info['truncated'])
+    seed := master seed of the environment's random stream (see wumpus_rng)
+    info := {'score': performance measure so far, 'steps': steps taken,
+             'truncated': True if the episode ended at max_steps}
+    """
+
+    def __init__(self, width, height, entrance, objects,
+                 forwardStochasticOutcome=(0.1, 0.8, 0.1), heading='north',
+                 max_steps=1000, seed=None):
+        self.objects = objects
+        self.max_steps = max_steps
+        self.env = WumpusQLearningEnvironment(width, height, entrance, forwardStochasticOutcome,
+                                              rng=wumpus_rng.stream(seed, 'environment'))
+        self.env.verbose = False
+        self.explorer = Explorer(heading=heading, verbose=False)
+        self.explorer.register_environment(self.env)
+        self.env.add_thing(self.explorer, entrance)
+        for (obj, loc) in objects:
+            self.env.add_thing(obj, loc)
+        self.obs = array('i', [0]) * OBS_SIZE
+        self.info = {'score': 0, 'steps': 0, 'truncated': False}
+        self.steps = 0
+
+    @classmethod
+    def from_layout(cls, layout, **args):
+        """ Env over a wumpus_layouts.Layout or the name of a layout file """
+        if not isinstance(layout, wumpus_layouts.Layout):
+            layout = wumpus_layouts.layout_registry.get(layout)
+        return cls(layout.width, layout.height, layout.entrance, layout.objects(), **args)
+
+    @classmethod
+    def from_scenario(cls, scenario, **args):
+        """ Env over the world of a WumpusWorldQLearningScenario """
+        return cls(scenario.width, scenario.height, scenario.entrance, scenario.objects,
+                   scenario.forwardStochasticOutcome, **args)
+
+    def seed(self, seed):
+        """ Restart the environment's random stream from master seed seed """
+        self.env.rng = wumpus_rng.stream(seed, 'environment')
+
+    def reset(self):
+        env, explorer = self.env, self.explorer
+        for (obj, loc) in self.objects:
+            if isinstance(obj, Wumpus):
+                obj.alive = True
+            elif isinstance(obj, Gold) and obj not in env.things:
+                env.add_thing(obj, loc)
+        explorer.reset()
+        explorer.has_gold = False
+        explorer.has_arrow = True
+        explorer.bump = False
+        explorer.performance_measure = 0
+        env.done = False
+        env.time_step = 0
+        self.steps = 0
+        obs = self.obs
+        obs[WUMPUS_ALIVE] = 1
+        self.observe()
+        return obs
+
+    def observe(self):
+        """ Write the explorer's state and current percept into self.obs """
+        explorer, obs = self.explorer, self.obs
+        obs[X], obs[Y] = explorer.location
+        obs[HEADING] = explorer.heading
+        obs[HAS_GOLD] = explorer.has_gold
+        bits = self.env.percept_bits(explorer)
+        obs[STENCH] = bits & PERCEPT_STENCH
+        obs[BREEZE] = (bits & PERCEPT_BREEZE) >> 1
+        obs[GLITTER] = (bits & PERCEPT_GLITTER) >> 2
+        obs[BUMP] = (bits & PERCEPT_BUMP) >> 3
+        obs[SCREAM] = (bits & PERCEPT_SCREAM) >> 4
+        if obs[SCREAM]:
+            obs[WUMPUS_ALIVE] = 0
+
+    def step(self, action_id):
+        env, explorer = self.env, self.explorer
+        score = explorer.performance_measure
+        env.execute_action(explorer, ACTIONS[action_id])
+        env.exogenous_change()
+        env.time_step += 1
+        self.steps += 1
+        done = env.done
+        truncated = not done and self.steps >= self.max_steps
+        self.observe()
+        info = self.info
+        info['score'] = explorer.performance_measure
+        info['steps'] = self.steps
+        info['truncated'] = truncated
+        return self.obs, explorer.performance_measure - score, done or truncated, info
+
+
+#-------------------------------------------------------------------------------
+# Compiled environment
+#-------------------------------------------------------------------------------
+
+# CompiledWorld.events bits: percept of the next state (the PERCEPT_* bits
+# of WumpusEnvironment.percept_bits), then done
+EVENT_STENCH, EVENT_BREEZE, EVENT_GLITTER, EVENT_BUMP, EVENT_SCREAM, EVENT_DONE = \
+    PERCEPT_STENCH, PERCEPT_BREEZE, PERCEPT_GLITTER, PERCEPT_BUMP, PERCEPT_SCREAM, 32
+FORWARD = ACTION_IDS['Forward']
+
+
+class CompiledWorld(object):
+    """
+    Transition tables of WumpusQLearningEnvironment on one world.
+    wumpi, pits, gold := lists of (x,y) locations (at most one gold)
+    A state is the index
+        ((((x-1)*height + (y-1))*4 + heading)*2 + has_gold)*2 + has_arrow
+    shifted left by len(wumpi) bits, or'ed with a bit per living wumpus.
+    For t = (state*len(ACTIONS) + action_id)*3 + outcome, where outcome is
+    the Forward slip (0: left, 1: ahead, 2: right; all three are the same
+    for other actions):
+        next_state[t], reward[t], events[t] (EVENT_* bits)
+    and per state: x[s], y[s], heading[s], has_gold[s], percept[s] (the
+    stench, breeze and glitter EVENT_* bits of s).
+    """
+
+    def __init__(self, width, height, entrance, wumpi, pits, gold):
+        if len(gold) > 1:
+            raise ValueError("A compiled world can have at most one gold, got {0}".format(len(gold)))
+        self.width, self.height = width, height
+        self.num_wumpi = k = len(wumpi)
+        self.num_states = width * height * 16 << k
+        self.initial_alive = (1 << k) - 1
+        pits = set(pits)
+        wumpus_index = {}
+        for j, loc in enumerate(wumpi):
+            wumpus_index.setdefault(loc, j)
+
+        def near(locations, x, y):
+            return any(loc in locations for loc in ((x, y), (x + 1, y), (x - 1, y),
+                                                    (x, y + 1), (x, y - 1)))
+
+        inside = lambda x, y: 1 <= x <= width and 1 <= y <= height
+        num_actions = len(ACTIONS)
+        n = self.num_states
+        self.x = array('h', [0]) * n
+        self.y = array('h', [0]) * n
+        self.heading = array('b', [0]) * n
+        self.has_gold = array('b', [0]) * n
+        self.percept = array('B', [0]) * n
+        self.next_state = array('i', [0]) * (n * num_actions * 3)
+        self.reward = array('h', [0]) * (n * num_actions * 3)
+        self.events = array('B', [0]) * (n * num_actions * 3)
+        stench = {}
+        breeze = {}
+        for x in range(1, width + 1):
+            for y in range(1, height + 1):
+                stench[(x, y)] = EVENT_STENCH if near(wumpus_index, x, y) else 0
+                breeze[(x, y)] = EVENT_BREEZE if near(pits, x, y) else 0
+
+        for s in range(n):
+            x, y, heading, has_gold, has_arrow, alive = self.decode(s)
+            self.x[s], self.y[s], self.heading[s], self.has_gold[s] = x, y, heading, has_gold
+            self.percept[s] = stench[(x, y)] | breeze[(x, y)] \
+                              | (EVENT_GLITTER if (x, y) in gold and not has_gold else 0)
+
+        for s in range(n):
+            x, y, heading, has_gold, has_arrow, alive = self.decode(s)
+            for a, action in enumerate(ACTIONS):
+                for outcome in range(3):
+                    t = (s * num_actions + a) * 3 + outcome
+                    if outcome and action != 'Forward':
+                        self.next_state[t] = self.next_state[t - outcome]
+                        self.reward[t] = self.reward[t - outcome]
+                        self.events[t] = self.events[t - outcome]
+                        continue
+                    nx, ny, nheading, ngold, narrow, nalive = \
+                        x, y, heading, has_gold, has_arrow, alive
+                    reward = -1
+                    events = 0
+                    done = False
+                    if action == 'TurnRight':
+                        nheading = (heading - 1) % 4
+                    elif action == 'TurnLeft':
+                        nheading = (heading + 1) % 4
+                    elif action == 'Forward':
+                        dx, dy = heading_vector[(heading + 1 - outcome) % 4]
+                        if inside(x + dx, y + dy):
+                            nx, ny = x + dx, y + dy
+                        else:
+                            events |= EVENT_BUMP
+                    elif action == 'Grab':
+                        if (x, y) in gold:
+                            ngold = 1
+                    elif action == 'Climb':
+                        if (x, y) == entrance:
+                            if has_gold:
+                                reward += 1000
+                            done = True
+                    elif action == 'Shoot':
+                        if has_arrow:
+                            narrow = 0
+                            reward -= 10
+                            # the arrow stops at the first wumpus, dead or alive
+                            dx, dy = heading_vector[heading]
+                            ax, ay = x + dx, y + dy
+                            while inside(ax, ay):
+                                j = wumpus_index.get((ax, ay))
+                                if j is not None:
+                                    nalive &= ~(1 << j)
+                                    events |= EVENT_SCREAM
+                                    break
+                                ax, ay = ax + dx, ay + dy
+                    if any(loc == (nx, ny) and nalive & (1 << j) for j, loc in enumerate(wumpi)) \
+                       or (nx, ny) in pits:
+                        reward -= 1000
+                        done = True
+                    ns = self.encode(nx, ny, nheading, ngold, narrow, nalive)
+                    self.next_state[t] = ns
+                    self.reward[t] = reward
+                    self.events[t] = events | self.percept[ns] | (EVENT_DONE if done else 0)
+
+    def encode(self, x, y, heading, has_gold, has_arrow, alive):
+        return (((((x - 1) * self.height + (y - 1)) * 4 + heading) * 2 + has_gold) * 2
+                + has_arrow) << self.num_wumpi | alive
+
+    def decode(self, s):
+        """ (x, y, heading, has_gold, has_arrow, alive bits) of state s """
+        alive = s & ((1 << self.num_wumpi) - 1)
+        s >>= self.num_wumpi
+        s, has_arrow = divmod(s, 2)
+        s, has_gold = divmod(s, 2)
+        c, heading = divmod(s, 4)
+        x, y = divmod(c, self.height)
+        return (x + 1, y + 1, heading, has_gold, has_arrow, alive)
+
+_compiled_worlds = {}
+
+def compiled_world(width, height, entrance, wumpi, pits, gold):
+    """ CompiledWorld of a world, compiled once per process """
+    key = (width, height, entrance, tuple(wumpi), tuple(sorted(pits)), tuple(gold))
+    world = _compiled_worlds.get(key)
+    if world is None:
+        world = _compiled_worlds[key] = CompiledWorld(width, height, entrance,
+                                                      wumpi, pits, gold)
+    return world
+
+
+class CompiledWumpusGymEnv(WumpusGymEnv):
+    """
+    WumpusGymEnv over a CompiledWorld (see module docstring); same
+    arguments, except that objects are only read for their locations.
+    """
+
+    def __init__(self, width, height, entrance, objects,
+                 forwardStochasticOutcome=(0.1, 0.8, 0.1), heading='north',
+                 max_steps=1000, seed=None):
+        locations = lambda cls: [loc for (obj, loc) in objects if isinstance(obj, cls)]
+        self.world = compiled_world(width, height, entrance, locations(Wumpus), locations(Pit),
+                                    locations(Gold))
+        if isinstance(heading, str):
+            heading = Explorer.heading_str_to_num[heading]
+        self.initial_state = self.world.encode(entrance[0], entrance[1], heading, 0, 1,
+                                               self.world.initial_alive)
+        self.p_left = forwardStochasticOutcome[0]
+        self.p_ahead = forwardStochasticOutcome[0] + forwardStochasticOutcome[1]
+        self.max_steps = max_steps
+        self.rng = wumpus_rng.stream(seed, 'environment')
+        self.obs = array('i', [0]) * OBS_SIZE
+        self.info = {'score': 0, 'steps': 0, 'truncated': False}
+        self.steps = 0
+        self.score = 0
+
+    def seed(self, seed):
+        self.rng = wumpus_rng.stream(seed, 'environment')
+
+    def reset(self):
+        self.state = s = self.initial_state
+        self.steps = 0
+        self.score = 0
+        world, obs = self.world, self.obs
+        obs[X] = world.x[s]
+        obs[Y] = world.y[s]
+        obs[HEADING] = world.heading[s]
+        obs[HAS_GOLD] = world.has_gold[s]
+        obs[WUMPUS_ALIVE] = 1
+        percept = world.percept[s]
+        obs[STENCH] = percept & EVENT_STENCH
+        obs[BREEZE] = (percept & EVENT_BREEZE) >> 1
+        obs[GLITTER] = (percept & EVENT_GLITTER) >> 2
+        obs[BUMP] = 0
+        obs[SCREAM] = 0
+        return obs
+
+    def step(self, action_id):
+        world, obs = self.world, self.obs
+        t = (self.state * 6 + action_id) * 3
+        if action_id == FORWARD:
+            r = self.rng.random()
+            t += 0 if r <= self.p_left else (1 if r <= self.p_ahead else 2)
+        self.state = s = world.next_state[t]
+        reward = world.reward[t]
+        events = world.events[t]
+        self.score += reward
+        self.steps += 1
+        obs[X] = world.x[s]
+        obs[Y] = world.y[s]
+        obs[HEADING] = world.heading[s]
+        obs[HAS_GOLD] = world.has_gold[s]
+        obs[STENCH] = events & EVENT_STENCH
+        obs[BREEZE] = (events & EVENT_BREEZE) >> 1
+        obs[GLITTER] = (events & EVENT_GLITTER) >> 2
+        obs[BUMP] = (events & EVENT_BUMP) >> 3
+        obs[SCREAM] = (events & EVENT_SCREAM) >> 4
+        if events & EVENT_SCREAM:
+            obs[WUMPUS_ALIVE] = 0
+        done = events & EVENT_DONE != 0
+        truncated = not done and self.steps >= self.max_steps
+        info = self.info
+        info['score'] = self.score
+        info['steps'] = self.steps
+        info['truncated'] = truncated
+        return obs, reward, done or truncated, info
+
+
+#-------------------------------------------------------------------------------
+# Multi-agent environment
+#-------------------------------------------------------------------------------
+
+TURN_RIGHT, TURN_LEFT, GRAB, SHOOT, CLIMB = [ACTION_IDS[a] for a in
+                                             ('TurnRight', 'TurnLeft', 'Grab', 'Shoot', 'Climb')]
+
+
+def agent_state(obs, i):
+    """ QLearningWumpusAgent state of agent i in a MultiAgentWumpusGymEnv obs """
+    return (obs[X][i], obs[Y][i], obs[HEADING][i], obs[HAS_GOLD][i] == 1,
+            obs[WUMPUS_ALIVE][i] == 1)
+
+
+class MultiAgentWumpusGymEnv(object):
+    """
+    reset() -> obs;  step(actions) -> (obs, rewards, dones, info)
+    width, height, entrance, objects, forwardStochasticOutcome, heading,
+    max_steps, seed := as for WumpusGymEnv (at most one gold)
+    num_agents := number of explorers, all starting at the entrance
+    shared_gold, team_reward := see module docstring
+    obs := list of OBS_SIZE arrays, obs[field][i] the field of agent i
+    rewards, dones := arrays indexed by agent
+    info := {'scores': array of performance measures, 'steps': steps taken,
+             'truncated': True if the episode ended at max_steps}
+    Like WumpusGymEnv, the obs, rewards, dones and info are overwritten in
+    place by every reset() and step().
+    """
+
+    def __init__(self, width, height, entrance, objects, num_agents=2,
+                 forwardStochasticOutcome=(0.1, 0.8, 0.1), heading='north',
+                 max_steps=1000, seed=None, shared_gold=True, team_reward=False):
+        locations = lambda cls: [loc for (obj, loc) in objects if isinstance(obj, cls)]
+        wumpi, pits, gold = locations(Wumpus), set(locations(Pit)), locations(Gold)
+        if len(gold) > 1:
+            raise ValueError("A multi-agent world can have at most one gold, got {0}".format(len(gold)))
+        if isinstance(heading, str):
+            heading = Explorer.heading_str_to_num[heading]
+        self.width, self.height = width, height
+        self.num_agents = num_agents
+        self.initial_heading = heading
+        self.shared_gold = shared_gold
+        self.team_reward = team_reward
+        self.p_left = forwardStochasticOutcome[0]
+        self.p_ahead = forwardStochasticOutcome[0] + forwardStochasticOutcome[1]
+        self.max_steps = max_steps
+        self.rng = wumpus_rng.stream(seed, 'environment')
+        self.compile_world(entrance, wumpi, pits, gold)
+
+        n = num_agents
+        self.obs = [array('i', [0]) * n for field in range(OBS_SIZE)]
+        self.cell = array('i', [0]) * n
+        self.has_arrow = array('b', [0]) * n
+        self.done = array('b', [0]) * n
+        self.score = array('i', [0]) * n
+        self.rewards = array('i', [0]) * n
+        self.info = {'scores': self.score, 'steps': 0, 'truncated': False}
+        self.steps = 0
+
+    def compile_world(self, entrance, wumpi, pits, gold):
+        """
+        Per-cell tables of the world, cells indexed (x-1)*height + (y-1):
+            cell_x[c], cell_y[c]; percept[c] := EVENT_STENCH | EVENT_BREEZE bits;
+            pit[c]; wumpus[c] := index of the wumpus in c, or -1;
+            move[(c*4 + heading)*3 + outcome] := cell reached by Forward
+                (outcome as in CompiledWorld; c itself on a bump);
+            arrow[c*4 + heading] := index of the wumpus the arrow hits, or -1
+        """
+        width, height = self.width, self.height
+        inside = lambda x, y: 1 <= x <= width and 1 <= y <= height
+        index = lambda x, y: (x - 1) * height + (y - 1)
+        wumpus_index = {}
+        for j, loc in enumerate(wumpi):
+            wumpus_index.setdefault(loc, j)
+        num_cells = width * height
+        self.num_wumpi = len(wumpi)
+        self.entrance_cell = index(*entrance)
+        self.gold_cell = index(*gold[0]) if gold else -1
+        self.cell_x = array('i', [0]) * num_cells
+        self.cell_y = array('i', [0]) * num_cells
+        self.percept = array('B', [0]) * num_cells
+        self.pit = array('b', [0]) * num_cells
+        self.wumpus = array('i', [-1]) * num_cells
+        self.move = array('i', [0]) * (num_cells * 12)
+        self.arrow = array('i', [-1]) * (num_cells * 4)
+        for x in range(1, width + 1):
+            for y in range(1, height + 1):
+                c = index(x, y)
+                self.cell_x[c], self.cell_y[c] = x, y
+                near = [(x, y), (x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)]
+                if any(loc in wumpus_index for loc in near):
+                    self.percept[c] |= EVENT_STENCH
+                if any(loc in pits for loc in near):
+                    self.percept[c] |= EVENT_BREEZE
+                self.pit[c] = (x, y) in pits
+                self.wumpus[c] = wumpus_index.get((x, y), -1)
+                for heading in range(4):
+                    for outcome in range(3):
+                        dx, dy = heading_vector[(heading + 1 - outcome) % 4]
+                        self.move[(c * 4 + heading) * 3 + outcome] = \
+                            index(x + dx, y + dy) if inside(x + dx, y + dy) else c
+                    # the arrow stops at the first wumpus, dead or alive
+                    dx, dy = heading_vector[heading]
+                    ax, ay = x + dx, y + dy
+                    while inside(ax, ay):
+                        if (ax, ay) in wumpus_index:
+                            self.arrow[c * 4 + heading] = wumpus_index[(ax, ay)]
+                            break
+                        ax, ay = ax + dx, ay + dy
+
+    @classmethod
+    def from_layout(cls, layout, **args):
+        """ Env over a wumpus_layouts.Layout or the name of a layout file """
+        if not isinstance(layout, wumpus_layouts.Layout):
+            layout = wumpus_layouts.layout_registry.get(layout)
+        return cls(layout.width, layout.height, layout.entrance, layout.objects(), **args)
+
+    def seed(self, seed):
+        """ Restart the environment's random stream from master seed seed """
+        self.rng = wumpus_rng.stream(seed, 'environment')
+
+    def reset(self):
+        n = self.num_agents
+        c = self.entrance_cell
+        obs = self.obs
+        obs[X][:] = array('i', [self.cell_x[c]]) * n
+        obs[Y][:] = array('i', [self.cell_y[c]]) * n
+        obs[HEADING][:] = array('i', [self.initial_heading]) * n
+        obs[WUMPUS_ALIVE][:] = array('i', [1]) * n
+        obs[STENCH][:] = array('i', [self.percept[c] & EVENT_STENCH]) * n
+        obs[BREEZE][:] = array('i', [(self.percept[c] & EVENT_BREEZE) >> 1]) * n
+        obs[GLITTER][:] = array('i', [1 if c == self.gold_cell else 0]) * n
+        for field in (HAS_GOLD, BUMP, SCREAM):
+            obs[field][:] = array('i', [0]) * n
+        self.cell[:] = array('i', [c]) * n
+        self.has_arrow[:] = array('b', [1]) * n
+        self.done[:] = array('b', [0]) * n
+        self.score[:] = array('i', [0]) * n
+        self.rewards[:] = array('i', [0]) * n
+        self.alive = (1 << self.num_wumpi) - 1
+        self.gold_present = self.gold_cell >= 0
+        self.steps = 0
+        return obs
+
+    def step(self, actions):
+        """ actions := sequence of action ids, one per agent (ignored once done) """
+        obs, cell, has_arrow, done, score, rewards = \
+            self.obs, self.cell, self.has_arrow, self.done, self.score, self.rewards
+        xs, ys, headings, golds, bumps = obs[X], obs[Y], obs[HEADING], obs[HAS_GOLD], obs[BUMP]
+        move, arrow, cell_x, cell_y = self.move, self.arrow, self.cell_x, self.cell_y
+        draw, p_left, p_ahead = self.rng.random, self.p_left, self.p_ahead
+        gold_cell, entrance_cell = self.gold_cell, self.entrance_cell
+        scream = 0
+        active = [i for i in range(self.num_agents) if not done[i]]
+        rewards[:] = array('i', [0]) * self.num_agents
+        for i in active:
+            a = actions[i]
+            c = cell[i]
+            reward = -1
+            bumps[i] = 0
+            if a == FORWARD:
+                r = draw()
+                nc = move[(c * 4 + headings[i]) * 3 + (0 if r <= p_left else (1 if r <= p_ahead else 2))]
+                if nc == c:
+                    bumps[i] = 1
+                else:
+                    cell[i] = nc
+                    xs[i] = cell_x[nc]
+                    ys[i] = cell_y[nc]
+            elif a == TURN_RIGHT:
+                headings[i] = (headings[i] - 1) % 4
+            elif a == TURN_LEFT:
+                headings[i] = (headings[i] + 1) % 4
+            elif a == GRAB:
+                if c == gold_cell and self.gold_present and not golds[i]:
+                    golds[i] = 1
+                    if self.shared_gold:
+                        self.gold_present = False
+            elif a == CLIMB:
+                if c == entrance_cell:
+                    if golds[i]:
+                        reward += 1000
+                    done[i] = 1
+            elif a == SHOOT:
+                if has_arrow[i]:
+                    has_arrow[i] = 0
+                    reward -= 10
+                    j = arrow[c * 4 + headings[i]]
+                    if j >= 0:
+                        self.alive &= ~(1 << j)
+                        scream = 1
+            score[i] += reward
+            rewards[i] = reward
+
+        # exogenous change: after every agent has acted
+        pit, wumpus, alive = self.pit, self.wumpus, self.alive
+        for i in active:
+            if done[i]:
+                continue
+            c = cell[i]
+            if pit[c] or (wumpus[c] >= 0 and alive >> wumpus[c] & 1):
+                score[i] -= 1000
+                rewards[i] -= 1000
+                done[i] = 1
+
+        if self.team_reward:
+            total = sum(rewards[i] for i in active)
+            for i in active:
+                rewards[i] = total
+        percept, glitter_present = self.percept, self.gold_present
+        stenches, breezes, glitters = obs[STENCH], obs[BREEZE], obs[GLITTER]
+        for i in active:
+            c = cell[i]
+            p = percept[c]
+            stenches[i] = p & EVENT_STENCH
+            breezes[i] = (p & EVENT_BREEZE) >> 1
+            glitters[i] = 1 if c == gold_cell and glitter_present and not golds[i] else 0
+        if scream:
+            n = self.num_agents
+            obs[SCREAM][:] = array('i', [1]) * n
+            obs[WUMPUS_ALIVE][:] = array('i', [0]) * n
+        else:
+            obs[SCREAM][:] = array('i', [0]) * self.num_agents
+
+        self.steps += 1
+        truncated = self.steps >= self.max_steps and not all(done)
+        if truncated:
+            done[:] = array('b', [1]) * self.num_agents
+        info = self.info
+        info['steps'] = self.steps
+        info['truncated'] = truncated
+        return obs, rewards, done, info
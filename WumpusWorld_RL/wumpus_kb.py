@@ -178,6 +178,21 @@ def action_wait_str(t=None):
 def add_time_stamp(prop, t): return '{0}{1}'.format(prop, t)
 
 
+### auxiliary variables of cardinality encodings and of clause definitions (wumpus_cnf)
+
+def counter_str(name, i, t=None):
+    "Auxiliary: one of the first <i> <name> propositions is True (at time <t>)"
+    return ('Cnt{0}{1}_{2}'.format(name, i, t) if t != None else 'Cnt{0}{1}'.format(name, i))
+
+def bimander_str(name, j, t=None):
+    "Auxiliary: bit <j> of the group of the True <name> proposition (at time <t>)"
+    return ('Bit{0}{1}_{2}'.format(name, j, t) if t != None else 'Bit{0}{1}'.format(name, j))
+
+def definition_str(name, k):
+    "Auxiliary: the <k>th disjunct of the definition of proposition <name> holds"
+    return 'Def{0}_{1}'.format(name, k)
+
+
 proposition_bases_all = [proposition_bases_atemporal_location,
                          proposition_bases_perceptual_fluents,
                          proposition_bases_location_fluents,
@@ -220,6 +235,76 @@ def axiom_generator_percept_sentence(t, tvec):
     # Return the axiom_str
     return axiom_str
 
+# -------------------------------------------------------------------------------
+# Axiom Generators: Cardinality Encodings
+# At most one / exactly one of a list of propositions, as a list of clauses:
+#     'pairwise'   : ~a | ~b for each pair; n(n-1)/2 clauses, no auxiliaries
+#     'sequential' : sequential counter (Sinz 2005); 3n-4 clauses,
+#                    n-1 auxiliaries Cnt<name><i>
+#     'bimander'   : pairs of propositions, each pair's index in binary
+#                    (Nguyen & Mai 2015); with b = ceil(log2(ceil(n/2))) bits,
+#                    floor(n/2) + n b clauses, b auxiliaries Bit<name><j>
+# name (and t) keeps the auxiliaries of each constraint apart.
+# -------------------------------------------------------------------------------
+
+CARDINALITY_ENCODINGS = ['pairwise', 'sequential', 'bimander']
+
+def generate_at_most_one_axioms(props, name, encoding='pairwise', t=None):
+    """
+    Assert that at most one of props is True.
+    props := list of proposition strings
+    name := name of the constraint's auxiliary propositions
+    encoding := one of CARDINALITY_ENCODINGS
+    t := time of the auxiliary propositions; default=None (atemporal)
+    """
+    n = len(props)
+    axioms = []
+    if encoding == 'pairwise':
+        for i in range(n):
+            for j in range(i + 1, n):
+                axioms.append('~{0} | ~{1}'.format(props[i], props[j]))
+    elif encoding == 'sequential':
+        if n < 2:
+            return []
+        axioms.append('~{0} | {1}'.format(props[0], counter_str(name, 1, t)))
+        for i in range(1, n - 1):
+            axioms.append('~{0} | {1}'.format(props[i], counter_str(name, i + 1, t)))
+            axioms.append('~{0} | {1}'.format(counter_str(name, i, t), counter_str(name, i + 1, t)))
+            axioms.append('~{0} | ~{1}'.format(props[i], counter_str(name, i, t)))
+        axioms.append('~{0} | ~{1}'.format(props[n - 1], counter_str(name, n - 1, t)))
+    elif encoding == 'bimander':
+        groups = (n + 1) // 2
+        bits = (groups - 1).bit_length() if groups > 1 else 0
+        for g in range(groups):
+            group = props[2 * g:2 * g + 2]
+            if len(group) == 2:
+                axioms.append('~{0} | ~{1}'.format(group[0], group[1]))
+            for prop in group:
+                for j in range(bits):
+                    axioms.append('~{0} | {1}{2}'.format(prop, '' if g >> j & 1 else '~',
+                                                         bimander_str(name, j + 1, t)))
+    else:
+        raise ValueError("Unknown cardinality encoding: {0}".format(encoding))
+    return axioms
+
+def generate_exactly_one_axioms(props, name, encoding='pairwise', t=None):
+    """
+    Assert that exactly one of props is True: generate_at_most_one_axioms and
+    the disjunction of props, which the sequential encoding chains through
+    its counters (CntW<i> implies one of the first i), so that no axiom has
+    more than three literals.
+    """
+    if encoding == 'sequential' and len(props) > 1:
+        n = len(props)
+        axioms = ['~{0} | {1}'.format(counter_str(name, 1, t), props[0])]
+        for i in range(1, n - 1):
+            axioms.append('~{0} | {1} | {2}'.format(counter_str(name, i + 1, t),
+                                                    counter_str(name, i, t), props[i]))
+        axioms.append('{0} | {1}'.format(counter_str(name, n - 1, t), props[n - 1]))
+    else:
+        axioms = [' | '.join(props)]
+    return axioms + generate_at_most_one_axioms(props, name, encoding, t)
+
 # -------------------------------------------------------------------------------
 # Axiom Generators: Initial Axioms
 # -------------------------------------------------------------------------------
@@ -355,6 +440,19 @@ def axiom_generator_at_most_one_wumpus(xmin, xmax, ymin, ymax):
     axiom_str = ' & '.join(axiom_list)
     return axiom_str
 
+def generate_exactly_one_wumpus_axioms(xmin, xmax, ymin, ymax, encoding='pairwise'):
+    """
+    Assert that there is exactly one Wumpus, with encoding (see
+    generate_at_most_one_axioms); 'pairwise' is the at least one and at most
+    one Wumpus axioms above.
+    xmin, xmax, ymin, ymax := the bounds of the environment.
+    """
+    if encoding == 'pairwise':
+        return [axiom_generator_at_least_one_wumpus(xmin, xmax, ymin, ymax),
+                axiom_generator_at_most_one_wumpus(xmin, xmax, ymin, ymax)]
+    wumpi = [wumpus_str(x, y) for x in range(xmin, xmax + 1) for y in range(ymin, ymax + 1)]
+    return generate_exactly_one_axioms(wumpi, 'W', encoding)
+
 def axiom_generator_only_in_one_location(xi, yi, xmin, xmax, ymin, ymax, t=0):
     """
     Assert that the Agent can only be in one (the current xi,yi) location at time t.
@@ -374,6 +472,18 @@ def axiom_generator_only_in_one_location(xi, yi, xmin, xmax, ymin, ymax, t=0):
     axiom_str = '{0} & {1}'.format(state_loc_str(xi, yi, t), '{0}'.format(' & '.join(notChambers)))
     return axiom_str
 
+def generate_only_in_one_location_axioms(xi, yi, xmin, xmax, ymin, ymax, t=0):
+    """
+    axiom_generator_only_in_one_location as separate unit axioms, which unlike
+    the single conjunction the parser can handle for any size of world.
+    """
+    axioms = [state_loc_str(xi, yi, t)]
+    for xvalue in range(xmin, xmax + 1):
+        for yvalue in range(ymin, ymax + 1):
+            if not (xi == xvalue and yi == yvalue):
+                axioms.append('~' + state_loc_str(xvalue, yvalue, t))
+    return axioms
+
 def axiom_generator_only_one_heading(heading='north', t=0):
     """
     Assert that Agent can only head in one direction at a time.
@@ -408,19 +518,19 @@ def axiom_generator_have_arrow_and_wumpus_alive(t=0):
     axiom_str = '{0} & {1}'.format(state_have_arrow_str(t), state_wumpus_alive_str(t))
     return axiom_str
 
-def initial_wumpus_axioms(xi, yi, width, height, heading='east'):
+def initial_wumpus_axioms(xi, yi, width, height, heading='east', encoding='pairwise'):
     """
     Generate all of the initial wumpus axioms
     xi,yi = initial location
     width,height = dimensions of world
     heading = str representation of the initial agent heading
+    encoding = cardinality encoding of exactly one Wumpus
     """
     axioms = [axiom_generator_initial_location_assertions(xi, yi)]
     axioms.extend(generate_pit_and_breeze_axioms(1, width, 1, height))
     axioms.extend(generate_wumpus_and_stench_axioms(1, width, 1, height))
 
-    axioms.append(axiom_generator_at_least_one_wumpus(1, width, 1, height))
-    axioms.append(axiom_generator_at_most_one_wumpus(1, width, 1, height))
+    axioms.extend(generate_exactly_one_wumpus_axioms(1, width, 1, height, encoding))
 
     axioms.append(axiom_generator_only_in_one_location(xi, yi, 1, width, 1, height))
     axioms.append(axiom_generator_only_one_heading(heading))
@@ -430,6 +540,72 @@ def initial_wumpus_axioms(xi, yi, width, height, heading='east'):
     return axioms
 
 
+# -------------------------------------------------------------------------------
+# Frontier-local axioms
+# For large worlds: rather than the pit/breeze and wumpus/stench axioms of
+# every location up front, and the OK and percept axioms of every location
+# at every time step, assert them only for the locations the agent has
+# visited and their neighbors (the frontier), adding the atemporal axioms
+# of each location when it first enters the frontier.
+
+def frontier_locations(visited, xmin, xmax, ymin, ymax):
+    """
+    The visited locations and their neighbors within the bounds, sorted.
+    visited := iterable of (x,y) locations
+    """
+    frontier = set()
+    for (x, y) in visited:
+        for (xvalue, yvalue) in [(x, y), (x - 1, y), (x, y - 1), (x + 1, y), (x, y + 1)]:
+            if xmin <= xvalue <= xmax and ymin <= yvalue <= ymax:
+                frontier.add((xvalue, yvalue))
+    return sorted(frontier)
+
+def initial_local_wumpus_axioms(xi, yi, width, height, heading='east', encoding='sequential'):
+    """
+    Initial axioms of the frontier-local mode: initial_wumpus_axioms without
+    the per-location pit/breeze and wumpus/stench axioms (see
+    generate_local_atemporal_axioms), and with short axioms only, so that
+    the parser can handle them for large worlds: the location assertions
+    one by one, and exactly one Wumpus in a clause-per-axiom encoding
+    (by default the linear-size sequential counter).
+    """
+    axioms = [axiom_generator_initial_location_assertions(xi, yi)]
+
+    wumpi = [wumpus_str(x, y) for x in range(1, width + 1) for y in range(1, height + 1)]
+    axioms.extend(generate_exactly_one_axioms(wumpi, 'W', encoding))
+
+    axioms.extend(generate_only_in_one_location_axioms(xi, yi, 1, width, 1, height))
+    axioms.append(axiom_generator_only_one_heading(heading))
+
+    axioms.append(axiom_generator_have_arrow_and_wumpus_alive())
+
+    return filter(lambda s: s != '', axioms)
+
+def generate_local_atemporal_axioms(locations, xmin, xmax, ymin, ymax):
+    """
+    Pit/breeze and wumpus/stench axioms of locations only.
+    locations := list of (x,y) locations, e.g. new frontier locations
+    """
+    axioms = []
+    for (x, y) in locations:
+        axioms.append(axiom_generator_pits_and_breezes(x, y, xmin, xmax, ymin, ymax))
+        axioms.append(axiom_generator_wumpus_and_stench(x, y, xmin, xmax, ymin, ymax))
+    return filter(lambda s: s != '', axioms)
+
+def generate_local_temporal_axioms(t, locations):
+    """
+    Location OK and breeze / stench percept axioms at time t of locations only
+    (the frontier: the agent is in one of these locations).
+    """
+    axioms = []
+    for (x, y) in locations:
+        axioms.append(axiom_generator_location_OK(x, y, t))
+    for (x, y) in locations:
+        axioms.append(axiom_generator_breeze_percept_and_location_property(x, y, t))
+        axioms.append(axiom_generator_stench_percept_and_location_property(x, y, t))
+    return filter(lambda s: s != '', axioms)
+
+
 # -------------------------------------------------------------------------------
 # Axiom Generators: Temporal Axioms (added at each time step)
 # -------------------------------------------------------------------------------
@@ -806,17 +982,30 @@ def axiom_generator_only_one_action_axioms(t):
     axiom_str = ' & '.join(axioms)
     return axiom_str
 
-def generate_mutually_exclusive_axioms(t):
+def generate_mutually_exclusive_axioms(t, encoding='pairwise'):
     """
     Generate all time-based mutually exclusive axioms.
+    encoding := cardinality encoding of exactly one heading and action
+                (see generate_at_most_one_axioms); 'pairwise' is the
+                heading_only and only_one_action axioms above
     """
     axioms = []
 
     # must be t+1 to constrain which direction could be heading _next_
-    axioms.extend(generate_heading_only_one_direction_axioms(t + 1))
+    if encoding == 'pairwise':
+        axioms.extend(generate_heading_only_one_direction_axioms(t + 1))
+    else:
+        headings = [state_heading_north_str(t + 1), state_heading_east_str(t + 1),
+                    state_heading_south_str(t + 1), state_heading_west_str(t + 1)]
+        axioms.extend(generate_exactly_one_axioms(headings, 'Heading', encoding, t + 1))
 
     # actions occur in current time, after percept
-    axioms.append(axiom_generator_only_one_action_axioms(t))
+    if encoding == 'pairwise':
+        axioms.append(axiom_generator_only_one_action_axioms(t))
+    else:
+        actions = [action_forward_str(t), action_grab_str(t), action_shoot_str(t), action_climb_str(t),
+                   action_turn_left_str(t), action_turn_right_str(t), action_wait_str(t)]
+        axioms.extend(generate_exactly_one_axioms(actions, 'Action', encoding, t))
 
     return filter(lambda s: s != '', axioms)
 
@@ -28,6 +28,21 @@ def test_axiom_generation():
     print 'num clauses [(3x3) x (3x3)-1 / 2]:', len(at_most_one.split('&'))
     print at_most_one
 
+    wumpi = [wumpus_str(x, y) for x in range(0, 3) for y in range(0, 3)]
+    expected_counts = {'pairwise': '[(3x3) x (3x3)-1 / 2]',
+                       'sequential': '[3 x (3x3) - 4]',
+                       'bimander': '[floor((3x3)/2) + (3x3) x ceil(log2(ceil((3x3)/2)))]'}
+    for encoding in CARDINALITY_ENCODINGS:
+        print '\ngenerate_at_most_one_axioms(wumpi, \'W\', \'{0}\'):'.format(encoding)
+        at_most_one = generate_at_most_one_axioms(wumpi, 'W', encoding)
+        print 'num clauses {0}:'.format(expected_counts[encoding]), len(at_most_one)
+        print at_most_one
+        exactly_one = generate_exactly_one_axioms(wumpi, 'W', encoding)
+        print 'generate_exactly_one_axioms num clauses:', len(exactly_one)
+
+    print '\nfrontier_locations([(0, 0), (1, 0)], 0, 4, 0, 4):'
+    print frontier_locations([(0, 0), (1, 0)], 0, 4, 0, 4)
+
     print '\naxiom_generator_only_in_one_location(2, 3, 0, 4, 0, 4, t=5)'
     only_in_one_loc = axiom_generator_only_in_one_location(2, 3, 0, 4, 0, 4, t=5)
     print 'num clauses:', len(only_in_one_loc.split('&'))
@@ -0,0 +1,522 @@
+# wumpus_layouts.py
+# -----------------
+# Licensing Information:
+# Please DO NOT DISTRIBUTE OR PUBLISH solutions to this project.
+# You are free to use and extend these projects for EDUCATIONAL PURPOSES ONLY.
+# The Hunt The Wumpus AI project was developed at University of Arizona
+# by Clay Morrison (clayton@sista.arizona.edu), spring 2013.
+# This project extends the python code provided by Peter Norvig as part of
+# the Artificial Intelligence: A Modern Approach (AIMA) book example code;
+# see http://aima.cs.berkeley.edu/code.html
+# In particular, the following files come directly from the AIMA python
+# code: ['agents.py', 'logic.py', 'search.py', 'utils.py']
+# ('logic.py' has been modified by Clay Morrison in locations with the
+# comment 'CTM')
+# The file ['minisat.py'] implements a slim system call wrapper to the minisat
+# (see http://minisat.se) SAT solver, and is directly based on the satispy
+# python project, see https://github.com/netom/satispy .
+
+"""
+Procedurally generated wumpus worlds.
+
+A Layout is a world's initial configuration: width, height, entrance and
+one mask per kind of object (pits, wumpi, gold), a string with one byte
+('\\x00' or '\\x01') per location, indexed by (x-1)*height + (y-1).
+
+generate_layout() places pits independently with probability pit_density
+and the given numbers of wumpi and gold on distinct locations, never on
+the entrance, and retries until the world is solvable: a flood fill from
+the entrance over locations without a pit or a wumpus reaches every gold.
+(A wumpus can be shot, but solvability does not rely on it.)
+
+Corpora of layouts:
+    corpus_layout(seed, i, ...)     layout i of the corpus with master seed
+                                    seed, generated on its own (random
+                                    stream wumpus_rng.stream(seed, 'layout', i))
+    generate_corpus(count, seed, ...)  the first count layouts, lazily
+    write_corpus(filename, layouts)    stream layouts to a corpus file
+    read_corpus(filename)              stream them back
+A corpus file is CORPUS_MAGIC + version followed by one record per layout:
+struct RECORD_FORMAT (width, height, entrance) and the three masks packed
+one bit per location, so a 128x128 world takes 6 KB.
+
+Layout files, read through the module's LayoutRegistry (layout_registry,
+used by WumpusWorldScenario.load_layout):
+    .lay   text, see Layout.from_lines
+    .layb  binary: LAYOUT_MAGIC + version and one record as in a corpus
+Each layout is read and parsed once per process; after that a name maps
+straight to its (shared, read-only) Layout.  With compile=True the
+registry also writes a .layb next to each .lay it parses and reads that
+instead as long as it is newer than the .lay.
+
+A Layout plugs into a scenario through its objects():
+    WumpusWorldQLearningScenario(agent=agent, objects=layout.objects(),
+                                 width=layout.width, height=layout.height,
+                                 entrance=layout.entrance)
+
+USAGE:     python wumpus_layouts.py <options>
+EXAMPLES:  (1) python wumpus_layouts.py -n 1000 --min-size 8 --max-size 128 -o corpus.wlc
+               - write 1000 worlds of 8x8 to 128x128 to corpus.wlc
+           (2) python wumpus_layouts.py -n 5 --min-size 6 --max-size 6 --lay-dir layouts
+               - write 5 6x6 worlds as .lay files
+           (3) python wumpus_layouts.py -i corpus.wlc
+               - print the worlds of corpus.wlc
+           (4) python wumpus_layouts.py --compile layouts/*.lay
+               - write a .layb file for each layout
+"""
+
+import os
+import struct
+import sys
+
+from wumpus_environment import Wumpus, Pit, Gold
+import wumpus_rng
+
+HEADER_FORMAT = '<4sI'
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+CORPUS_MAGIC = 'WLYC'
+CORPUS_VERSION = 1
+LAYOUT_MAGIC = 'WLYB'
+LAYOUT_VERSION = 1
+RECORD_FORMAT = '<HHHH'
+RECORD_SIZE = struct.calcsize(RECORD_FORMAT)
+
+# byte value -> its 8 bits as mask bytes (least significant bit first), and back
+_BITS = [''.join('\x01' if b & (1 << k) else '\x00' for k in range(8)) for b in range(256)]
+_BYTE = dict((bits, chr(b)) for b, bits in enumerate(_BITS))
+
+
+def pack_mask(mask):
+    """ Pack a mask (one byte per location) into one bit per location """
+    mask += '\x00' * (-len(mask) % 8)
+    return ''.join([_BYTE[mask[i:i + 8]] for i in range(0, len(mask), 8)])
+
+def unpack_mask(packed, size):
+    """ Inverse of pack_mask for a mask of size locations """
+    return ''.join([_BITS[ord(c)] for c in packed])[:size]
+
+
+class Layout(object):
+    """
+    Initial configuration of a wumpus world (see module docstring).
+    pits, wumpi, gold := masks, strings of width*height '\\x00'/'\\x01' bytes
+    Layouts from a LayoutRegistry are shared: treat them as read-only
+    (objects() makes new objects for every scenario).
+    """
+    __slots__ = ('width', 'height', 'entrance', 'pits', 'wumpi', 'gold')
+
+    def __init__(self, width, height, entrance, pits, wumpi, gold):
+        size = width * height
+        if not (len(pits) == len(wumpi) == len(gold) == size):
+            raise ValueError("Layout masks must have {0}x{1} entries".format(width, height))
+        self.width = width
+        self.height = height
+        self.entrance = entrance
+        self.pits = pits
+        self.wumpi = wumpi
+        self.gold = gold
+
+    @classmethod
+    def from_locations(cls, width, height, entrance, pits=(), wumpi=(), gold=()):
+        """ Layout with objects at lists of (x,y) locations """
+        def mask(locations):
+            m = bytearray(width * height)
+            for (x, y) in locations:
+                m[(x - 1) * height + (y - 1)] = 1
+            return str(m)
+        return cls(width, height, entrance, mask(pits), mask(wumpi), mask(gold))
+
+    @classmethod
+    def from_lines(cls, lines):
+        """
+        Parse the .lay text format: one line per row, top row first, of
+        comma-separated cells, each either '.' or one or more of
+           'W' : wumpus
+           'P' : pit
+           'G' : gold
+           'A' : entrance (default (1,1))
+        Blank lines are ignored.
+        """
+        rows = [line.strip().split(',') for line in lines if line.strip()]
+        height = len(rows)
+        width = max(len(row) for row in rows) if rows else 0
+        entrance = (1, 1)
+        found = {'W': [], 'P': [], 'G': []}
+        for k, row in enumerate(rows):
+            y = height - k
+            for x, cell in enumerate(row, 1):
+                for char in cell:
+                    if char in found:
+                        found[char].append((x, y))
+                    elif char == 'A':
+                        entrance = (x, y)
+        return cls.from_locations(width, height, entrance, found['P'], found['W'], found['G'])
+
+    def index(self, x, y):
+        return (x - 1) * self.height + (y - 1)
+
+    def location(self, i):
+        x, y = divmod(i, self.height)
+        return (x + 1, y + 1)
+
+    def locations(self, mask):
+        """ (x,y) locations set in mask, in index order """
+        locations = []
+        i = mask.find('\x01')
+        while i >= 0:
+            locations.append(self.location(i))
+            i = mask.find('\x01', i + 1)
+        return locations
+
+    def objects(self):
+        """ Scenario objects: [(<wumpus_environment object>, (x,y)), ...] """
+        return [(Wumpus(), loc) for loc in self.locations(self.wumpi)] \
+               + [(Pit(), loc) for loc in self.locations(self.pits)] \
+               + [(Gold(), loc) for loc in self.locations(self.gold)]
+
+    def reachable(self):
+        """
+        bytearray mask of the locations reachable from the entrance without
+        entering a pit or a wumpus (empty if the entrance itself is unsafe)
+        """
+        width, height = self.width, self.height
+        seen = bytearray(width * height)
+        # grid padded with a blocked border, so neighbours need no bounds checks
+        stride = height + 2
+        blocked = bytearray([1]) * ((width + 2) * stride)
+        for x in range(width):
+            blocked[(x + 1) * stride + 1:(x + 1) * stride + 1 + height] = \
+                self.pits[x * height:(x + 1) * height]
+        i = self.wumpi.find('\x01')
+        while i >= 0:
+            blocked[(i // height + 1) * stride + i % height + 1] = 1
+            i = self.wumpi.find('\x01', i + 1)
+        x, y = self.entrance
+        start = x * stride + y
+        if blocked[start]:
+            return seen
+        blocked[start] = 1
+        stack = [start]
+        while stack:
+            i = stack.pop()
+            seen[(i // stride - 1) * height + i % stride - 1] = 1
+            for j in (i - 1, i + 1, i - stride, i + stride):
+                if not blocked[j]:
+                    blocked[j] = 1
+                    stack.append(j)
+        return seen
+
+    def solvable(self):
+        """ True if every gold can be reached from the entrance (see reachable) """
+        seen = self.reachable()
+        i = self.gold.find('\x01')
+        while i >= 0:
+            if not seen[i]:
+                return False
+            i = self.gold.find('\x01', i + 1)
+        return True
+
+    def to_lines(self):
+        """ Rows of the .lay text format (see WumpusWorldScenario.load_layout) """
+        lines = []
+        for y in range(self.height, 0, -1):
+            cells = []
+            for x in range(1, self.width + 1):
+                i = self.index(x, y)
+                cell = ''.join(char for char, mask in (('W', self.wumpi), ('P', self.pits),
+                                                       ('G', self.gold))
+                               if mask[i] != '\x00')
+                if (x, y) == self.entrance:
+                    cell += 'A'
+                cells.append(cell or '.')
+            lines.append(','.join(cells))
+        return lines
+
+    def to_string(self):
+        return '\n'.join(self.to_lines())
+
+    def pack(self):
+        """ Binary record (see module docstring) """
+        return struct.pack(RECORD_FORMAT, self.width, self.height,
+                           self.entrance[0], self.entrance[1]) \
+               + pack_mask(self.pits) + pack_mask(self.wumpi) + pack_mask(self.gold)
+
+    @classmethod
+    def unpack(cls, data, offset=0):
+        """ (Layout, offset of the next record) of the record at offset in data """
+        width, height, ex, ey = struct.unpack_from(RECORD_FORMAT, data, offset)
+        size = width * height
+        n = (size + 7) // 8
+        offset += RECORD_SIZE
+        masks = [unpack_mask(data[offset + k * n:offset + (k + 1) * n], size) for k in range(3)]
+        return cls(width, height, (ex, ey), *masks), offset + 3 * n
+
+    def record_size(self):
+        return RECORD_SIZE + 3 * ((self.width * self.height + 7) // 8)
+
+
+#-------------------------------------------------------------------------------
+# Layout files
+#-------------------------------------------------------------------------------
+
+def read_layout(filename):
+    """ Layout of a .lay or .layb file """
+    f = open(filename, 'rb')
+    try:
+        data = f.read()
+    finally:
+        f.close()
+    if not filename.endswith('.layb'):
+        return Layout.from_lines(data.splitlines())
+    if len(data) < HEADER_SIZE + RECORD_SIZE:
+        raise ValueError("{0}: truncated layout".format(filename))
+    magic, version = struct.unpack_from(HEADER_FORMAT, data)
+    if magic != LAYOUT_MAGIC:
+        raise ValueError("{0} is not a binary layout".format(filename))
+    if version != LAYOUT_VERSION:
+        raise ValueError("{0}: unsupported layout version {1}".format(filename, version))
+    layout, end = Layout.unpack(data, HEADER_SIZE)
+    if end > len(data):
+        raise ValueError("{0}: truncated layout".format(filename))
+    return layout
+
+def write_layout(filename, layout):
+    """ Write layout as .layb (binary) or, for any other extension, .lay text """
+    tmp_filename = filename + '.tmp'
+    f = open(tmp_filename, 'wb')
+    try:
+        if filename.endswith('.layb'):
+            f.write(struct.pack(HEADER_FORMAT, LAYOUT_MAGIC, LAYOUT_VERSION) + layout.pack())
+        else:
+            f.write(layout.to_string() + '\n')
+    finally:
+        f.close()
+    os.rename(tmp_filename, filename)
+
+
+class LayoutRegistry(object):
+    """
+    Layouts by name, each read and parsed once (see module docstring).
+    directories := searched, in order, before the name as given
+    compile := if True, keep a .layb next to each .lay and read it instead
+    """
+
+    def __init__(self, directories=('layouts',), compile=False):
+        self.directories = list(directories)
+        self.compile = compile
+        self.layouts = {}
+
+    def candidates(self, name):
+        """ Files name may refer to, in search order """
+        if not (name.endswith('.lay') or name.endswith('.layb')):
+            name += '.lay'
+        return [os.path.join(d, name) for d in self.directories] + [name]
+
+    def read(self, filename):
+        if not filename.endswith('.lay'):
+            return read_layout(filename)
+        compiled = filename + 'b'
+        try:
+            if os.path.getmtime(compiled) >= os.path.getmtime(filename):
+                return read_layout(compiled)
+        except (OSError, ValueError):
+            pass
+        layout = read_layout(filename)
+        if self.compile:
+            write_layout(compiled, layout)
+        return layout
+
+    def get(self, name):
+        """ Layout of name (a file name, with or without .lay) """
+        layout = self.layouts.get(name)
+        if layout is None:
+            for filename in self.candidates(name):
+                if os.path.exists(filename):
+                    layout = self.layouts[name] = self.read(filename)
+                    break
+            else:
+                raise Exception("Could not find layout file: {0}".format(name))
+        return layout
+
+    def clear(self):
+        self.layouts = {}
+
+layout_registry = LayoutRegistry()
+
+
+#-------------------------------------------------------------------------------
+# Generation
+#-------------------------------------------------------------------------------
+
+def generate_layout(width, height, rng, pit_density=0.2, wumpi=1, gold=1, entrance=(1, 1),
+                    max_tries=1000):
+    """
+    Random solvable Layout (see module docstring).
+    rng := random.Random to draw from (see wumpus_rng.stream)
+    pit_density := probability of a pit at each location but the entrance
+    wumpi, gold := number of wumpi and gold, on distinct pit-free locations
+    max_tries := worlds drawn before giving up (ValueError)
+    """
+    size = width * height
+    start = (entrance[0] - 1) * height + (entrance[1] - 1)
+    if wumpi + gold > size - 1:
+        raise ValueError("No room for {0} wumpi and {1} gold in a {2}x{3} world"
+                         .format(wumpi, gold, width, height))
+    draw = rng.random
+    for attempt in range(max_tries):
+        pits = bytearray(size)
+        for i in range(size):
+            if i != start and draw() < pit_density:
+                pits[i] = 1
+        free = [i for i in range(size) if i != start and not pits[i]]
+        if len(free) < wumpi + gold:
+            continue
+        chosen = rng.sample(free, wumpi + gold)
+        wumpus_mask = bytearray(size)
+        gold_mask = bytearray(size)
+        for i in chosen[:wumpi]:
+            wumpus_mask[i] = 1
+        for i in chosen[wumpi:]:
+            gold_mask[i] = 1
+        layout = Layout(width, height, entrance, str(pits), str(wumpus_mask), str(gold_mask))
+        if layout.solvable():
+            return layout
+    raise ValueError("No solvable {0}x{1} world with pit density {2} in {3} tries"
+                     .format(width, height, pit_density, max_tries))
+
+def corpus_layout(seed, i, min_size=8, max_size=8, **args):
+    """
+    Layout i of the corpus with master seed seed: a square world with a
+    side drawn from [min_size, max_size].  args are passed to
+    generate_layout.  Each layout has its own random stream, so any one
+    can be regenerated without the others.
+    """
+    rng = wumpus_rng.stream(seed, 'layout', i)
+    side = rng.randint(min_size, max_size)
+    return generate_layout(side, side, rng, **args)
+
+def generate_corpus(count, seed, min_size=8, max_size=8, **args):
+    """ Generator of the first count layouts of a corpus (see corpus_layout) """
+    for i in xrange(count):
+        yield corpus_layout(seed, i, min_size, max_size, **args)
+
+
+#-------------------------------------------------------------------------------
+# Corpus files
+#-------------------------------------------------------------------------------
+
+def write_corpus(filename, layouts):
+    """
+    Write the layouts of an iterable (e.g. generate_corpus) as a corpus
+    file, one at a time; returns the number written.  The file is written
+    to a temporary name and renamed once complete.
+    """
+    tmp_filename = filename + '.tmp'
+    count = 0
+    f = open(tmp_filename, 'wb')
+    try:
+        f.write(struct.pack(HEADER_FORMAT, CORPUS_MAGIC, CORPUS_VERSION))
+        for layout in layouts:
+            f.write(layout.pack())
+            count += 1
+    finally:
+        f.close()
+    os.rename(tmp_filename, filename)
+    return count
+
+def read_corpus(filename):
+    """ Generator of the layouts in a corpus file, read one record at a time """
+    f = open(filename, 'rb')
+    try:
+        magic, version = struct.unpack(HEADER_FORMAT, f.read(HEADER_SIZE))
+        if magic != CORPUS_MAGIC:
+            raise ValueError("{0} is not a layout corpus".format(filename))
+        if version != CORPUS_VERSION:
+            raise ValueError("{0}: unsupported corpus version {1}".format(filename, version))
+        while True:
+            header = f.read(RECORD_SIZE)
+            if not header:
+                break
+            if len(header) < RECORD_SIZE:
+                raise ValueError("{0}: truncated corpus".format(filename))
+            width, height = struct.unpack_from('<HH', header)
+            n = 3 * ((width * height + 7) // 8)
+            data = f.read(n)
+            if len(data) < n:
+                raise ValueError("{0}: truncated corpus".format(filename))
+            yield Layout.unpack(header + data)[0]
+    finally:
+        f.close()
+
+
+#-------------------------------------------------------------------------------
+# Command-line interface
+#-------------------------------------------------------------------------------
+
+def default(str):
+  return str + ' [Default: %default]'
+
+def readCommand(argv):
+    from optparse import OptionParser
+    parser = OptionParser(__doc__)
+    parser.add_option('-n', '--count', dest='count', default=100, type='int',
+                      help=default("Number of layouts to generate"))
+    parser.add_option('--seed', dest='seed', default=0, type='int',
+                      help=default("Master seed of the corpus"))
+    parser.add_option('--min-size', dest='min_size', default=8, type='int',
+                      help=default("Smallest world side"))
+    parser.add_option('--max-size', dest='max_size', default=8, type='int',
+                      help=default("Largest world side"))
+    parser.add_option('-p', '--pits', dest='pit_density', default=0.2, type='float',
+                      help=default("Probability of a pit at each location"))
+    parser.add_option('-w', '--wumpi', dest='wumpi', default=1, type='int',
+                      help=default("Number of wumpi per world"))
+    parser.add_option('-g', '--gold', dest='gold', default=1, type='int',
+                      help=default("Number of gold per world"))
+    parser.add_option('-o', '--output', dest='output', default=None,
+                      help=default("Corpus file the layouts are written to"))
+    parser.add_option('--lay-dir', dest='lay_dir', default=None,
+                      help=default("Directory the layouts are written to as .lay files"))
+    parser.add_option('-i', '--input', dest='input', default=None,
+                      help=default("Corpus file to print"))
+    parser.add_option('--compile', action='store_true', dest='compile', default=False,
+                      help=default("Write a binary .layb file for each .lay file given"))
+    options, otherjunk = parser.parse_args(argv)
+    if len(otherjunk) != 0 and not options.compile:
+        raise Exception("Command line input not understood: " + str(otherjunk))
+    options.files = otherjunk
+    return options
+
+def main(argv):
+    options = readCommand(argv)
+    if options.compile:
+        for filename in options.files:
+            write_layout(filename + 'b', read_layout(filename))
+            print "Wrote {0}".format(filename + 'b')
+        return 0
+    if options.input:
+        for i, layout in enumerate(read_corpus(options.input)):
+            print "Layout {0}: {1}x{2}, entrance {3}".format(i, layout.width, layout.height,
+                                                            layout.entrance)
+            print layout.to_string()
+        return 0
+    layouts = generate_corpus(options.count, options.seed, options.min_size, options.max_size,
+                              pit_density=options.pit_density, wumpi=options.wumpi,
+                              gold=options.gold)
+    if options.output:
+        count = write_corpus(options.output, layouts)
+        print "Wrote {0} layouts to {1}".format(count, options.output)
+    elif options.lay_dir:
+        for i, layout in enumerate(layouts):
+            filename = os.path.join(options.lay_dir, 'wumpus_gen_{0}_{1}x{2}_{3}.lay'.format(
+                options.seed, layout.width, layout.height, i))
+            write_layout(filename, layout)
+        print "Wrote {0} layouts to {1}".format(options.count, options.lay_dir)
+    else:
+        for layout in layouts:
+            print layout.to_string()
+            print
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,225 @@
+# wumpus_mdp.py
+# -------------
+# Licensing Information:
+# Please DO NOT DISTRIBUTE OR PUBLISH solutions to this project.
+# You are free to use and extend these projects for EDUCATIONAL PURPOSES ONLY.
+# The Hunt The Wumpus AI project was developed at University of Arizona
+# by Clay Morrison (clayton@sista.arizona.edu), spring 2013.
+# This project extends the python code provided by Peter Norvig as part of
+# the Artificial Intelligence: A Modern Approach (AIMA) book example code;
+# see http://aima.cs.berkeley.edu/code.html
+# In particular, the following files come directly from the AIMA python
+# code: ['agents.py', 'logic.py', 'search.py', 'utils.py']
+# ('logic.py' has been modified by Clay Morrison in locations with the
+# comment 'CTM')
+# The file ['minisat.py'] implements a slim system call wrapper to the minisat
+# (see http://minisat.se) SAT solver, and is directly based on the satispy
+# python project, see https://github.com/netom/satispy .
+
+"""
+Tabular MDP over the QLearningWumpusAgent state
+(x, y, heading, has_gold, wumpus_alive), solved by value iteration.
+
+A WumpusMDP stores, for every (state, action) pair, its outcomes
+(probability, next state, reward, done) in compressed sparse row form:
+flat arrays of outcomes with a row pointer per (state, action), states and
+actions indexed as in wumpus_qtable.QTableLayout.  The model is either
+    - built from a known world (WumpusMDP.from_world), following the
+      dynamics of WumpusQLearningEnvironment, or
+    - estimated from observed transitions (TransitionCounts.to_mdp).
+value_iteration() solves the model; q_values() converts the solution to
+the (state, action) -> Q-value mapping used by QLearningAgent, so the
+result plugs into getPolicy() and the usual evaluation runs.
+
+NOTE: the agent state has no has_arrow component, so the known-world model
+assumes the arrow is still held while the wumpus is alive (a missed Shot
+costs 11 but leaves the state unchanged) and is gone once it is dead.
+"""
+
+from array import array
+
+from wumpus_qtable import QTableLayout
+
+# heading: 0:^:north 1:<:west 2:v:south 3:>:east
+heading_vector = [(0, 1), (-1, 0), (0, -1), (1, 0)]
+
+
+class WumpusMDP(object):
+    """
+    width, height := grid size; actions := list of action names
+    outcomes := function (state, action) -> list of
+                (probability, next_state, reward, done) or None if the
+                outcomes of (state, action) are unknown
+    """
+
+    def __init__(self, width, height, actions, outcomes):
+        self.layout = layout = QTableLayout(width, height, actions)
+        self.row = array('i', [0])
+        self.next_state = array('i')
+        self.probability = array('d')
+        self.reward = array('d')
+        self.done = array('b')
+        for i in range(layout.size):
+            state, action = layout.key(i)
+            for p, next_state, reward, done in outcomes(state, action) or ():
+                self.next_state.append(layout.state_index(next_state))
+                self.probability.append(p)
+                self.reward.append(reward)
+                self.done.append(1 if done else 0)
+            self.row.append(len(self.next_state))
+
+    @classmethod
+    def from_world(cls, width, height, entrance, wumpi, pits, gold, actions,
+                   forwardStochasticOutcome=(0.1, 0.8, 0.1)):
+        """
+        Model of WumpusQLearningEnvironment on a known world.
+        entrance := (x,y); wumpi, pits, gold := lists of (x,y) locations
+        """
+        wumpi = set(wumpi)
+        pits = set(pits)
+        gold = set(gold)
+        p_left, p_forward, p_right = forwardStochasticOutcome
+
+        def inside(x, y):
+            return 1 <= x <= width and 1 <= y <= height
+
+        def move(state, direction):
+            x, y, heading, has_gold, wumpus_alive = state
+            dx, dy = heading_vector[direction]
+            if not inside(x + dx, y + dy):
+                return (state, -1, False)                       # bump
+            loc = (x + dx, y + dy)
+            next_state = (loc[0], loc[1], heading, has_gold, wumpus_alive)
+            if loc in pits or (wumpus_alive and loc in wumpi):
+                return (next_state, -1001, True)                # eaten / fell
+            return (next_state, -1, False)
+
+        def outcomes(state, action):
+            x, y, heading, has_gold, wumpus_alive = state
+            if action == 'TurnRight':
+                return [(1.0, (x, y, (heading - 1) % 4, has_gold, wumpus_alive), -1, False)]
+            if action == 'TurnLeft':
+                return [(1.0, (x, y, (heading + 1) % 4, has_gold, wumpus_alive), -1, False)]
+            if action == 'Forward':
+                return [(p,) + move(state, direction)
+                        for p, direction in ((p_left, (heading + 1) % 4),
+                                             (p_forward, heading),
+                                             (p_right, (heading - 1) % 4))
+                        if p > 0]
+            if action == 'Grab':
+                return [(1.0, (x, y, heading, has_gold or (x, y) in gold, wumpus_alive), -1, False)]
+            if action == 'Climb':
+                if (x, y) == entrance:
+                    return [(1.0, state, 999 if has_gold else -1, True)]
+                return [(1.0, state, -1, False)]
+            if action == 'Shoot':
+                if not wumpus_alive:
+                    return [(1.0, state, -1, False)]
+                dx, dy = heading_vector[heading]
+                ax, ay = x + dx, y + dy
+                while inside(ax, ay):
+                    if (ax, ay) in wumpi:
+                        return [(1.0, (x, y, heading, has_gold, False), -11, False)]
+                    ax, ay = ax + dx, ay + dy
+                return [(1.0, state, -11, False)]
+            return [(1.0, state, -1, False)]
+
+        return cls(width, height, actions, outcomes)
+
+    def q_from_values(self, values, discount, unknown_value=0.0):
+        """ Flat array of Q-values (indexed like the layout) for state values """
+        row, next_state = self.row, self.next_state
+        probability, reward, done = self.probability, self.reward, self.done
+        q = array('d', [0.0]) * self.layout.size
+        for i in range(self.layout.size):
+            total = 0.0 if row[i] < row[i + 1] else unknown_value
+            for k in range(row[i], row[i + 1]):
+                if done[k]:
+                    total += probability[k] * reward[k]
+                else:
+                    total += probability[k] * (reward[k] + discount * values[next_state[k]])
+            q[i] = total
+        return q
+
+    def value_iteration(self, discount, epsilon=1e-6, max_iterations=10000, values=None,
+                        unknown_value=0.0):
+        """
+        Solve the MDP by (in-place, Gauss-Seidel) value iteration.
+        Stops when no state value changes by more than epsilon.
+        values := optional initial state values (e.g. a previous solution)
+        unknown_value := Q-value of (state, action) pairs with unknown outcomes
+                         (an optimistic value makes a greedy agent try them)
+        Returns (values, q) flat arrays, indexed by state / (state, action).
+        """
+        layout = self.layout
+        num_actions = len(layout.actions)
+        row, next_state = self.row, self.next_state
+        probability, reward, done = self.probability, self.reward, self.done
+        if values is None:
+            values = array('d', [0.0]) * layout.num_states
+        for iteration in range(max_iterations):
+            delta = 0.0
+            for s in range(layout.num_states):
+                best = None
+                for i in range(s * num_actions, (s + 1) * num_actions):
+                    total = 0.0 if row[i] < row[i + 1] else unknown_value
+                    for k in range(row[i], row[i + 1]):
+                        if done[k]:
+                            total += probability[k] * reward[k]
+                        else:
+                            total += probability[k] * (reward[k] + discount * values[next_state[k]])
+                    if best is None or total > best:
+                        best = total
+                change = abs(best - values[s])
+                if change > delta:
+                    delta = change
+                values[s] = best
+            if delta <= epsilon:
+                break
+        return values, self.q_from_values(values, discount, unknown_value)
+
+    def q_values(self, q):
+        """
+        Dict of (state, action) -> Q-value for the nonzero entries of q,
+        leaving out pairs with unknown outcomes
+        """
+        key, row = self.layout.key, self.row
+        return dict((key(i), v) for i, v in enumerate(q) if v != 0.0 and row[i] < row[i + 1])
+
+
+class TransitionCounts(object):
+    """
+    Maximum-likelihood model estimated from observed transitions:
+    counts of (next_state, reward, done) outcomes per (state, action).
+    known_threshold := times a (state, action) pair must have been tried
+                       before its outcomes are considered known
+    """
+
+    def __init__(self, known_threshold=1):
+        self.known_threshold = known_threshold
+        self.counts = {}
+        self.totals = {}
+
+    def __len__(self):
+        return len(self.counts)
+
+    def observe(self, state, action, reward, next_state, done=False):
+        outcomes = self.counts.setdefault((state, action), {})
+        outcome = (next_state, reward, done)
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+        self.totals[(state, action)] = self.totals.get((state, action), 0) + 1
+
+    def known(self, state, action):
+        return self.totals.get((state, action), 0) >= self.known_threshold
+
+    def outcomes(self, state, action):
+        """ List of (probability, next_state, reward, done), or None if unknown """
+        if not self.known(state, action):
+            return None
+        outcomes = self.counts[(state, action)]
+        total = float(sum(outcomes.values()))
+        return [(n / total, next_state, reward, done)
+                for (next_state, reward, done), n in outcomes.items()]
+
+    def to_mdp(self, width, height, actions):
+        return WumpusMDP(width, height, actions, self.outcomes)
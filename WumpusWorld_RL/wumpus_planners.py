@@ -18,7 +18,11 @@
 
 from wumpus_environment import *
 from wumpus_kb import *
+from collections import OrderedDict
+import cPickle
+import os
 import search
+import wumpus_grid_search
 
 #-------------------------------------------------------------------------------
 # Distance fn
@@ -68,6 +72,126 @@ def manhattan_distance_with_heading(current, target):
     return md
 
 
+#-------------------------------------------------------------------------------
+# Plan Cache
+#-------------------------------------------------------------------------------
+
+class PlanCache(object):
+    """
+    LRU cache of planner solutions, shared by plan_route and plan_shot.
+    Identical planning calls recur often, both within a single hybrid agent
+    run and across runs on the same layout, and the solution only depends on
+    the search (planner_search), the start state and the goal and allowed
+    location sets.
+    size := maximum number of plans kept (least recently used are evicted)
+    filename := optional path of a pickle file the cache is loaded from
+                (if it exists) and saved to by save(); a file saved under
+                another planner_search is ignored
+    """
+
+    def __init__(self, size=1024, filename=None):
+        self.size = size
+        self.filename = filename
+        self.plans = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        if filename and os.path.exists(filename):
+            self.load(filename)
+
+    def key(self, kind, current, heading, goals, allowed):
+        """
+        Canonical, hashable encoding of a planning call:
+            (kind, planner_search, x, y, heading, frozenset(goals), frozenset(allowed))
+        kind := 'route' or 'shot'
+        The searches break ties between equally short plans differently, so
+        plans of one are never replayed for the other.
+        The goal and allowed collections are order-independent for the
+        planners, so they are reduced to frozensets.
+        """
+        if isinstance(heading, str):
+            heading = Explorer.heading_str_to_num[heading]
+        return (kind, planner_search, current[0], current[1], heading,
+                frozenset(goals), frozenset(allowed))
+
+    def get(self, key):
+        """ Return a copy of the cached plan for key, or None on a miss """
+        plan = self.plans.pop(key, None)
+        if plan is None:
+            self.misses += 1
+            return None
+        self.plans[key] = plan   # re-insert as most recently used
+        self.hits += 1
+        return list(plan)
+
+    def put(self, key, plan):
+        self.plans.pop(key, None)
+        self.plans[key] = tuple(plan)
+        while len(self.plans) > self.size:
+            self.plans.popitem(last=False)
+
+    def clear(self):
+        self.plans.clear()
+        self.hits = self.misses = 0
+
+    def load(self, filename=None):
+        """ Load plans saved by save(); keeps the most recent self.size plans.
+        Returns False (and loads nothing) if the file was saved under another
+        planner_search, or by a version that did not record it """
+        f = open(filename or self.filename, 'rb')
+        try: saved = cPickle.load(f)
+        finally: f.close()
+        if not isinstance(saved, dict) or saved.get('planner_search') != planner_search:
+            return False
+        for key, plan in saved['plans']:
+            self.put(key, plan)
+        return True
+
+    def save(self, filename=None):
+        """ Save the plans of the current planner_search (oldest first, so
+        load() restores the LRU order) """
+        filename = filename or self.filename
+        if not filename: return
+        plans = [(key, plan) for key, plan in self.plans.items() if key[1] == planner_search]
+        f = open(filename, 'wb')
+        try: cPickle.dump({'planner_search': planner_search, 'plans': plans},
+                          f, cPickle.HIGHEST_PROTOCOL)
+        finally: f.close()
+
+    def __len__(self):
+        return len(self.plans)
+
+    def to_string(self):
+        lookups = self.hits + self.misses
+        return "PlanCache: {0} plans (size={1}), hits={2}, misses={3}, hit rate={4:.2f}" \
+               .format(len(self.plans), self.size, self.hits, self.misses,
+                       float(self.hits) / lookups if lookups else 0.0)
+
+# Cache consulted by plan_route() and plan_shot(); set to None to disable
+plan_cache = PlanCache()
+
+# Search used by plan_route() and plan_shot():
+#   'astar' : search.astar_search over PlanRouteProblem / PlanShotProblem
+#   'grid'  : integer-encoded breadth-first search (wumpus_grid_search)
+# Both return plans of the same (optimal) length, but they break ties
+# between equally short plans differently, so 'grid' can change which plan
+# (and so which actions) the hybrid agent takes; it is opt-in.
+PLANNER_SEARCHES = ['astar', 'grid']
+planner_search = 'astar'
+
+# Running totals over all plan_route() / plan_shot() searches (cache hits
+# are not searches); read by profiling code to report expansions per step.
+planner_stats = {'searches': 0, 'expansions': 0}
+
+def configure_plan_cache(size=1024, filename=None):
+    """
+    Replace the module plan cache with a new PlanCache of the given size,
+    optionally backed by filename.  size=0 disables plan caching.
+    """
+    global plan_cache
+    plan_cache = PlanCache(size, filename) if size else None
+    return plan_cache
+
+
 #-------------------------------------------------------------------------------
 # Plan Route
 #-------------------------------------------------------------------------------
@@ -98,12 +222,28 @@ def plan_route(current, heading, goals, allowed):
         heading = Explorer.heading_str_to_num[heading]
 
     if goals and allowed:
-        prp = PlanRouteProblem((current[0], current[1], heading), goals, allowed)
-        # NOTE: PlanRouteProblem will include a method h() that computes
-        #       the heuristic, so no need to provide here to astar_search()
-        node = search.astar_search(prp)
-        if node:
-            return node.solution()
+        if plan_cache is not None:
+            key = plan_cache.key('route', current, heading, goals, allowed)
+            plan = plan_cache.get(key)
+            if plan is not None:
+                return plan
+        plan = []
+        planner_stats['searches'] += 1
+        if planner_search == 'grid':
+            plan = wumpus_grid_search.grid_plan_route(current, heading, goals, allowed,
+                                                      planner_stats)
+        else:
+            prp = search.InstrumentedProblem(
+                PlanRouteProblem((current[0], current[1], heading), goals, allowed))
+            # NOTE: PlanRouteProblem will include a method h() that computes
+            #       the heuristic, so no need to provide here to astar_search()
+            node = search.astar_search(prp)
+            planner_stats['expansions'] += prp.succs
+            if node:
+                plan = node.solution()
+        if plan_cache is not None:
+            plan_cache.put(key, plan)
+        return plan
     
     # no route can be found, return empty list
     return []
@@ -221,10 +361,24 @@ def plan_shot(current, heading, goals, allowed):
     possible wumpus locations (in goals), then append shoot action.
     NOTE: This assumes you can shoot through walls!!  That's ok for now. """
     if goals and allowed:
-        psp = PlanShotProblem((current[0], current[1], heading), goals, allowed)
-        node = search.astar_search(psp)
-        if node:
-            plan = node.solution()
+        if plan_cache is not None:
+            key = plan_cache.key('shot', current, heading, goals, allowed)
+            plan = plan_cache.get(key)
+            if plan is not None:
+                return plan
+        plan = []
+        planner_stats['searches'] += 1
+        if planner_search == 'grid':
+            route = wumpus_grid_search.grid_plan_shot(current, heading, goals, allowed,
+                                                      planner_stats)
+        else:
+            psp = search.InstrumentedProblem(
+                PlanShotProblem((current[0], current[1], heading), goals, allowed))
+            node = search.astar_search(psp)
+            planner_stats['expansions'] += psp.succs
+            route = node.solution() if node else None
+        if route is not None:
+            plan = route
             plan.append(action_shoot_str(None))
             # HACK:
             # since the wumpus_alive axiom asserts that a wumpus is no longer alive
@@ -232,7 +386,9 @@ def plan_shot(current, heading, goals, allowed):
             # need to enforce waiting so that itme elapses and knowledge of
             # "dead wumpus" can then be inferred...
             plan.append(action_wait_str(None))
-            return plan
+        if plan_cache is not None:
+            plan_cache.put(key, plan)
+        return plan
 
     # no route can be found, return empty list
     return []
@@ -0,0 +1,206 @@
+# wumpus_profiler.py
+# ------------------
+# Licensing Information:
+# Please DO NOT DISTRIBUTE OR PUBLISH solutions to this project.
+# You are free to use and extend these projects for EDUCATIONAL PURPOSES ONLY.
+# The Hunt The Wumpus AI project was developed at University of Arizona
+# by Clay Morrison (clayton@sista.arizona.edu), spring 2013.
+# This project extends the python code provided by Peter Norvig as part of
+# the Artificial Intelligence: A Modern Approach (AIMA) book example code;
+# see http://aima.cs.berkeley.edu/code.html
+# In particular, the following files come directly from the AIMA python
+# code: ['agents.py', 'logic.py', 'search.py', 'utils.py']
+# ('logic.py' has been modified by Clay Morrison in locations with the
+# comment 'CTM')
+# The file ['minisat.py'] implements a slim system call wrapper to the minisat
+# (see http://minisat.se) SAT solver, and is directly based on the satispy
+# python project, see https://github.com/netom/satispy .
+
+"""
+Lightweight instrumentation for agents: span timers and counters recorded
+per time step, summarized as latency histograms at the end of an episode.
+
+    profiler = Profiler()
+    profiler.start_step(t)
+    with profiler.span('find_OK_locations') as span:
+        ...
+    print span.elapsed
+    profiler.count('sat_calls', 2)
+    profiler.end_step()
+    ...
+    summary = profiler.end_episode()
+
+A disabled Profiler hands out a shared no-op span and returns immediately
+from every other call, so instrumentation can stay in place at no real cost.
+"""
+
+from timeit import default_timer as timer
+import json
+import math
+
+
+class Span(object):
+    """ Context manager timing one phase; elapsed is in seconds """
+    __slots__ = ('profiler', 'name', 'start', 'elapsed')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.elapsed = 0.0
+
+    def __enter__(self):
+        self.start = timer()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.elapsed = timer() - self.start
+        self.profiler.add_time(self.name, self.elapsed)
+        return False
+
+
+class NullSpan(object):
+    """ Span handed out by a disabled Profiler """
+    __slots__ = ()
+    elapsed = 0.0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+null_span = NullSpan()
+
+
+class Histogram(object):
+    """
+    Latency histogram with power-of-two microsecond buckets:
+    bucket k counts samples in [2^(k-1), 2^k) microseconds (k=0: < 1us).
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = {}
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        us = seconds * 1e6
+        k = int(math.floor(math.log(us, 2))) + 1 if us >= 1 else 0
+        self.buckets[k] = self.buckets.get(k, 0) + 1
+
+    def merge(self, other):
+        """ Add the samples of Histogram other """
+        self.count += other.count
+        self.total += other.total
+        if other.max > self.max:
+            self.max = other.max
+        for k, n in other.buckets.items():
+            self.buckets[k] = self.buckets.get(k, 0) + n
+
+    def to_dict(self):
+        return {'count': self.count,
+                'total': self.total,
+                'mean': self.total / self.count if self.count else 0.0,
+                'max': self.max,
+                'buckets_us': dict(('<{0}'.format(2 ** k), n)
+                                   for k, n in sorted(self.buckets.items()))}
+
+
+class Profiler(object):
+    """
+    Records, per time step, the time spent in each named span and the value
+    of named counters.  end_episode() returns a summary with a latency
+    Histogram per span and per-step counter series.  Only aggregates are
+    kept across episodes (self.episodes, the number summarized, and
+    self.totals, a Histogram per span over all of them), so memory does not
+    grow with the number of episodes.
+    enabled := if False, every call is a no-op
+    output := optional filename; each episode summary is appended to it as
+              one line of JSON
+    """
+
+    def __init__(self, enabled=True, output=None):
+        self.enabled = enabled
+        self.output = output
+        self.episodes = 0
+        self.totals = {}
+        self.start_episode()
+
+    def start_episode(self):
+        self.steps = []
+        self.step = None
+        self.histograms = {}
+
+    def start_step(self, t):
+        if not self.enabled: return
+        self.step = {'t': t, 'spans': {}, 'counters': {}}
+        self.steps.append(self.step)
+
+    def end_step(self):
+        self.step = None
+
+    def span(self, name):
+        if not self.enabled: return null_span
+        return Span(self, name)
+
+    def add_time(self, name, seconds):
+        if not self.enabled: return
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        histogram.add(seconds)
+        if self.step is not None:
+            spans = self.step['spans']
+            spans[name] = spans.get(name, 0.0) + seconds
+
+    def count(self, name, n=1):
+        """ Add n to counter name for the current time step """
+        if not self.enabled or self.step is None: return
+        counters = self.step['counters']
+        counters[name] = counters.get(name, 0) + n
+
+    def end_episode(self):
+        """ Summarize the current episode, store/export it and start a new one """
+        if not self.enabled: return None
+        counter_names = set()
+        for step in self.steps:
+            counter_names.update(step['counters'])
+        summary = {'steps': len(self.steps),
+                   'histograms': dict((name, h.to_dict())
+                                      for name, h in self.histograms.items()),
+                   'counters': dict((name, [step['counters'].get(name, 0)
+                                            for step in self.steps])
+                                    for name in counter_names),
+                   'per_step': self.steps}
+        self.episodes += 1
+        for name, histogram in self.histograms.items():
+            self.totals.setdefault(name, Histogram()).merge(histogram)
+        if self.output:
+            f = open(self.output, 'a')
+            f.write(json.dumps(summary) + '\n')
+            f.close()
+        self.start_episode()
+        return summary
+
+    def to_string(self, summary=None):
+        """ Readable table of span latencies (and counter totals) """
+        if summary is None:
+            summary = {'steps': len(self.steps),
+                       'histograms': dict((name, h.to_dict())
+                                          for name, h in self.histograms.items()),
+                       'counters': {}}
+        lines = ['Profile over {0} time steps:'.format(summary['steps']),
+                 '  {0:32} {1:>6} {2:>11} {3:>11} {4:>11}'.format('span', 'count',
+                                                                 'total(s)', 'mean(s)',
+                                                                 'max(s)')]
+        for name, h in sorted(summary['histograms'].items(), key=lambda i: -i[1]['total']):
+            lines.append('  {0:32} {1:>6} {2:>11.6f} {3:>11.6f} {4:>11.6f}'.format(
+                name, h['count'], h['total'], h['mean'], h['max']))
+        for name, series in sorted(summary['counters'].items()):
+            lines.append('  {0}: total={1} per step={2}'.format(name, sum(series), series))
+        return '\n'.join(lines)
@@ -0,0 +1,220 @@
+# wumpus_qtable.py
+# ----------------
+# Licensing Information:
+# Please DO NOT DISTRIBUTE OR PUBLISH solutions to this project.
+# You are free to use and extend these projects for EDUCATIONAL PURPOSES ONLY.
+# The Hunt The Wumpus AI project was developed at University of Arizona
+# by Clay Morrison (clayton@sista.arizona.edu), spring 2013.
+# This project extends the python code provided by Peter Norvig as part of
+# the Artificial Intelligence: A Modern Approach (AIMA) book example code;
+# see http://aima.cs.berkeley.edu/code.html
+# In particular, the following files come directly from the AIMA python
+# code: ['agents.py', 'logic.py', 'search.py', 'utils.py']
+# ('logic.py' has been modified by Clay Morrison in locations with the
+# comment 'CTM')
+# The file ['minisat.py'] implements a slim system call wrapper to the minisat
+# (see http://minisat.se) SAT solver, and is directly based on the satispy
+# python project, see https://github.com/netom/satispy .
+
+"""
+Binary checkpoint format for QLearningWumpusAgent Q-tables.
+
+The Q learning state (x, y, heading, has_gold, wumpus_alive) ranges over a
+known, small space, so the Q-table is stored as a dense little-endian
+float64 array indexed by
+    ((((x-1)*height + (y-1))*4 + heading)*2 + has_gold)*2 + wumpus_alive
+times the number of actions, plus the action index.
+
+File layout:
+    header   : struct HEADER_FORMAT = magic 'WQTB', version, width, height,
+               number of actions, metadata length, data offset
+    metadata : JSON object; always has 'actions' (list of action names) and
+               'episodes' (training episodes so far), plus any extra fields
+    data     : float64 Q-values, starting at data offset (8-byte aligned)
+
+load_checkpoint() memory-maps the file (copy-on-write), so loading does not
+read or copy the table; Q-values are unpacked on access and updates stay
+private to the process.
+
+USAGE:  python wumpus_qtable.py <checkpoint file>
+        - print the header, metadata and nonzero Q-values of a checkpoint
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+
+MAGIC = 'WQTB'
+VERSION = 1
+HEADER_FORMAT = '<4sIIIIII'
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+VALUE_FORMAT = '<d'
+VALUE_SIZE = struct.calcsize(VALUE_FORMAT)
+
+
+class QTableLayout(object):
+    """
+    Maps (state, action) Q-table keys to dense array indices.
+    state := (x, y, heading, has_gold, wumpus_alive), 1 <= x <= width,
+             1 <= y <= height, heading in 0..3
+    """
+
+    def __init__(self, width, height, actions):
+        self.width = width
+        self.height = height
+        self.actions = list(actions)
+        self.action_index = dict((a, i) for i, a in enumerate(self.actions))
+        self.num_states = width * height * 4 * 2 * 2
+        self.size = self.num_states * len(self.actions)
+
+    def state_index(self, state):
+        """ Dense index of state, or -1 if state is outside the grid """
+        x, y, heading, has_gold, wumpus_alive = state
+        if not (1 <= x <= self.width and 1 <= y <= self.height and 0 <= heading < 4):
+            return -1
+        return ((((x - 1) * self.height + (y - 1)) * 4 + heading) * 2
+                + (1 if has_gold else 0)) * 2 + (1 if wumpus_alive else 0)
+
+    def index(self, key):
+        """ Dense index of (state, action) key, or -1 if not representable """
+        state, action = key
+        a = self.action_index.get(action)
+        if a is None:
+            return -1
+        s = self.state_index(state)
+        if s < 0:
+            return -1
+        return s * len(self.actions) + a
+
+    def key(self, i):
+        """ (state, action) key of dense index i """
+        s, a = divmod(i, len(self.actions))
+        s, wumpus_alive = divmod(s, 2)
+        s, has_gold = divmod(s, 2)
+        c, heading = divmod(s, 4)
+        x, y = divmod(c, self.height)
+        return ((x + 1, y + 1, heading, bool(has_gold), bool(wumpus_alive)),
+                self.actions[a])
+
+
+class MappedQValues(object):
+    """
+    Q-table backed by a memory-mapped checkpoint; a drop-in replacement for
+    the util.Counter in QLearningAgent.qValues (missing keys are 0.0, and
+    argMax() and copy() behave as the Counter's), assigned to the agent as
+    is so that loading never copies the table.
+    Keys outside the checkpoint's grid are kept in an overflow dict.
+    """
+
+    def __init__(self, filename):
+        f = open(filename, 'rb')
+        try:
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        finally:
+            f.close()
+        (magic, version, width, height, num_actions,
+         meta_len, self.data_offset) = struct.unpack_from(HEADER_FORMAT, self.buffer, 0)
+        if magic != MAGIC:
+            raise ValueError("{0} is not a Q-table checkpoint".format(filename))
+        if version != VERSION:
+            raise ValueError("{0}: unsupported checkpoint version {1}".format(filename, version))
+        self.metadata = json.loads(self.buffer[HEADER_SIZE:HEADER_SIZE + meta_len])
+        self.layout = QTableLayout(width, height, [str(a) for a in self.metadata['actions']])
+        if len(self.buffer) < self.data_offset + self.layout.size * VALUE_SIZE:
+            raise ValueError("{0}: truncated checkpoint".format(filename))
+        self.overflow = {}
+
+    def __getitem__(self, key):
+        i = self.layout.index(key)
+        if i < 0:
+            return self.overflow.get(key, 0.0)
+        return struct.unpack_from(VALUE_FORMAT, self.buffer,
+                                  self.data_offset + i * VALUE_SIZE)[0]
+
+    def __setitem__(self, key, value):
+        i = self.layout.index(key)
+        if i < 0:
+            self.overflow[key] = value
+        else:
+            struct.pack_into(VALUE_FORMAT, self.buffer,
+                             self.data_offset + i * VALUE_SIZE, value)
+
+    def items(self):
+        """ (key, value) pairs of the nonzero Q-values """
+        offset = self.data_offset
+        values = struct.unpack_from('<{0}d'.format(self.layout.size), self.buffer, offset)
+        pairs = [(self.layout.key(i), v) for i, v in enumerate(values) if v != 0.0]
+        return pairs + self.overflow.items()
+
+    def __len__(self):
+        return len(self.items())
+
+    def argMax(self):
+        """ Key of the highest Q-value (as util.Counter.argMax); None if all are 0 """
+        pairs = self.items()
+        if not pairs:
+            return None
+        return max(pairs, key=lambda pair: pair[1])[0]
+
+    def copy(self):
+        """ Independent copy of the Q-table (in anonymous memory) """
+        other = MappedQValues.__new__(MappedQValues)
+        other.buffer = mmap.mmap(-1, len(self.buffer))
+        other.buffer[:] = self.buffer[:]
+        other.data_offset = self.data_offset
+        other.metadata = dict(self.metadata)
+        other.layout = self.layout
+        other.overflow = dict(self.overflow)
+        return other
+
+    def close(self):
+        self.buffer.close()
+
+
+def save_checkpoint(filename, qValues, width, height, actions, episodes=0, **metadata):
+    """
+    Write qValues (a mapping of (state, action) -> value, such as util.Counter
+    or MappedQValues) as a binary checkpoint.  Extra keyword arguments are
+    stored in the metadata.  The file is written to a temporary name and
+    renamed, so an interrupted save never leaves a partial checkpoint.
+    Keys outside the width x height grid or actions are dropped.
+    """
+    layout = QTableLayout(width, height, actions)
+    values = [0.0] * layout.size
+    for key, value in qValues.items():
+        i = layout.index(key)
+        if i >= 0:
+            values[i] = value
+    metadata['actions'] = layout.actions
+    metadata['episodes'] = episodes
+    meta = json.dumps(metadata)
+    data_offset = (HEADER_SIZE + len(meta) + VALUE_SIZE - 1) // VALUE_SIZE * VALUE_SIZE
+    tmp_filename = filename + '.tmp'
+    f = open(tmp_filename, 'wb')
+    try:
+        f.write(struct.pack(HEADER_FORMAT, MAGIC, VERSION, width, height,
+                            len(layout.actions), len(meta), data_offset))
+        f.write(meta)
+        f.write('\0' * (data_offset - HEADER_SIZE - len(meta)))
+        f.write(struct.pack('<{0}d'.format(layout.size), *values))
+    finally:
+        f.close()
+    os.rename(tmp_filename, filename)
+
+def load_checkpoint(filename):
+    """ Memory-map a checkpoint; returns MappedQValues (see .metadata) """
+    return MappedQValues(filename)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 2:
+        print __doc__
+        sys.exit(1)
+    q = load_checkpoint(sys.argv[1])
+    print "width={0}, height={1}".format(q.layout.width, q.layout.height)
+    print "metadata: {0}".format(dict((k, v) for k, v in q.metadata.items()
+                                       if k not in ('rng_state', 'env_rng_state')))
+    for (state, action), value in sorted(q.items()):
+        print "{0} {1}: {2}".format(state, action, value)
@@ -0,0 +1,161 @@
+# wumpus_replay.py
+# ----------------
+# Licensing Information:
+# Please DO NOT DISTRIBUTE OR PUBLISH solutions to this project.
+# You are free to use and extend these projects for EDUCATIONAL PURPOSES ONLY.
+# The Hunt The Wumpus AI project was developed at University of Arizona
+# by Clay Morrison (clayton@sista.arizona.edu), spring 2013.
+# This project extends the python code provided by Peter Norvig as part of
+# the Artificial Intelligence: A Modern Approach (AIMA) book example code;
+# see http://aima.cs.berkeley.edu/code.html
+# In particular, the following files come directly from the AIMA python
+# code: ['agents.py', 'logic.py', 'search.py', 'utils.py']
+# ('logic.py' has been modified by Clay Morrison in locations with the
+# comment 'CTM')
+# The file ['minisat.py'] implements a slim system call wrapper to the minisat
+# (see http://minisat.se) SAT solver, and is directly based on the satispy
+# python project, see https://github.com/netom/satispy .
+
+"""
+Experience replay storage for Q learning agents.
+
+ReplayBuffer is a fixed-capacity ring buffer of (state, action, reward,
+next_state, done) transitions, preallocated at construction: actions,
+rewards and done flags live in flat arrays, states in preallocated lists.
+Once full, each new transition overwrites the oldest one.
+
+PrioritizedReplayBuffer samples transition i with probability
+p_i^alpha / sum_k p_k^alpha, where p_i is the magnitude of its last TD
+error, using a sum-tree so that sampling and priority updates cost
+O(log capacity).  Samples come with importance-sampling weights
+(N * P(i))^-beta, normalized by their maximum.
+"""
+
+from array import array
+import random
+
+
+class ReplayBuffer(object):
+    """
+    Ring buffer of transitions with uniform sampling.
+    capacity := max number of transitions kept
+    actions := list of all action names (stored as indices into it)
+    """
+
+    def __init__(self, capacity, actions):
+        self.capacity = capacity
+        self.actions = list(actions)
+        self.action_index = dict((a, i) for i, a in enumerate(self.actions))
+        self.states = [None] * capacity
+        self.next_states = [None] * capacity
+        self.action_ids = array('b', [0]) * capacity
+        self.rewards = array('d', [0.0]) * capacity
+        self.dones = array('b', [0]) * capacity
+        self.size = 0
+        self.next = 0  # slot the next transition is written to
+
+    def __len__(self):
+        return self.size
+
+    def add(self, state, action, reward, next_state, done=False):
+        """ Store a transition; returns its slot index """
+        i = self.next
+        self.states[i] = state
+        self.action_ids[i] = self.action_index[action]
+        self.rewards[i] = reward
+        self.next_states[i] = next_state
+        self.dones[i] = 1 if done else 0
+        self.next = (i + 1) % self.capacity
+        if self.size < self.capacity:
+            self.size += 1
+        return i
+
+    def transition(self, i):
+        """ (state, action, reward, next_state, done) stored in slot i """
+        return (self.states[i], self.actions[self.action_ids[i]], self.rewards[i],
+                self.next_states[i], bool(self.dones[i]))
+
+    def sample(self, batch_size, rng=random):
+        """
+        Sample batch_size slot indices uniformly (with replacement).
+        Returns (indices, weights); weights are all 1.0.
+        """
+        size = self.size
+        return [int(rng.random() * size) for k in range(batch_size)], [1.0] * batch_size
+
+    def update_priorities(self, indices, td_errors):
+        """ Uniform sampling ignores TD errors """
+        pass
+
+
+class PrioritizedReplayBuffer(ReplayBuffer):
+    """
+    Proportional prioritized replay (Schaul et al., 2016) over a sum-tree.
+    alpha := how much prioritization is used (0 = uniform)
+    beta := importance-sampling correction exponent (1 = full correction)
+    epsilon := added to |TD error| so no transition has zero priority
+    """
+
+    def __init__(self, capacity, actions, alpha=0.6, beta=0.4, epsilon=0.01):
+        ReplayBuffer.__init__(self, capacity, actions)
+        self.alpha = alpha
+        self.beta = beta
+        self.epsilon = epsilon
+        # sum-tree: leaves tree[capacity + i] hold the priority of slot i,
+        # internal node k holds tree[2k] + tree[2k+1]; tree[1] is the total
+        self.tree = array('d', [0.0]) * (2 * capacity)
+        self.max_priority = 1.0
+
+    def set_priority(self, i, priority):
+        tree = self.tree
+        k = i + self.capacity
+        tree[k] = priority
+        k //= 2
+        while k >= 1:
+            tree[k] = tree[2 * k] + tree[2 * k + 1]
+            k //= 2
+
+    def find(self, mass):
+        """ Slot whose cumulative priority range contains mass """
+        tree, capacity = self.tree, self.capacity
+        k = 1
+        while k < capacity:
+            left = tree[2 * k]
+            if mass < left or tree[2 * k + 1] <= 0.0:
+                k = 2 * k
+            else:
+                mass -= left
+                k = 2 * k + 1
+        return k - capacity
+
+    def add(self, state, action, reward, next_state, done=False):
+        i = ReplayBuffer.add(self, state, action, reward, next_state, done)
+        # new transitions get the highest priority so they are replayed soon
+        self.set_priority(i, self.max_priority)
+        return i
+
+    def sample(self, batch_size, rng=random):
+        """
+        Stratified sample of batch_size slot indices in proportion to
+        priority.  Returns (indices, importance-sampling weights).
+        """
+        total = self.tree[1]
+        segment = total / batch_size
+        indices = []
+        for k in range(batch_size):
+            i = self.find(segment * (k + rng.random()))
+            # guard against landing on an empty leaf through rounding
+            indices.append(i if i < self.size else self.size - 1)
+        leaves = self.tree
+        capacity = self.capacity
+        n = float(self.size)
+        weights = [(n * leaves[capacity + i] / total) ** -self.beta for i in indices]
+        max_weight = max(weights)
+        return indices, [w / max_weight for w in weights]
+
+    def update_priorities(self, indices, td_errors):
+        for i, td_error in zip(indices, td_errors):
+            priority = (abs(td_error) + self.epsilon) ** self.alpha
+            if priority > self.max_priority:
+                self.max_priority = priority
+            self.set_priority(i, priority)
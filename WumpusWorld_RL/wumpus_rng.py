@@ -0,0 +1,65 @@
+# wumpus_rng.py
+# -------------
+# Licensing Information:
+# Please DO NOT DISTRIBUTE OR PUBLISH solutions to this project.
+# You are free to use and extend these projects for EDUCATIONAL PURPOSES ONLY.
+# The Hunt The Wumpus AI project was developed at University of Arizona
+# by Clay Morrison (clayton@sista.arizona.edu), spring 2013.
+# This project extends the python code provided by Peter Norvig as part of
+# the Artificial Intelligence: A Modern Approach (AIMA) book example code;
+# see http://aima.cs.berkeley.edu/code.html
+# In particular, the following files come directly from the AIMA python
+# code: ['agents.py', 'logic.py', 'search.py', 'utils.py']
+# ('logic.py' has been modified by Clay Morrison in locations with the
+# comment 'CTM')
+# The file ['minisat.py'] implements a slim system call wrapper to the minisat
+# (see http://minisat.se) SAT solver, and is directly based on the satispy
+# python project, see https://github.com/netom/satispy .
+
+"""
+Independent, reproducible random number streams.
+
+Each source of randomness (an environment's slip outcomes, an agent's
+exploration, an actor process) draws from its own random.Random, created by
+stream(seed, *key) from a master seed and a stream key, e.g.
+    stream(seed, 'environment')
+    stream(seed, 'actor', 3)
+The stream's seed is a hash of (seed, key) -- counter-based spawning, as
+NumPy's SeedSequence does -- so streams are uncorrelated, do not depend on
+the order they are created in, and a worker process can rebuild its own
+streams from the master seed and its id alone.
+
+Without a master seed (seed=None) a stream is seeded from the global random
+module, so code that calls random.seed() first stays reproducible.
+
+uniform_block(rng, n) pre-draws n uniform floats in one call, for loops that
+need several draws at once.
+"""
+
+from array import array
+from itertools import repeat
+import hashlib
+import random
+import struct
+
+
+def spawn_seed(seed, *key):
+    """ 64-bit seed of the stream named key under master seed seed """
+    digest = hashlib.sha256(repr((seed,) + key)).digest()
+    return struct.unpack('<Q', digest[:8])[0]
+
+def stream(seed=None, *key):
+    """ random.Random of the stream named key (see spawn_seed) """
+    if seed is None:
+        return random.Random(random.getrandbits(64))
+    return random.Random(spawn_seed(seed, *key))
+
+def uniform_block(rng, n):
+    """ array of n uniform floats in [0, 1) drawn from rng """
+    draw = rng.random
+    return array('d', [draw() for i in repeat(None, n)])
+
+def set_state(rng, state):
+    """ Restore rng.getstate() as read back from a JSON checkpoint (tuples as lists) """
+    version, internal_state, gauss_next = state
+    rng.setstate((version, tuple(internal_state), gauss_next))